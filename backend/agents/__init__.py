@@ -7,5 +7,6 @@ that integrates with the existing B4 AI infrastructure.
 
 from .base_agent import BaseAgent
 from .agent_loader import AgentLoader
+from .agent_manifest import AgentManifest
 
-__all__ = ["BaseAgent", "AgentLoader"]
+__all__ = ["BaseAgent", "AgentLoader", "AgentManifest"]
@@ -1,11 +1,12 @@
 """Agent loader for discovering and instantiating file-based agents."""
 
 from pathlib import Path
-from typing import Dict, Optional, Type
+from typing import Dict, Optional, Tuple, Type
 import os
 
 from .base_agent import BaseAgent
-from modules.agents.gemini_agent import GeminiAgent
+from .agent_manifest import AgentManifest
+from .general_codes.provider_registry import get_provider_registry
 from modules.agents.base_ai_agent import BaseAIAgent
 
 
@@ -19,19 +20,25 @@ class AgentLoader:
     - structure_output.json
     - config.py (optional)
     - special_tools.py (optional)
+
+    Definitions are tracked by an AgentManifest, so listing agents does not
+    touch the disk and cached agents are rebuilt only when their files change.
     """
 
     def __init__(
         self,
         agents_dir: Optional[Path] = None,
-        default_provider: str = "gemini"
+        default_provider: Optional[str] = None,
+        poll_interval: Optional[float] = None
     ):
         """
         Initialize agent loader.
 
         Args:
             agents_dir: Path to agents directory (defaults to ./agents/agent_definitions)
-            default_provider: Default AI provider to use (gemini, openai, groq, ollama)
+            default_provider: Default AI provider to use (gemini, openai, groq,
+                ollama, mock; defaults to AGENT_DEFAULT_PROVIDER or gemini)
+            poll_interval: Seconds between definition change checks (see AgentManifest)
         """
         if agents_dir is None:
             # Default to agents/agent_definitions
@@ -39,48 +46,14 @@ class AgentLoader:
             agents_dir = backend_dir / "agents" / "agent_definitions"
 
         self.agents_dir = Path(agents_dir)
-        self.default_provider = default_provider
-        self._agents_cache: Dict[str, BaseAgent] = {}
-        self._providers_cache: Dict[str, BaseAIAgent] = {}
+        self.default_provider = default_provider or os.getenv("AGENT_DEFAULT_PROVIDER", "gemini")
+        self.manifest = AgentManifest(self.agents_dir, poll_interval=poll_interval)
+        self._agents_cache: Dict[str, Tuple[str, BaseAgent]] = {}
 
     def _get_provider(self, provider_name: str = None) -> BaseAIAgent:
-        """Get or create an AI provider instance."""
+        """Get the shared AI provider instance for a provider name."""
         provider_name = provider_name or self.default_provider
-        provider_name = provider_name.lower()
-
-        # Check cache
-        if provider_name in self._providers_cache:
-            return self._providers_cache[provider_name]
-
-        # Create new provider
-        if provider_name == "gemini":
-            from modules.agents.gemini_agent import GeminiAgent
-            provider = GeminiAgent(
-                model_name=os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
-            )
-        elif provider_name == "openai":
-            from modules.agents.openai_agent import OpenAIAgent
-            provider = OpenAIAgent(
-                model_name=os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-            )
-        elif provider_name == "groq":
-            # Temporarily disabled - groq package not installed
-            raise ValueError("Groq provider temporarily unavailable - missing groq package")
-            # from modules.agents.groq_agent import GroqAgent
-            # provider = GroqAgent(
-            #     model_name=os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
-            # )
-        elif provider_name == "ollama":
-            from modules.agents.ollama_agent import OllamaAgent
-            provider = OllamaAgent(
-                model_name=os.getenv("OLLAMA_MODEL", "llama3.2")
-            )
-        else:
-            raise ValueError(f"Unknown provider: {provider_name}")
-
-        # Cache and return
-        self._providers_cache[provider_name] = provider
-        return provider
+        return get_provider_registry().get(provider_name.lower())
 
     def discover_agents(self) -> Dict[str, Path]:
         """
@@ -89,20 +62,10 @@ class AgentLoader:
         Returns:
             Dictionary mapping agent_id to agent folder path
         """
-        if not self.agents_dir.exists():
-            print(f"⚠️  Agents directory not found: {self.agents_dir}")
-            return {}
-
-        agents = {}
-
-        for item in self.agents_dir.iterdir():
-            if item.is_dir() and not item.name.startswith('.'):
-                # Check if it has required files
-                if (item / "prompt.txt").exists():
-                    agent_id = item.name
-                    agents[agent_id] = item
-
-        return agents
+        return {
+            agent_id: definition.path
+            for agent_id, definition in self.manifest.definitions().items()
+        }
 
     def load_agent(
         self,
@@ -119,17 +82,22 @@ class AgentLoader:
         Returns:
             Loaded BaseAgent instance
         """
-        # Check cache
+        definition = self.manifest.get(agent_id)
         cache_key = f"{agent_id}:{provider or self.default_provider}"
-        if cache_key in self._agents_cache:
-            return self._agents_cache[cache_key]
 
-        # Discover agents
-        agents = self.discover_agents()
-
-        if agent_id not in agents:
+        if definition is None:
+            self._agents_cache.pop(cache_key, None)
             raise ValueError(f"Agent not found: {agent_id}")
 
+        # Check cache (stale once the definition files change)
+        cached = self._agents_cache.get(cache_key)
+        if cached and cached[0] == definition.version:
+            return cached[1]
+        if cached:
+            print(f"🔄 Reloading changed agent: {agent_id}")
+
+        agents = {agent_id: definition.path}
+
         # Get provider
         ai_provider = self._get_provider(provider)
 
@@ -175,7 +143,8 @@ class AgentLoader:
             )
 
         # Cache and return
-        self._agents_cache[cache_key] = agent
+        agent.definition_version = definition.version
+        self._agents_cache[cache_key] = (definition.version, agent)
         return agent
 
     def load_all_agents(self) -> Dict[str, BaseAgent]:
@@ -198,30 +167,12 @@ class AgentLoader:
 
     def get_agent_info(self, agent_id: str) -> Dict:
         """Get metadata about an agent without loading it."""
-        agents = self.discover_agents()
+        definition = self.manifest.get(agent_id)
 
-        if agent_id not in agents:
+        if definition is None:
             raise ValueError(f"Agent not found: {agent_id}")
 
-        agent_path = agents[agent_id]
-
-        # Read basic info
-        info_path = agent_path / "info.txt"
-        if info_path.exists():
-            with open(info_path, 'r') as f:
-                content = f.read()
-        else:
-            content = "No info available"
-
-        return {
-            "agent_id": agent_id,
-            "path": str(agent_path),
-            "info": content,
-            "has_prompt": (agent_path / "prompt.txt").exists(),
-            "has_schema": (agent_path / "structure_output.json").exists(),
-            "has_config": (agent_path / "config.py").exists(),
-            "has_tools": (agent_path / "special_tools.py").exists()
-        }
+        return definition.to_info()
 
     def list_agents(self) -> Dict[str, Dict]:
         """
@@ -230,16 +181,7 @@ class AgentLoader:
         Returns:
             Dictionary mapping agent_id to metadata
         """
-        agents = {}
-        discovered = self.discover_agents()
-
-        for agent_id in discovered.keys():
-            try:
-                agents[agent_id] = self.get_agent_info(agent_id)
-            except Exception as e:
-                print(f"⚠️  Failed to get info for agent {agent_id}: {e}")
-
-        return agents
+        return dict(self.manifest.listing())
 
 
 # Global loader instance
@@ -0,0 +1,261 @@
+"""Manifest of file-based agent definitions with mtime-based hot reload."""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+# Files that make up an agent definition; a change to any of them produces
+# a new definition version.
+DEFINITION_FILES = (
+    "info.txt",
+    "prompt.txt",
+    "structure_output.json",
+    "config.py",
+    "special_tools.py",
+    "agent.py",
+)
+
+
+def parse_info_text(content: str) -> Dict[str, str]:
+    """
+    Parse the ``key: value`` format used by info.txt.
+
+    Indented or key-less lines are treated as continuations of the
+    previous key.
+    """
+    info = {}
+    current_key = None
+    current_value = []
+
+    for line in content.splitlines():
+        line = line.rstrip()
+        if line and ':' in line and not line.startswith(' '):
+            # New key
+            if current_key:
+                info[current_key] = '\n'.join(current_value).strip()
+
+            key, value = line.split(':', 1)
+            current_key = key.strip().lower()
+            current_value = [value.strip()] if value.strip() else []
+        elif line and current_key:
+            # Continuation of previous value
+            current_value.append(line.strip())
+
+    # Don't forget the last key
+    if current_key:
+        info[current_key] = '\n'.join(current_value).strip()
+
+    return info
+
+
+@dataclass
+class AgentDefinition:
+    """Snapshot of one agent folder at a given version."""
+
+    agent_id: str
+    path: Path
+    stamps: Dict[str, Tuple[int, int]]
+    hashes: Dict[str, str]
+    version: str
+    info_text: str = "No info available"
+    info: Dict[str, str] = field(default_factory=dict)
+    schema: Optional[Dict[str, Any]] = None
+
+    def to_info(self) -> Dict[str, Any]:
+        """Return the metadata payload served by ``AgentLoader.get_agent_info``."""
+        return {
+            "agent_id": self.agent_id,
+            "path": str(self.path),
+            "info": self.info_text,
+            "version": self.version,
+            "has_prompt": "prompt.txt" in self.hashes,
+            "has_schema": "structure_output.json" in self.hashes,
+            "has_config": "config.py" in self.hashes,
+            "has_tools": "special_tools.py" in self.hashes
+        }
+
+
+class AgentManifest:
+    """
+    In-memory manifest of the agent_definitions directory.
+
+    The directory is re-scanned at most once per ``poll_interval`` seconds.
+    A scan only stats files; contents are re-read and re-hashed only for
+    agents whose files changed, so listing agents never touches the disk
+    between scans.
+    """
+
+    def __init__(self, agents_dir: Path, poll_interval: Optional[float] = None):
+        """
+        Initialize manifest.
+
+        Args:
+            agents_dir: Path to the agent_definitions directory
+            poll_interval: Minimum seconds between scans
+                (defaults to AGENT_MANIFEST_POLL_INTERVAL or 1.0; 0 checks on every call)
+        """
+        if poll_interval is None:
+            poll_interval = float(os.getenv("AGENT_MANIFEST_POLL_INTERVAL", "1.0"))
+
+        self.agents_dir = Path(agents_dir)
+        self.poll_interval = poll_interval
+        self.generation = 0
+        self._definitions: Dict[str, AgentDefinition] = {}
+        self._listing: Optional[Dict[str, Dict[str, Any]]] = None
+        self._last_scan: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Re-scan the directory if the poll interval has elapsed.
+
+        Args:
+            force: Scan regardless of the poll interval
+
+        Returns:
+            True if any definition was added, changed or removed
+        """
+        now = time.monotonic()
+        if (not force and self._last_scan is not None
+                and now - self._last_scan < self.poll_interval):
+            return False
+
+        with self._lock:
+            self._last_scan = now
+            return self._scan()
+
+    def _scan(self) -> bool:
+        if not self.agents_dir.exists():
+            if self._definitions:
+                print(f"⚠️  Agents directory not found: {self.agents_dir}")
+                self._definitions = {}
+                self._changed()
+                return True
+            return False
+
+        changed = False
+        seen = set()
+
+        for item in self.agents_dir.iterdir():
+            if not item.is_dir() or item.name.startswith('.'):
+                continue
+
+            stamps = self._stat_files(item)
+            # Check if it has required files
+            if "prompt.txt" not in stamps:
+                continue
+
+            agent_id = item.name
+            seen.add(agent_id)
+
+            existing = self._definitions.get(agent_id)
+            if existing and existing.stamps == stamps:
+                continue
+
+            try:
+                definition = self._build_definition(agent_id, item, stamps, existing)
+            except Exception as e:
+                print(f"⚠️  Failed to read agent definition {agent_id}: {e}")
+                continue
+
+            if existing is None or existing.version != definition.version:
+                changed = True
+            self._definitions[agent_id] = definition
+
+        for agent_id in set(self._definitions) - seen:
+            del self._definitions[agent_id]
+            changed = True
+
+        if changed:
+            self._changed()
+        return changed
+
+    def _changed(self):
+        self._listing = None
+        self.generation += 1
+
+    @staticmethod
+    def _stat_files(agent_path: Path) -> Dict[str, Tuple[int, int]]:
+        stamps = {}
+        for name in DEFINITION_FILES:
+            try:
+                st = os.stat(agent_path / name)
+            except OSError:
+                continue
+            stamps[name] = (st.st_mtime_ns, st.st_size)
+        return stamps
+
+    def _build_definition(
+        self,
+        agent_id: str,
+        agent_path: Path,
+        stamps: Dict[str, Tuple[int, int]],
+        existing: Optional[AgentDefinition]
+    ) -> AgentDefinition:
+        contents = {}
+        hashes = {}
+        for name, stamp in stamps.items():
+            if existing and existing.stamps.get(name) == stamp:
+                hashes[name] = existing.hashes[name]
+                continue
+            data = (agent_path / name).read_bytes()
+            contents[name] = data
+            hashes[name] = hashlib.sha256(data).hexdigest()
+
+        version_source = "\n".join(f"{name}:{hashes[name]}" for name in sorted(hashes))
+        version = hashlib.sha256(version_source.encode()).hexdigest()[:16]
+
+        if existing and existing.version == version:
+            # Touched but identical content
+            existing.stamps = stamps
+            return existing
+
+        def read_text(name: str) -> Optional[str]:
+            if name not in hashes:
+                return None
+            data = contents.get(name)
+            if data is None:
+                data = (agent_path / name).read_bytes()
+            return data.decode("utf-8")
+
+        info_text = read_text("info.txt")
+        schema_text = read_text("structure_output.json")
+
+        return AgentDefinition(
+            agent_id=agent_id,
+            path=agent_path,
+            stamps=stamps,
+            hashes=hashes,
+            version=version,
+            info_text=info_text if info_text is not None else "No info available",
+            info=parse_info_text(info_text) if info_text is not None else {},
+            schema=json.loads(schema_text) if schema_text is not None else None
+        )
+
+    def get(self, agent_id: str) -> Optional[AgentDefinition]:
+        """Get the current definition of an agent, or None if it does not exist."""
+        self.refresh()
+        return self._definitions.get(agent_id)
+
+    def definitions(self) -> Dict[str, AgentDefinition]:
+        """Get all current definitions keyed by agent_id."""
+        self.refresh()
+        return dict(self._definitions)
+
+    def listing(self) -> Dict[str, Dict[str, Any]]:
+        """Get metadata for all agents, rebuilt only when the manifest changes."""
+        self.refresh()
+        listing = self._listing
+        if listing is None:
+            listing = {
+                agent_id: definition.to_info()
+                for agent_id, definition in sorted(self._definitions.items())
+            }
+            self._listing = listing
+        return listing
@@ -1,11 +1,15 @@
 """Base agent class for file-based agent definitions."""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, Type
+from typing import Dict, Any, AsyncIterator, Callable, Optional, Type
 from pathlib import Path
 from pydantic import BaseModel
+import asyncio
+import hashlib
 import json
 
+from .agent_manifest import parse_info_text
+
 
 class BaseAgent(ABC):
     """
@@ -36,6 +40,8 @@ class BaseAgent(ABC):
         self.agent_id = agent_id
         self.agent_path = agent_path
         self.ai_provider = ai_provider
+        # Set by AgentLoader to the manifest version this agent was built from
+        self.definition_version: Optional[str] = None
 
         # Load agent configuration
         self.info = self._load_info()
@@ -43,6 +49,41 @@ class BaseAgent(ABC):
         self.output_schema = self._load_output_schema()
         self.config = self._load_config()
 
+        # Schema prompt format (json, compact, typescript) from info.txt or config.py
+        self.schema_format: Optional[str] = (
+            self.info.get("schema_format") or self.config.get("SCHEMA_FORMAT")
+        )
+
+        # Response caching (info.txt "cache: auto|always|never", "cache_ttl: seconds").
+        # "auto" caches only deterministic (temperature 0) calls.
+        self.cache_mode: str = str(self.info.get("cache") or self.config.get("CACHE") or "auto").lower()
+        cache_ttl = self.info.get("cache_ttl") or self.config.get("CACHE_TTL")
+        self.cache_ttl: Optional[float] = float(cache_ttl) if cache_ttl is not None else None
+
+        # Interactive agents can opt into hedged requests (info.txt "hedge: true")
+        hedge = self.info.get("hedge") or self.config.get("HEDGE")
+        self.hedge: Optional[bool] = None if hedge is None else str(hedge).lower() in ("1", "true", "yes")
+
+        # Escalation cascade (info.txt "cascade", see escalation.py)
+        from agents.general_codes.escalation import EscalationPolicy
+        self.escalation: Optional[EscalationPolicy] = EscalationPolicy.from_definition(self.info, self.config)
+
+        # Map-reduce over long inputs (info.txt "chunk_tokens", "chunk_overlap", "reducers", see chunking.py)
+        from agents.general_codes.chunking import ChunkPolicy
+        self.chunking: Optional[ChunkPolicy] = (
+            ChunkPolicy.from_definition(self.info, self.config) if self.output_schema else None
+        )
+
+        # Micro-batching of concurrent calls (info.txt "batch_size", "batch_window_ms", see micro_batcher.py)
+        from agents.general_codes.micro_batcher import BatchPolicy
+        self.batching: Optional[BatchPolicy] = (
+            BatchPolicy.from_definition(self.info, self.config) if self.output_schema else None
+        )
+
+        # Response model is compiled lazily once per agent instance, i.e. once
+        # per definition version since the loader rebuilds agents on change
+        self._response_model: Optional[Type[BaseModel]] = None
+
     def _load_info(self) -> Dict[str, str]:
         """Load info.txt file."""
         info_path = self.agent_path / "info.txt"
@@ -55,30 +96,8 @@ class BaseAgent(ABC):
                 "output": "JSON output"
             }
 
-        info = {}
         with open(info_path, 'r') as f:
-            current_key = None
-            current_value = []
-
-            for line in f:
-                line = line.rstrip()
-                if line and ':' in line and not line.startswith(' '):
-                    # New key
-                    if current_key:
-                        info[current_key] = '\n'.join(current_value).strip()
-
-                    key, value = line.split(':', 1)
-                    current_key = key.strip().lower()
-                    current_value = [value.strip()] if value.strip() else []
-                elif line and current_key:
-                    # Continuation of previous value
-                    current_value.append(line.strip())
-
-            # Don't forget the last key
-            if current_key:
-                info[current_key] = '\n'.join(current_value).strip()
-
-        return info
+            return parse_info_text(f.read())
 
     def _load_prompt(self) -> str:
         """Load prompt.txt file."""
@@ -121,10 +140,17 @@ class BaseAgent(ABC):
             }
 
     def _create_pydantic_model(self) -> Optional[Type[BaseModel]]:
-        """Create a Pydantic model from the JSON schema."""
+        """Get the Pydantic model for the JSON schema, compiling it on first use."""
         if not self.output_schema:
             return None
 
+        if self._response_model is None:
+            self._response_model = self._build_pydantic_model()
+        return self._response_model
+
+    def _build_pydantic_model(self) -> Type[BaseModel]:
+        """Create a Pydantic model from the JSON schema."""
+
         from pydantic import create_model
 
         # Extract properties from schema
@@ -197,27 +223,254 @@ class BaseAgent(ABC):
             "model_requested": model
         })
 
+        from agents.general_codes.cost_tracker import attribute
+        from agents.general_codes.response_cache import get_response_cache
+        from agents.general_codes.single_flight import get_single_flight
+        from modules.agents.usage import track_usage
+
+        cache = kwargs.pop("cache", None)
+        key = self._request_key(input_data, model, kwargs)
+        cache_ttl = self._cache_ttl(kwargs, cache)
+
+        if cache_ttl is not None:
+            cached = await get_response_cache().aget(key)
+            if cached is not None:
+                logger.agent_step(self.agent_id, "Response cache hit")
+                logger.agent_result(self.agent_id, cached)
+                return cached
+
+        async def run() -> Dict[str, Any]:
+            with track_usage() as usage, attribute(agent=self.agent_id):
+                # Cached here per agent, so the selector does not cache the same call again
+                result = await self._process_chunked(input_data, model, logger, cache=False, **kwargs)
+            if cache_ttl is not None:
+                await get_response_cache().aset(key, result, cache_ttl, usage.total_tokens)
+            return result
+
+        # Identical concurrent requests (e.g. duplicate posts in a burst) share one call
+        single_flight = get_single_flight()
+        coalesced_before = single_flight.coalesced
+
+        result = await single_flight.do(key, run)
+        if single_flight.coalesced != coalesced_before:
+            logger.agent_step(self.agent_id, "Shared result of identical in-flight request")
+        return result
+
+    def _cache_ttl(self, params: Dict[str, Any], cache: Optional[bool]) -> Optional[float]:
+        """
+        Get the response cache TTL for a call, or None to bypass the cache.
+
+        Args:
+            params: Call parameters (temperature decides in "auto" mode)
+            cache: Per-call override (True forces caching, False bypasses)
+        """
+        if cache is False or self.cache_ttl == 0:
+            return None
+        if cache is None:
+            if self.cache_mode == "never":
+                return None
+            if self.cache_mode == "auto":
+                default_temperature = self.ai_provider.temperature if self.ai_provider else 0.7
+                if params.get("temperature", default_temperature) != 0:
+                    return None
+
+        from agents.general_codes.response_cache import get_response_cache
+        return self.cache_ttl or get_response_cache().default_ttl
+
+    @property
+    def definition_hash(self) -> str:
+        """Hash of the agent definition (manifest version when loaded by AgentLoader)."""
+        if self.definition_version:
+            return self.definition_version
+        source = json.dumps(
+            [self.info, self.prompt_template, self.output_schema],
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+    def _request_key(self, input_data: str, model: Optional[str], params: Dict[str, Any]) -> str:
+        """Key identifying a request: agent, definition, model, normalized input and params."""
+        from agents.general_codes.single_flight import normalize_input, request_key
+
+        if model is None and self.ai_provider is not None:
+            model = f"{self.ai_provider.provider}:{self.ai_provider.model_name}"
+        return request_key(
+            self.agent_id,
+            self.definition_hash,
+            model,
+            normalize_input(input_data),
+            params
+        )
+
+    def _format_prompt(self, input_data: str) -> str:
+        """Format the prompt template with input_data."""
+        # Some prompts have placeholders, some don't
+        formatted_prompt = self.prompt_template
+        if "{input_data}" in formatted_prompt:
+            formatted_prompt = formatted_prompt.format(input_data=input_data)
+        elif "{input}" in formatted_prompt:
+            formatted_prompt = formatted_prompt.format(input=input_data)
+        # If no placeholder, the input will be passed separately to the AI
+        return formatted_prompt
+
+    def _input_copies(self) -> int:
+        """How often a call sends its input: as the input text, plus once per prompt placeholder."""
+        placeholder = "{input_data}" if "{input_data}" in self.prompt_template else "{input}"
+        return 1 + self.prompt_template.count(placeholder)
+
+    async def _process_chunked(
+        self,
+        input_data: str,
+        model: Optional[str],
+        logger: Any,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Run the agent, splitting inputs too long for the model (or for the
+        agent's chunk_tokens) into chunks that run concurrently and merging
+        their results (pass chunk=False to send the whole input).
+        """
+        chunk = kwargs.pop("chunk", True)
+        if self.chunking is None or not chunk:
+            return await self._process_cascade(input_data, model, logger, **kwargs)
+
+        from agents.general_codes.chunking import context_window, split_text
+        from modules.agents.token_estimator import estimate_tokens
+
+        max_tokens = kwargs.get("max_tokens") or (self.ai_provider.max_tokens if self.ai_provider else 2048)
+        system_tokens = estimate_tokens(self._format_prompt(""))
+        if kwargs.get("route") is not None or model == "auto":
+            # Route first and size the input for the model the router picked
+            model = self._route_for_chunking(input_data, model, max_tokens, kwargs.pop("route", None))
+        window = context_window(model, self.ai_provider)
+        # Prompts with an input placeholder send each chunk twice
+        budget = self.chunking.budget(window, system_tokens, max_tokens, self._input_copies())
+        if estimate_tokens(input_data) <= budget:
+            return await self._process_cascade(input_data, model, logger, **kwargs)
+
+        chunks = split_text(input_data, budget, self.chunking.overlap)
+        logger.agent_step(self.agent_id, "Chunked input", {"chunks": len(chunks), "chunk_tokens": budget})
+
+        # Chunks of one document are not micro-batched back into one prompt
+        kwargs["batch"] = False
+        results = await asyncio.gather(
+            *(self._process_cascade(text, model, logger, **kwargs) for text in chunks)
+        )
+        merged = self._create_pydantic_model().model_validate(
+            self.chunking.reduce(list(results), self.output_schema)
+        ).model_dump()
+
+        logger.agent_step(self.agent_id, "Merged chunk results", {"chunks": len(chunks)})
+        logger.agent_result(self.agent_id, merged)
+        return merged
+
+    def _route_for_chunking(
+        self,
+        input_data: str,
+        model: Optional[str],
+        max_tokens: int,
+        route: Any
+    ) -> str:
+        """
+        Resolve a routed call to the model it will run on, preferring one
+        whose context window fits the whole input. The chunks are then
+        pinned to that model.
+        """
+        from agents.general_codes.ai_model_selector import get_model_selector
+
+        selector = get_model_selector()
+        structured = bool(self.output_schema)
+        try:
+            return selector.resolve_model(
+                model, route, input_data, self._format_prompt(input_data), max_tokens, structured
+            )
+        except ValueError:
+            # No routable model fits the whole input, so route for the prompt alone and chunk
+            return selector.resolve_model(model, route, "", self._format_prompt(""), max_tokens, structured)
+
+    async def _process_cascade(
+        self,
+        input_data: str,
+        model: Optional[str],
+        logger: Any,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Run the agent's model call, escalating weak results along the
+        agent's cascade (pass escalate=False to use the first tier only).
+
+        First-tier calls of batching agents are micro-batched with
+        concurrent calls (pass batch=False to opt out).
+        """
+        escalate = kwargs.pop("escalate", True)
+        batch = kwargs.pop("batch", True)
+        if self.escalation is None or not escalate:
+            return await self._process_batched(input_data, model, logger, batch, **kwargs)
+
+        from agents.general_codes.escalation import get_escalation_manager
+
+        route = kwargs.pop("route", None)
+
+        async def call(tier_model: Optional[str]) -> Dict[str, Any]:
+            if tier_model is None:
+                return await self._process_batched(input_data, model, logger, batch, route=route, **kwargs)
+            logger.agent_step(self.agent_id, "Escalating", {"model": tier_model})
+            return await self._process(input_data, tier_model, logger, **kwargs)
+
+        if model:
+            first_tier = model
+        elif route is not None:
+            first_tier = "routed"
+        else:
+            first_tier = self.ai_provider.model_name if self.ai_provider else "default"
+        return await get_escalation_manager().run(self.agent_id, self.escalation, call, first_tier)
+
+    async def _process_batched(
+        self,
+        input_data: str,
+        model: Optional[str],
+        logger: Any,
+        batch: bool,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Run the agent's model call through the micro-batcher when the agent batches."""
+        if self.batching is None or not batch:
+            return await self._process(input_data, model, logger, **kwargs)
+
+        from agents.general_codes.micro_batcher import get_micro_batcher
+        return await get_micro_batcher().submit(self, input_data, model, logger, kwargs)
+
+    async def _process(
+        self,
+        input_data: str,
+        model: Optional[str],
+        logger: Any,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Run the agent's model call (see process)."""
         try:
             # Import here to avoid circular dependency
             from agents.general_codes.ai_model_selector import get_model_selector
 
-            # Format the prompt with input_data
-            # Some prompts have placeholders, some don't
-            formatted_prompt = self.prompt_template
-            if "{input_data}" in formatted_prompt:
-                formatted_prompt = formatted_prompt.format(input_data=input_data)
-            elif "{input}" in formatted_prompt:
-                formatted_prompt = formatted_prompt.format(input=input_data)
-            # If no placeholder, the input will be passed separately to the AI
-
-            # If model is specified, use model selector instead of default provider
-            if model:
-                logger.agent_step(self.agent_id, "Using model selector", {"model": model})
+            formatted_prompt = self._format_prompt(input_data)
+
+            if self.hedge is not None:
+                kwargs.setdefault("hedge", self.hedge)
+
+            # If a model or routing policy is specified, use model selector instead of default provider
+            if model or kwargs.get("route") is not None:
+                logger.agent_step(self.agent_id, "Using model selector", {
+                    "model": model,
+                    "route": str(kwargs.get("route")) if kwargs.get("route") is not None else None
+                })
                 selector = get_model_selector()
 
                 if self.output_schema:
                     logger.agent_step(self.agent_id, "Generating structured output")
                     response_model = self._create_pydantic_model()
+                    if self.schema_format:
+                        kwargs.setdefault("schema_format", self.schema_format)
                     result = await selector.generate_structured(
                         input_text=input_data,
                         output_schema=response_model,
@@ -250,23 +503,32 @@ class BaseAgent(ABC):
 
             logger.agent_step(self.agent_id, "Using default provider")
 
+            # Route through the selector so rate limits apply to the default provider too
+            selector = get_model_selector()
+            kwargs.setdefault("temperature", self.ai_provider.temperature)
+            kwargs.setdefault("max_tokens", self.ai_provider.max_tokens)
+
             # Use structured output if schema is defined
             if self.output_schema:
                 logger.agent_step(self.agent_id, "Generating structured output with default provider")
                 response_model = self._create_pydantic_model()
-                result = await self.ai_provider.generate_structured(
-                    prompt=input_data,
-                    response_model=response_model,
+                if self.schema_format:
+                    kwargs.setdefault("schema_format", self.schema_format)
+                result = await selector.generate_structured(
+                    input_text=input_data,
+                    output_schema=response_model,
                     system_prompt=formatted_prompt,
+                    provider=self.ai_provider,
                     **kwargs
                 )
                 final_result = result.model_dump() if hasattr(result, 'model_dump') else result
             else:
                 # Fallback to plain text generation
                 logger.agent_step(self.agent_id, "Generating unstructured output with default provider")
-                result = await self.ai_provider.generate(
-                    prompt=input_data,
+                result = await selector.generate(
+                    input_text=input_data,
                     system_prompt=formatted_prompt,
+                    provider=self.ai_provider,
                     **kwargs
                 )
                 final_result = {"result": result}
@@ -278,6 +540,116 @@ class BaseAgent(ABC):
             logger.agent_error(self.agent_id, str(e), e)
             raise
 
+    async def process_stream(
+        self,
+        input_data: str,
+        model: Optional[str] = None,
+        hooks: Optional[Dict[str, Callable[[Any], bool]]] = None,
+        **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process input through the agent, streaming output as it is generated.
+
+        Structured output is parsed incrementally: each top-level field is
+        reported as soon as its value is complete. A hook returning True for
+        a field's value stops generation there, e.g.
+        ``hooks={"should_process": lambda value: value is False}``.
+        Streams bypass the response cache, single-flight and hedging.
+
+        Args:
+            input_data: Input text/message for the agent
+            model: Optional model override (e.g., "gpt-4o", "gemini-2.0-flash")
+            hooks: Early-decision hooks by top-level field name (structured agents)
+            **kwargs: Additional parameters
+
+        Yields:
+            {"type": "delta", "text": ...} for each chunk,
+            {"type": "field", "name": ..., "value": ...} for each completed
+            field, then {"type": "result", "data": ...} with the result
+            process() would return. If a hook stopped generation, data holds
+            the fields completed so far and "stopped_by" names the field.
+        """
+        from agents.general_codes.ai_model_selector import get_model_selector
+        from agents.general_codes.cost_tracker import attribute
+        from agents.general_codes.waterfall_logger import get_waterfall_logger
+        from modules.agents.base_ai_agent import parse_structured
+        from modules.agents.streaming_json import StreamingJSONParser
+
+        logger = get_waterfall_logger()
+        logger.agent_start(self.agent_id, model)
+        logger.agent_step(self.agent_id, "Received input for streaming", {
+            "input_length": len(input_data),
+            "model_requested": model
+        })
+
+        kwargs.pop("cache", None)
+        kwargs.pop("hedge", None)
+
+        try:
+            provider = None
+            if not model and kwargs.get("route") is None:
+                if not self.ai_provider:
+                    raise ValueError(f"Agent {self.agent_id} has no AI provider configured")
+                provider = self.ai_provider
+                kwargs.setdefault("temperature", self.ai_provider.temperature)
+                kwargs.setdefault("max_tokens", self.ai_provider.max_tokens)
+
+            response_model = None
+            if self.output_schema:
+                response_model = self._create_pydantic_model()
+                if self.schema_format:
+                    kwargs.setdefault("schema_format", self.schema_format)
+
+            parser = StreamingJSONParser(hooks) if response_model is not None else None
+            chunks = []
+            stream = get_model_selector().generate_stream(
+                input_text=input_data,
+                model=model,
+                system_prompt=self._format_prompt(input_data),
+                provider=provider,
+                output_schema=response_model,
+                **kwargs
+            )
+            with attribute(agent=self.agent_id):
+                try:
+                    async for chunk in stream:
+                        chunks.append(chunk)
+                        yield {"type": "delta", "text": chunk}
+                        if parser is None:
+                            continue
+                        for name, value in parser.feed(chunk):
+                            yield {"type": "field", "name": name, "value": value}
+                        if parser.stopped_by is not None:
+                            break
+                finally:
+                    # Stops the provider call when a hook ended the stream early
+                    await stream.aclose()
+
+            if parser is not None and parser.stopped_by is not None:
+                final_result = dict(parser.fields)
+                logger.agent_step(self.agent_id, "Stopped generation early", {
+                    "field": parser.stopped_by,
+                    "value": final_result[parser.stopped_by],
+                    "chunks": len(chunks)
+                })
+                logger.agent_result(self.agent_id, final_result)
+                yield {"type": "result", "data": final_result, "stopped_by": parser.stopped_by}
+                return
+
+            text = "".join(chunks)
+            if response_model is not None:
+                final_result = parse_structured(text, response_model).model_dump()
+            else:
+                final_result = {"result": text}
+
+            logger.agent_step(self.agent_id, "Stream complete", {"chunks": len(chunks)})
+            logger.agent_result(self.agent_id, final_result)
+            yield {"type": "result", "data": final_result}
+
+        except Exception as e:
+            logger.agent_error(self.agent_id, str(e), e)
+            raise
+
     def get_info(self) -> Dict[str, Any]:
         """Get agent metadata."""
         return {
@@ -288,6 +660,8 @@ class BaseAgent(ABC):
             "input": self.info.get("input", ""),
             "output": self.info.get("output", ""),
             "has_schema": self.output_schema is not None,
+            "escalation_tiers": list(self.escalation.tiers) if self.escalation else [],
+            "batch_size": self.batching.max_items if self.batching else 1,
             "config": self.config,
             "provider": self.ai_provider.get_info() if self.ai_provider else None
         }
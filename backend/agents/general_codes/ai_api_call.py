@@ -5,6 +5,9 @@ from pydantic import BaseModel
 
 from modules.agents.base_ai_agent import BaseAIAgent
 
+from .circuit_breaker import get_circuit_breakers
+from .cost_tracker import get_cost_tracker
+
 
 async def call_ai_api(
     provider: BaseAIAgent,
@@ -68,6 +71,10 @@ async def call_with_fallback(
     """
     Call AI API with fallback to other providers on failure.
 
+    Providers whose circuit breaker is open are skipped without a request,
+    so an outage costs the healthy provider's latency rather than a failed
+    call per request.
+
     Args:
         providers: List of AI providers to try in order
         prompt: User prompt
@@ -80,16 +87,20 @@ async def call_with_fallback(
     Raises:
         Exception: If all providers fail
     """
+    breakers = get_circuit_breakers()
+    tracker = get_cost_tracker()
     last_error = None
 
     for provider in providers:
         try:
-            return await call_ai_api(
-                provider=provider,
-                prompt=prompt,
-                system_prompt=system_prompt,
-                **kwargs
-            )
+            async with breakers.get(provider.provider, provider.model_name).guard():
+                with tracker.track(provider.model_name, provider.provider):
+                    return await call_ai_api(
+                        provider=provider,
+                        prompt=prompt,
+                        system_prompt=system_prompt,
+                        **kwargs
+                    )
         except Exception as e:
             last_error = e
             continue
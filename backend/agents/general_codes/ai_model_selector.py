@@ -5,56 +5,85 @@ This module provides a unified interface for selecting and using different AI mo
 with support for structured output across all providers.
 """
 
-from typing import Dict, Any, Optional, Type, List
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import replace
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, Optional, Tuple, Type, List
 from pydantic import BaseModel
+import asyncio
 import os
+import time
 
 from modules.agents.base_ai_agent import BaseAIAgent
-from modules.agents.gemini_agent import GeminiAgent
-from modules.agents.openai_agent import OpenAIAgent
-# from modules.agents.groq_agent import GroqAgent  # Temporarily disabled - missing groq package
-from modules.agents.ollama_agent import OllamaAgent
-from modules.agents.deepinfra_agent import DeepInfraAgent
-
-# Placeholder for GroqAgent
-class GroqAgent:
-    """Placeholder for GroqAgent when groq package is not installed."""
-    pass
-
-
-# Model registry with provider mapping
+from modules.agents.token_estimator import estimate_tokens
+from modules.agents.usage import track_usage
+
+# Provider classes (and their SDKs) are imported lazily by the registry
+from .budget_governor import OK, get_budget_governor
+from .circuit_breaker import CircuitOpenError, get_circuit_breakers
+from .concurrency_limiter import get_concurrency_limits
+from .cost_tracker import get_cost_tracker, model_cost
+from .hedging import get_hedge_policy
+from .model_router import RoutePolicy, get_model_router
+from .provider_registry import get_provider_registry
+from .rate_limiter import get_quota_governor
+from .response_cache import get_response_cache
+from .retry_policy import get_retry_policy
+from .single_flight import request_key
+
+
+# Model registry with provider mapping.
+# supports_native_schema: provider enforces the response schema during decoding
+# (OpenAI response_format json_schema, Gemini response_schema, Ollama format)
+# instead of the schema being embedded in the prompt.
+# quality: relative output quality tier (1-5) used as a routing floor.
+# max_output_tokens: most tokens the model generates per call (the context
+# window when not set).
+# routable: False keeps a model out of routing and budget downgrades.
+# local: served by a local Ollama server; routed only when OLLAMA_BASE_URL is set.
 MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
     # Gemini models
     "gemini-2.0-flash-exp": {
         "provider": "gemini",
         "name": "gemini-2.0-flash-exp",
         "supports_structured": True,
+        "supports_native_schema": True,
         "supports_json_mode": True,
         "context_window": 1000000,
+        "max_output_tokens": 8192,
+        "quality": 4,
         "description": "Latest Gemini 2.0 Flash experimental - fast and powerful"
     },
     "gemini-2.0-flash": {
         "provider": "gemini",
         "name": "gemini-2.0-flash",
         "supports_structured": True,
+        "supports_native_schema": True,
         "supports_json_mode": True,
         "context_window": 1000000,
+        "max_output_tokens": 8192,
+        "quality": 4,
         "description": "Gemini 2.0 Flash - stable version"
     },
     "gemini-1.5-pro": {
         "provider": "gemini",
         "name": "gemini-1.5-pro",
         "supports_structured": True,
+        "supports_native_schema": True,
         "supports_json_mode": True,
         "context_window": 2000000,
+        "max_output_tokens": 8192,
+        "quality": 4,
         "description": "Gemini 1.5 Pro - highest quality"
     },
     "gemini-1.5-flash": {
         "provider": "gemini",
         "name": "gemini-1.5-flash",
         "supports_structured": True,
+        "supports_native_schema": True,
         "supports_json_mode": True,
         "context_window": 1000000,
+        "max_output_tokens": 8192,
+        "quality": 3,
         "description": "Gemini 1.5 Flash - balanced performance"
     },
 
@@ -63,40 +92,55 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
         "provider": "openai",
         "name": "gpt-4o",
         "supports_structured": True,
+        "supports_native_schema": True,
         "supports_function_calling": True,
         "context_window": 128000,
+        "max_output_tokens": 16384,
+        "quality": 5,
         "description": "GPT-4 Omni - multimodal flagship"
     },
     "gpt-4o-mini": {
         "provider": "openai",
         "name": "gpt-4o-mini",
         "supports_structured": True,
+        "supports_native_schema": True,
         "supports_function_calling": True,
         "context_window": 128000,
+        "max_output_tokens": 16384,
+        "quality": 3,
         "description": "GPT-4 Omni Mini - affordable and fast"
     },
     "gpt-4-turbo": {
         "provider": "openai",
         "name": "gpt-4-turbo",
         "supports_structured": True,
+        "supports_native_schema": False,
         "supports_function_calling": True,
         "context_window": 128000,
+        "max_output_tokens": 4096,
+        "quality": 4,
         "description": "GPT-4 Turbo - high performance"
     },
     "gpt-4-turbo-2024-04-09": {
         "provider": "openai",
         "name": "gpt-4-turbo-2024-04-09",
         "supports_structured": True,
+        "supports_native_schema": False,
         "supports_function_calling": True,
         "context_window": 128000,
+        "max_output_tokens": 4096,
+        "quality": 4,
         "description": "GPT-4 Turbo April 2024 snapshot"
     },
     "gpt-3.5-turbo": {
         "provider": "openai",
         "name": "gpt-3.5-turbo",
         "supports_structured": True,
+        "supports_native_schema": False,
         "supports_function_calling": True,
         "context_window": 16385,
+        "max_output_tokens": 4096,
+        "quality": 2,
         "description": "GPT-3.5 Turbo - cost-effective"
     },
 
@@ -105,40 +149,55 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
         "provider": "groq",
         "name": "llama-3.3-70b-versatile",
         "supports_structured": True,
+        "supports_native_schema": False,
         "supports_json_mode": True,
         "context_window": 8192,
+        "max_output_tokens": 8192,
+        "quality": 3,
         "description": "LLaMA 3.3 70B on Groq - ultra-fast inference"
     },
     "llama-3.3-70b-specdec": {
         "provider": "groq",
         "name": "llama-3.3-70b-specdec",
         "supports_structured": True,
+        "supports_native_schema": False,
         "supports_json_mode": True,
         "context_window": 8192,
+        "max_output_tokens": 8192,
+        "quality": 3,
         "description": "LLaMA 3.3 70B with speculative decoding"
     },
     "llama-3.1-70b-versatile": {
         "provider": "groq",
         "name": "llama-3.1-70b-versatile",
         "supports_structured": True,
+        "supports_native_schema": False,
         "supports_json_mode": True,
         "context_window": 131072,
+        "max_output_tokens": 8192,
+        "quality": 3,
         "description": "LLaMA 3.1 70B - large context"
     },
     "llama-3.1-8b-instant": {
         "provider": "groq",
         "name": "llama-3.1-8b-instant",
         "supports_structured": True,
+        "supports_native_schema": False,
         "supports_json_mode": True,
         "context_window": 131072,
+        "max_output_tokens": 8192,
+        "quality": 2,
         "description": "LLaMA 3.1 8B - instant responses"
     },
     "mixtral-8x7b-32768": {
         "provider": "groq",
         "name": "mixtral-8x7b-32768",
         "supports_structured": True,
+        "supports_native_schema": False,
         "supports_json_mode": True,
         "context_window": 32768,
+        "max_output_tokens": 32768,
+        "quality": 2,
         "description": "Mixtral 8x7B MoE - efficient and powerful"
     },
 
@@ -147,24 +206,33 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
         "provider": "ollama",
         "name": "llama3.2",
         "supports_structured": True,
+        "supports_native_schema": True,
         "supports_json_mode": True,
         "context_window": 128000,
+        "quality": 2,
+        "local": True,
         "description": "LLaMA 3.2 local - privacy-first"
     },
     "llama3.1": {
         "provider": "ollama",
         "name": "llama3.1",
         "supports_structured": True,
+        "supports_native_schema": True,
         "supports_json_mode": True,
         "context_window": 128000,
+        "quality": 2,
+        "local": True,
         "description": "LLaMA 3.1 local - high quality"
     },
     "gemma2": {
         "provider": "ollama",
         "name": "gemma2",
         "supports_structured": True,
+        "supports_native_schema": True,
         "supports_json_mode": True,
         "context_window": 8192,
+        "quality": 2,
+        "local": True,
         "description": "Gemma 2 local - Google's open model"
     },
 
@@ -173,18 +241,60 @@ MODEL_REGISTRY: Dict[str, Dict[str, Any]] = {
         "provider": "deepinfra",
         "name": "openai/gpt-oss-20b",
         "supports_structured": True,
+        "supports_native_schema": False,
         "supports_json_mode": False,  # This model doesn't support response_format json_object
         "context_window": 8192,
+        "quality": 3,
         "description": "GPT-OSS 20B - Open-source 21B param MoE model via DeepInfra"
     },
     "openai/gpt-oss-20b": {
         "provider": "deepinfra",
         "name": "openai/gpt-oss-20b",
         "supports_structured": True,
+        "supports_native_schema": False,
         "supports_json_mode": False,  # This model doesn't support response_format json_object
         "context_window": 8192,
+        "quality": 3,
         "description": "GPT-OSS 20B - Open-source 21B param MoE model via DeepInfra"
     },
+
+    # Mock model for offline load and latency testing (never chosen by the router)
+    "mock": {
+        "provider": "mock",
+        "name": "mock",
+        "supports_structured": True,
+        "supports_native_schema": True,
+        "supports_json_mode": True,
+        "context_window": 128000,
+        "quality": 1,
+        "routable": False,
+        "description": "Deterministic local mock - schema-valid output, configurable latency and errors (MOCK_LLM_*)"
+    },
+}
+
+# Pricing in USD per million tokens (input, output), used for cost-aware
+# routing. Local and free experimental models cost nothing.
+MODEL_PRICING: Dict[str, Dict[str, float]] = {
+    "gemini-2.0-flash-exp": {"input": 0.0, "output": 0.0},
+    "gemini-2.0-flash": {"input": 0.10, "output": 0.40},
+    "gemini-1.5-pro": {"input": 1.25, "output": 5.00},
+    "gemini-1.5-flash": {"input": 0.075, "output": 0.30},
+    "gpt-4o": {"input": 2.50, "output": 10.00},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+    "gpt-4-turbo": {"input": 10.00, "output": 30.00},
+    "gpt-4-turbo-2024-04-09": {"input": 10.00, "output": 30.00},
+    "gpt-3.5-turbo": {"input": 0.50, "output": 1.50},
+    "llama-3.3-70b-versatile": {"input": 0.59, "output": 0.79},
+    "llama-3.3-70b-specdec": {"input": 0.59, "output": 0.99},
+    "llama-3.1-70b-versatile": {"input": 0.59, "output": 0.79},
+    "llama-3.1-8b-instant": {"input": 0.05, "output": 0.08},
+    "mixtral-8x7b-32768": {"input": 0.24, "output": 0.24},
+    "llama3.2": {"input": 0.0, "output": 0.0},
+    "llama3.1": {"input": 0.0, "output": 0.0},
+    "gemma2": {"input": 0.0, "output": 0.0},
+    "gpt-oss-20b": {"input": 0.03, "output": 0.14},
+    "openai/gpt-oss-20b": {"input": 0.03, "output": 0.14},
+    "mock": {"input": 0.0, "output": 0.0},
 }
 
 # Aliases for convenience
@@ -221,7 +331,6 @@ class AIModelSelector:
             default_model: Default model to use if none specified
         """
         self.default_model = default_model
-        self._provider_cache: Dict[str, BaseAIAgent] = {}
 
     def _resolve_model_name(self, model: Optional[str]) -> str:
         """
@@ -296,71 +405,360 @@ class AIModelSelector:
 
         return MODEL_REGISTRY.copy()
 
-    def _get_provider_instance(
-        self,
-        model_name: str,
-        temperature: float = 0.7,
-        max_tokens: int = 2048
-    ) -> BaseAIAgent:
+    def _get_provider_instance(self, model_name: str) -> BaseAIAgent:
         """
-        Get or create provider instance for a model.
+        Get the shared provider instance for a model.
+
+        Instances come from the process-wide provider registry, so they are
+        shared with the agent loader. Generation parameters are passed per
+        call and do not create separate instances.
 
         Args:
             model_name: Resolved model name
-            temperature: Generation temperature
-            max_tokens: Maximum tokens to generate
 
         Returns:
             Provider instance
         """
-        cache_key = f"{model_name}:{temperature}:{max_tokens}"
+        model_info = MODEL_REGISTRY[model_name]
 
-        if cache_key in self._provider_cache:
-            return self._provider_cache[cache_key]
+        # Skip endpoints known to be down or misconfigured instead of retrying them
+        breaker = get_circuit_breakers().get(model_info["provider"], model_info["name"])
+        breaker.check()
 
-        model_info = MODEL_REGISTRY[model_name]
-        provider_type = model_info["provider"]
+        # Use the actual model name for the provider (e.g., "openai/gpt-oss-20b" for DeepInfra)
+        try:
+            return get_provider_registry().get(model_info["provider"], model_info["name"])
+        except ValueError as e:
+            breaker.trip(str(e))
+            raise
 
-        # Get the actual model name for the provider (e.g., "openai/gpt-oss-20b" for DeepInfra)
-        actual_model_name = model_info["name"]
+    def resolve_model(
+        self,
+        model: Optional[str] = None,
+        route: Any = None,
+        input_text: str = "",
+        system_prompt: Optional[str] = None,
+        max_tokens: int = 2048,
+        structured: bool = False
+    ) -> str:
+        """
+        Get the registry model a call would run on, e.g. to size its input
+        against the model's context window before making it.
 
-        # Create provider instance
-        if provider_type == "gemini":
-            provider = GeminiAgent(
-                model_name=actual_model_name,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
-        elif provider_type == "openai":
-            provider = OpenAIAgent(
-                model_name=actual_model_name,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
-        elif provider_type == "groq":
-            provider = GroqAgent(
-                model_name=actual_model_name,
-                temperature=temperature,
-                max_tokens=max_tokens
+        Args:
+            model: Model name or alias ("auto" routes with the balanced objective)
+            route: RoutePolicy, objective name or policy dict
+            input_text: Input text, for the router's token estimate
+            system_prompt: System prompt
+            max_tokens: Maximum output tokens
+            structured: Whether the call needs structured output
+
+        Returns:
+            Registry model name
+        """
+        prompt_text = f"{system_prompt or ''}\n{input_text}"
+        model_name, _ = self._resolve_call(model, None, route, prompt_text, max_tokens, structured)
+        return model_name
+
+    def _resolve_call(
+        self,
+        model: Optional[str],
+        provider: Optional[BaseAIAgent],
+        route: Any = None,
+        prompt_text: str = "",
+        max_tokens: int = 0,
+        structured: bool = False
+    ) -> Tuple[str, BaseAIAgent]:
+        """
+        Resolve the registry model name and provider instance for a call.
+
+        Args:
+            model: Model name or alias ("auto" routes with the balanced objective)
+            provider: Explicit provider instance (e.g. an agent's default provider)
+            route: RoutePolicy, objective name or policy dict; when given the
+                model is chosen by the router
+            prompt_text: Prompt text, for the router's token estimate
+            max_tokens: Maximum output tokens
+            structured: Whether the call needs structured output
+        """
+        # Pin every call to one model, e.g. LLM_FORCE_MODEL=mock for offline load tests
+        forced = os.getenv("LLM_FORCE_MODEL")
+        if forced:
+            model_name = self._resolve_model_name(forced)
+            return model_name, self._get_provider_instance(model_name)
+
+        if provider is None and route is None and model == "auto":
+            route = "balanced"
+
+        if provider is None and route is not None:
+            policy = RoutePolicy.from_value(route)
+            if structured and not policy.structured:
+                policy = replace(policy, structured=True)
+            return self._route(policy, prompt_text, max_tokens, structured)
+
+        if provider is None:
+            model_name = self._resolve_model_name(model)
+            return self._within_budget(
+                model_name, self._get_provider_instance(model_name), prompt_text, max_tokens, structured
             )
-        elif provider_type == "ollama":
-            provider = OllamaAgent(
-                model_name=actual_model_name,
-                temperature=temperature,
-                max_tokens=max_tokens
+
+        # Map the provider's model back to its registry entry when there is one
+        model_name = provider.model_name
+        for name, info in MODEL_REGISTRY.items():
+            if info["provider"] == provider.provider and info["name"] == provider.model_name:
+                model_name = name
+                break
+        return self._within_budget(model_name, provider, prompt_text, max_tokens, structured)
+
+    def _route(
+        self,
+        policy: RoutePolicy,
+        prompt_text: str,
+        max_tokens: int,
+        structured: bool
+    ) -> Tuple[str, BaseAIAgent]:
+        """
+        Route a call, falling back to the router's next candidate when the
+        chosen model has no usable provider (e.g. a missing API key).
+        """
+        while True:
+            model_name = get_model_router().route(policy, estimate_tokens(prompt_text), max_tokens)
+            try:
+                instance = self._get_provider_instance(model_name)
+            except (ValueError, CircuitOpenError) as e:
+                print(f"⚠️ Routed model {model_name} unavailable ({e}), trying next candidate")
+                policy = replace(policy, exclude=policy.exclude + (model_name,))
+                continue
+            return self._within_budget(model_name, instance, prompt_text, max_tokens, structured)
+
+    def _within_budget(
+        self,
+        model_name: str,
+        provider: BaseAIAgent,
+        prompt_text: str,
+        max_tokens: int,
+        structured: bool
+    ) -> Tuple[str, BaseAIAgent]:
+        """
+        Downgrade a call to the cheapest capable model while its budget is
+        running low.
+
+        Returns:
+            The cheaper model and its provider, or the call's own when the
+            budget is fine or nothing cheaper is available
+        """
+        governor = get_budget_governor()
+        if governor.level() == OK:
+            return model_name, provider
+
+        input_tokens = estimate_tokens(prompt_text)
+        try:
+            cheaper = get_model_router().route(
+                RoutePolicy(objective="cost", min_quality=governor.min_quality, structured=structured),
+                input_tokens,
+                max_tokens
             )
-        elif provider_type == "deepinfra":
-            provider = DeepInfraAgent(
-                model_name=actual_model_name,
-                temperature=temperature,
-                max_tokens=max_tokens
+            if model_cost(cheaper, input_tokens, max_tokens) >= model_cost(model_name, input_tokens, max_tokens):
+                return model_name, provider
+            cheaper_provider = self._get_provider_instance(cheaper)
+        except (ValueError, CircuitOpenError):
+            return model_name, provider
+
+        governor.downgraded += 1
+        print(f"💸 LLM budget low, downgrading {model_name} to {cheaper}")
+        return cheaper, cheaper_provider
+
+    @asynccontextmanager
+    async def _governed(
+        self,
+        model_name: str,
+        provider: BaseAIAgent,
+        prompt_text: str,
+        max_tokens: int,
+        stream: bool = False
+    ) -> AsyncIterator[None]:
+        """
+        Hold a provider call under the spend budget, circuit breaker, quota
+        governor and concurrency limit.
+
+        Waits while the call's budget is exhausted and fails fast if the
+        endpoint's breaker is open. Otherwise waits for
+        RPM/TPM capacity using an estimate of prompt plus maximum output
+        tokens, then for a slot under the endpoint's adaptive concurrency
+        limit, and reconciles with the usage the provider reports. The call's
+        tokens, latency and cost are recorded by the cost tracker.
+
+        Args:
+            model_name: Registry model name
+            provider: Provider instance for model_name
+            prompt_text: Prompt text, for the token estimate
+            max_tokens: Maximum output tokens
+            stream: The call is a stream. Streams take a slot from the
+                endpoint's stream limiter and their latency is not fed to the
+                hedge policy and router (their duration is not comparable)
+        """
+        model_info = MODEL_REGISTRY.get(model_name, {})
+        provider_type = model_info.get("provider", provider.provider)
+        governor = get_quota_governor()
+
+        await get_budget_governor().admit()
+
+        breaker = get_circuit_breakers().get(provider_type, provider.model_name)
+        breaker.check()
+
+        reservation = await governor.acquire(
+            provider_type,
+            model_name,
+            estimate_tokens(prompt_text) + max_tokens,
+            model_info
+        )
+
+        with get_cost_tracker().track(model_name, provider_type) as usage:
+            try:
+                async with get_concurrency_limits().get(provider_type, model_name, stream).slot():
+                    started = time.monotonic()
+                    async with breaker.guard():
+                        try:
+                            yield
+                        except (ValueError, CircuitOpenError):
+                            raise
+                        except Exception:
+                            get_model_router().observe(model_name, error=True)
+                            raise
+                    if not stream:
+                        latency = time.monotonic() - started
+                        get_hedge_policy().latencies.observe(model_name, latency)
+                        get_model_router().observe(model_name, latency)
+            finally:
+                governor.reconcile(reservation, usage.total_tokens if usage.reported else None)
+
+    async def _call(
+        self,
+        model_name: str,
+        provider: BaseAIAgent,
+        call: Callable[[], Awaitable[Any]],
+        prompt_text: str,
+        max_tokens: int
+    ) -> Any:
+        """Run a provider call under _governed."""
+        async with self._governed(model_name, provider, prompt_text, max_tokens):
+            return await call()
+
+    async def _dispatch(
+        self,
+        model_name: str,
+        provider: BaseAIAgent,
+        request: Callable[[str, BaseAIAgent], Awaitable[Any]],
+        prompt_text: str,
+        max_tokens: int,
+        hedge: Optional[bool]
+    ) -> Any:
+        """
+        Run a request with retries, hedging it against an equivalent model
+        when enabled.
+
+        If the call has not returned after the policy's latency percentile
+        for the model and the hedge budget allows it, a second request is
+        sent; the first successful result is returned and the other call
+        cancelled.
+
+        Args:
+            model_name: Registry model name
+            provider: Provider instance for model_name
+            request: Builds the provider call for (model_name, provider)
+            prompt_text: Prompt text, for token estimates
+            max_tokens: Maximum output tokens
+            hedge: Enable hedging (None uses the policy default)
+        """
+        def attempt(name: str, instance: BaseAIAgent) -> Awaitable[Any]:
+            # Each retry is a new governed call (breaker check, quota, slot)
+            return get_retry_policy().run(
+                lambda: self._call(name, instance, lambda: request(name, instance), prompt_text, max_tokens),
+                label=name
             )
-        else:
-            raise ValueError(f"Unknown provider: {provider_type}")
 
-        # Cache and return
-        self._provider_cache[cache_key] = provider
-        return provider
+        policy = get_hedge_policy()
+        if not (policy.enabled if hedge is None else hedge):
+            return await attempt(model_name, provider)
+
+        delay = policy.delay(model_name)
+        if delay is None:
+            return await attempt(model_name, provider)
+
+        primary = asyncio.ensure_future(attempt(model_name, provider))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not policy.try_spend():
+                return await primary
+
+            hedge_name = policy.target(model_name)
+            try:
+                if hedge_name == model_name:
+                    hedge_provider = provider
+                else:
+                    hedge_provider = self._get_provider_instance(self._resolve_model_name(hedge_name))
+            except (ValueError, CircuitOpenError) as e:
+                # An unusable hedge target must not fail the healthy primary call
+                print(f"⚠️ Cannot hedge {model_name} with {hedge_name}: {e}")
+                policy.refund()
+                return await primary
+            print(f"🔀 Hedging {model_name} after {delay:.2f}s with {hedge_name}")
+            hedged = asyncio.ensure_future(attempt(hedge_name, hedge_provider))
+            tasks.add(hedged)
+
+            # First successful result wins; fail only when both calls failed
+            error = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedged:
+                            policy.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _cached(
+        self,
+        key_parts: Callable[[], Tuple[Any, ...]],
+        enabled: bool,
+        ttl: Optional[float],
+        compute: Callable[[], Awaitable[Any]],
+        encode: Callable[[Any], Any] = lambda value: value
+    ) -> Any:
+        """
+        Serve a call from the response cache, or compute and cache it.
+
+        Args:
+            key_parts: Builds everything that determines the response (only
+                called when the cache is enabled)
+            enabled: Whether to use the cache for this call
+            ttl: Entry TTL in seconds (None for the cache default)
+            compute: Performs the call on a miss
+            encode: Converts the result to a JSON-serializable value
+
+        Returns:
+            Computed result, or the cached JSON value on a hit
+        """
+        if not enabled:
+            return await compute()
+
+        cache = get_response_cache()
+        key = request_key("selector", *key_parts())
+        cached = await cache.aget(key)
+        if cached is not None:
+            return cached
+
+        with track_usage() as usage:
+            result = await compute()
+        await cache.aset(key, encode(result), ttl, usage.total_tokens)
+        return result
 
     async def generate(
         self,
@@ -369,6 +767,11 @@ class AIModelSelector:
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 2048,
+        provider: Optional[BaseAIAgent] = None,
+        hedge: Optional[bool] = None,
+        route: Any = None,
+        cache: Optional[bool] = None,
+        cache_ttl: Optional[float] = None,
         **kwargs
     ) -> str:
         """
@@ -380,18 +783,35 @@ class AIModelSelector:
             system_prompt: System prompt
             temperature: Generation temperature
             max_tokens: Maximum tokens
+            provider: Use this provider instance instead of resolving model
+            hedge: Hedge slow calls against an equivalent model
+                (defaults to LLM_HEDGING)
+            route: Let the router pick the model instead (RoutePolicy,
+                objective name or policy dict)
+            cache: Use the response cache (None caches only at temperature 0)
+            cache_ttl: Cache TTL in seconds (defaults to LLM_CACHE_TTL)
             **kwargs: Additional parameters
 
         Returns:
             Generated text
         """
-        model_name = self._resolve_model_name(model)
-        provider = self._get_provider_instance(model_name, temperature, max_tokens)
+        prompt_text = f"{system_prompt or ''}\n{input_text}"
+        model_name, provider = self._resolve_call(model, provider, route, prompt_text, max_tokens)
 
-        return await provider.generate(
-            prompt=input_text,
-            system_prompt=system_prompt,
-            **kwargs
+        def request(name: str, instance: BaseAIAgent) -> Awaitable[str]:
+            return instance.generate(
+                prompt=input_text,
+                system_prompt=system_prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **kwargs
+            )
+
+        return await self._cached(
+            lambda: (model_name, system_prompt, input_text, temperature, max_tokens, kwargs),
+            cache if cache is not None else temperature == 0,
+            cache_ttl,
+            lambda: self._dispatch(model_name, provider, request, prompt_text, max_tokens, hedge)
         )
 
     async def generate_structured(
@@ -402,6 +822,11 @@ class AIModelSelector:
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 2048,
+        provider: Optional[BaseAIAgent] = None,
+        hedge: Optional[bool] = None,
+        route: Any = None,
+        cache: Optional[bool] = None,
+        cache_ttl: Optional[float] = None,
         **kwargs
     ) -> BaseModel:
         """
@@ -414,20 +839,136 @@ class AIModelSelector:
             system_prompt: System prompt
             temperature: Generation temperature
             max_tokens: Maximum tokens
+            provider: Use this provider instance instead of resolving model
+            hedge: Hedge slow calls against an equivalent model
+                (defaults to LLM_HEDGING)
+            route: Let the router pick the model instead (RoutePolicy,
+                objective name or policy dict)
+            cache: Use the response cache (None caches only at temperature 0)
+            cache_ttl: Cache TTL in seconds (defaults to LLM_CACHE_TTL)
             **kwargs: Additional parameters
 
         Returns:
             Pydantic model instance with structured data
         """
-        model_name = self._resolve_model_name(model)
-        provider = self._get_provider_instance(model_name, temperature, max_tokens)
+        prompt_text = f"{system_prompt or ''}\n{input_text}"
+        model_name, provider = self._resolve_call(
+            model, provider, route, prompt_text, max_tokens, structured=True
+        )
+
+        def request(name: str, instance: BaseAIAgent) -> Awaitable[BaseModel]:
+            call_kwargs = dict(kwargs)
+            if name in MODEL_REGISTRY:
+                call_kwargs.setdefault(
+                    "native_schema",
+                    MODEL_REGISTRY[name].get("supports_native_schema", False)
+                )
+            return instance.generate_structured(
+                prompt=input_text,
+                response_model=output_schema,
+                system_prompt=system_prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **call_kwargs
+            )
 
-        return await provider.generate_structured(
-            prompt=input_text,
-            response_model=output_schema,
-            system_prompt=system_prompt,
-            **kwargs
+        result = await self._cached(
+            lambda: (
+                model_name, system_prompt, input_text, temperature, max_tokens,
+                provider._get_schema(output_schema), kwargs
+            ),
+            cache if cache is not None else temperature == 0,
+            cache_ttl,
+            lambda: self._dispatch(model_name, provider, request, prompt_text, max_tokens, hedge),
+            encode=lambda value: value.model_dump()
         )
+        return result if isinstance(result, BaseModel) else output_schema.model_validate(result)
+
+    async def generate_stream(
+        self,
+        input_text: str,
+        model: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        provider: Optional[BaseAIAgent] = None,
+        route: Any = None,
+        output_schema: Optional[Type[BaseModel]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response as the provider generates it.
+
+        Streams go through the same breaker, quota and concurrency limits as
+        other calls, holding the slot until the stream ends. Failures before
+        the first chunk are retried under the retry policy; streams are never
+        cached or hedged.
+
+        Args:
+            input_text: Input text/prompt
+            model: Model name or alias
+            system_prompt: System prompt
+            temperature: Generation temperature
+            max_tokens: Maximum tokens
+            provider: Use this provider instance instead of resolving model
+            route: Let the router pick the model instead (RoutePolicy,
+                objective name or policy dict)
+            output_schema: Stream the JSON text of a structured response
+                for this model (parse the joined text with parse_structured)
+            **kwargs: Additional parameters
+
+        Yields:
+            Text chunks in order
+        """
+        prompt_text = f"{system_prompt or ''}\n{input_text}"
+        model_name, provider = self._resolve_call(
+            model, provider, route, prompt_text, max_tokens, structured=output_schema is not None
+        )
+
+        def open_chunks() -> AsyncIterator[str]:
+            if output_schema is None:
+                return provider.generate_stream(
+                    prompt=input_text,
+                    system_prompt=system_prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **kwargs
+                )
+            return provider.generate_structured_stream(
+                prompt=input_text,
+                response_model=output_schema,
+                system_prompt=system_prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **kwargs
+            )
+
+        async def start() -> Tuple[AsyncExitStack, AsyncIterator[str], Optional[str]]:
+            # Open a governed stream and wait for its first chunk (None if empty)
+            stack = AsyncExitStack()
+            chunks = open_chunks()
+            stack.push_async_callback(chunks.aclose)
+            try:
+                await stack.enter_async_context(
+                    self._governed(model_name, provider, prompt_text, max_tokens, stream=True)
+                )
+                try:
+                    first = await chunks.__anext__()
+                except StopAsyncIteration:
+                    first = None
+            except BaseException as e:
+                await stack.__aexit__(type(e), e, e.__traceback__)
+                raise
+            return stack, chunks, first
+
+        # Failures before the first chunk (e.g. a 429 at stream start) are
+        # retried like other calls; nothing has been yielded yet
+        stack, chunks, first = await get_retry_policy().run(start, label=model_name)
+        async with stack:
+            if first is not None:
+                yield first
+                async for chunk in chunks:
+                    yield chunk
 
 
 # Global selector instance
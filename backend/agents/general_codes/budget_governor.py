@@ -0,0 +1,429 @@
+"""
+Spend budgets for LLM calls over rolling windows.
+
+Budgets are set globally, per workflow or per agent, each with an hourly
+and/or daily limit in USD, from the LLM_BUDGETS environment variable:
+
+    LLM_BUDGETS='{"global": {"daily": 50}, "workflow:waterfall": {"daily": 20, "hourly": 2}, "agent:agent_mother": {"hourly": 0.5}}'
+
+Spend is fed from the cost tracker and matched to budgets by the labels set
+with cost_tracker.attribute. A call is governed by every budget matching
+its labels and the worst level applies:
+
+    ok         below LLM_BUDGET_DEGRADE_AT (0.8) of every limit
+    degraded   past that fraction: calls are downgraded to the cheapest
+               capable model (quality tier LLM_BUDGET_MIN_QUALITY or above,
+               default 3) and optional waterfall stages are skipped
+    exhausted  at a limit: calls wait until enough spend has left the
+               window, up to LLM_BUDGET_MAX_WAIT seconds (3600), and then
+               fail with BudgetExceededError
+
+Calls already running when a limit is reached still finish, so spend can
+overshoot a limit by the cost of the calls in flight.
+
+Spend is kept in a SQLite file (LLM_BUDGET_PATH, in the temp dir by default)
+shared by all worker processes on the host, on wall-clock time, so budgets
+hold across workers and restarts. Other workers' spend is picked up at most
+LLM_BUDGET_REFRESH seconds (1) late. With LLM_BUDGET_PATH empty, or if the
+file cannot be opened, each process keeps its own budgets in memory. Hosts
+that do not share the file (e.g. separate containers) each get the full
+budget.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from .cost_tracker import CallRecord, current_labels, get_cost_tracker
+
+
+# Window name -> length in seconds
+WINDOWS = {"hourly": 3600.0, "daily": 86400.0}
+
+# Budget levels, in increasing severity
+OK = "ok"
+DEGRADED = "degraded"
+EXHAUSTED = "exhausted"
+_SEVERITY = {OK: 0, DEGRADED: 1, EXHAUSTED: 2}
+
+
+class BudgetExceededError(RuntimeError):
+    """Raised when a call cannot run within its spend budget."""
+
+
+class SpendWindow:
+    """Spend over a rolling window, kept in one-minute buckets."""
+
+    BUCKET = 60.0
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.buckets: Deque[List[float]] = deque()  # [bucket start, cost]
+        self.total = 0.0
+
+    def _expire(self, now: float):
+        # A bucket leaves the window once its last moment is older than the window
+        while self.buckets and self.buckets[0][0] + self.BUCKET + self.seconds <= now:
+            self.total -= self.buckets.popleft()[1]
+        if not self.buckets:
+            self.total = 0.0
+
+    def add(self, cost: float, now: float):
+        self._expire(now)
+        start = now - now % self.BUCKET
+        if self.buckets and self.buckets[-1][0] == start:
+            self.buckets[-1][1] += cost
+        else:
+            self.buckets.append([start, cost])
+        self.total += cost
+
+    def load(self, buckets: List[List[float]], now: float):
+        """Replace the window's spend with ``[bucket start, cost]`` buckets."""
+        self.buckets = deque(list(bucket) for bucket in buckets)
+        self.total = sum(cost for _, cost in self.buckets)
+        self._expire(now)
+
+    def spent(self, now: float) -> float:
+        """Spend within the window."""
+        self._expire(now)
+        return self.total
+
+    def time_until_below(self, limit: float, now: float) -> float:
+        """Seconds until spend drops below ``limit`` (0 if it already is)."""
+        self._expire(now)
+        remaining = self.total
+        wait = 0.0
+        for start, cost in self.buckets:
+            if remaining < limit:
+                break
+            remaining -= cost
+            wait = start + self.BUCKET + self.seconds - now
+        return max(0.0, wait)
+
+
+class SpendStore:
+    """Per-scope spend in one-minute buckets, in a SQLite file shared by worker processes."""
+
+    # Buckets older than the longest window are purged once every this many writes
+    PURGE_EVERY = 100
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._db is None:
+            try:
+                db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS spend ("
+                    "scope TEXT NOT NULL, bucket REAL NOT NULL, cost REAL NOT NULL, "
+                    "PRIMARY KEY (scope, bucket))"
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️  LLM budget store disabled, budgets are per process: {e}")
+                self.path = ""
+                return None
+            self._db = db
+        return self._db
+
+    def add(self, scope: str, cost: float, now: float):
+        """Add spend to the bucket holding ``now``."""
+        bucket = now - now % SpendWindow.BUCKET
+        with self._lock:
+            db = self._connection()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT INTO spend (scope, bucket, cost) VALUES (?, ?, ?) "
+                    "ON CONFLICT (scope, bucket) DO UPDATE SET cost = cost + excluded.cost",
+                    (scope, bucket, cost)
+                )
+                self._writes += 1
+                if self._writes % self.PURGE_EVERY == 0:
+                    oldest = now - max(WINDOWS.values()) - SpendWindow.BUCKET
+                    db.execute("DELETE FROM spend WHERE bucket < ?", (oldest,))
+                db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️  LLM budget store write failed: {e}")
+
+    def buckets(self, scope: str, since: float) -> Optional[List[List[float]]]:
+        """
+        Get a scope's ``[bucket start, cost]`` buckets starting after ``since``.
+
+        Returns:
+            The buckets in time order, or None if the store is unavailable
+        """
+        with self._lock:
+            db = self._connection()
+            if db is None:
+                return None
+            try:
+                rows = db.execute(
+                    "SELECT bucket, cost FROM spend WHERE scope = ? AND bucket > ? ORDER BY bucket",
+                    (scope, since)
+                ).fetchall()
+            except sqlite3.Error:
+                return None
+        return [list(row) for row in rows]
+
+
+class Budget:
+    """Hourly and/or daily spend limits for one scope."""
+
+    def __init__(
+        self,
+        scope: str,
+        limits: Dict[str, float],
+        store: Optional[SpendStore] = None,
+        refresh: float = 1.0
+    ):
+        """
+        Initialize budget.
+
+        Args:
+            scope: "global", "workflow:<name>" or "agent:<name>"
+            limits: {"hourly": usd, "daily": usd}
+            store: Shared spend store (None keeps spend in this process only)
+            refresh: Seconds between reloads of spend from the store
+        """
+        unknown = set(limits) - set(WINDOWS)
+        if unknown:
+            raise ValueError(f"Unknown budget windows for {scope}: {sorted(unknown)}")
+
+        self.scope = scope
+        self.limits = {window: float(limit) for window, limit in limits.items()}
+        self.windows = {window: SpendWindow(WINDOWS[window]) for window in self.limits}
+        self.store = store
+        self.refresh = refresh
+        self._loaded_at: Optional[float] = None
+
+    def add(self, cost: float, now: float):
+        # Counted locally too, so this process sees its own spend before the next reload
+        for window in self.windows.values():
+            window.add(cost, now)
+        if self.store is not None:
+            self.store.add(self.scope, cost, now)
+
+    def _load(self, now: float):
+        # Pick up spend from other processes sharing the store
+        if self.store is None or not self.windows:
+            return
+        if self._loaded_at is not None and now - self._loaded_at < self.refresh:
+            return
+        longest = max(window.seconds for window in self.windows.values())
+        buckets = self.store.buckets(self.scope, now - longest - SpendWindow.BUCKET)
+        if buckets is None:
+            return
+        for window in self.windows.values():
+            window.load(buckets, now)
+        self._loaded_at = now
+
+    def level(self, now: float, degrade_at: float) -> str:
+        self._load(now)
+        level = OK
+        for name, window in self.windows.items():
+            spent = window.spent(now)
+            if spent >= self.limits[name]:
+                return EXHAUSTED
+            if spent >= self.limits[name] * degrade_at:
+                level = DEGRADED
+        return level
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until every window is below its limit."""
+        self._load(now)
+        return max(
+            (window.time_until_below(self.limits[name], now) for name, window in self.windows.items()),
+            default=0.0
+        )
+
+    def stats(self, now: float, degrade_at: float) -> Dict[str, Any]:
+        # level() reloads the windows first
+        stats: Dict[str, Any] = {"level": self.level(now, degrade_at)}
+        for name, window in self.windows.items():
+            stats[name] = {
+                "limit_usd": self.limits[name],
+                "spent_usd": round(window.spent(now), 6)
+            }
+        return stats
+
+
+class BudgetGovernor:
+    """Keeps LLM spend within rolling budgets by degrading, then queueing calls."""
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, Dict[str, float]]] = None,
+        degrade_at: Optional[float] = None,
+        max_wait: Optional[float] = None,
+        min_quality: Optional[int] = None,
+        path: Optional[str] = None,
+        refresh: Optional[float] = None
+    ):
+        """
+        Initialize governor.
+
+        Args:
+            budgets: {scope: {"hourly": usd, "daily": usd}} (defaults to LLM_BUDGETS)
+            degrade_at: Fraction of a limit at which calls are degraded
+                (defaults to LLM_BUDGET_DEGRADE_AT or 0.8)
+            max_wait: Longest a call waits for an exhausted budget, in
+                seconds (defaults to LLM_BUDGET_MAX_WAIT or 3600)
+            min_quality: Lowest quality tier calls are downgraded to
+                (defaults to LLM_BUDGET_MIN_QUALITY or 3)
+            path: SQLite file shared by worker processes ("" keeps spend
+                per process; defaults to LLM_BUDGET_PATH)
+            refresh: Seconds between reloads of other processes' spend
+                (defaults to LLM_BUDGET_REFRESH or 1)
+        """
+        if budgets is None:
+            budgets = json.loads(os.getenv("LLM_BUDGETS", "{}"))
+        if degrade_at is None:
+            degrade_at = float(os.getenv("LLM_BUDGET_DEGRADE_AT", "0.8"))
+        if max_wait is None:
+            max_wait = float(os.getenv("LLM_BUDGET_MAX_WAIT", "3600"))
+        if min_quality is None:
+            min_quality = int(os.getenv("LLM_BUDGET_MIN_QUALITY", "3"))
+        if path is None:
+            path = os.getenv(
+                "LLM_BUDGET_PATH",
+                os.path.join(tempfile.gettempdir(), "b4_llm_spend.sqlite3")
+            )
+        if refresh is None:
+            refresh = float(os.getenv("LLM_BUDGET_REFRESH", "1"))
+
+        store = SpendStore(path) if path else None
+        self.budgets = {
+            scope: Budget(scope, limits, store, refresh)
+            for scope, limits in budgets.items()
+        }
+        self.degrade_at = degrade_at
+        self.max_wait = max_wait
+        self.min_quality = min_quality
+
+        self.downgraded = 0
+        self.skipped = 0
+        self.queued = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+
+    def _budgets_for(self, agent: Optional[str] = None, workflow: Optional[str] = None) -> List[Budget]:
+        labels = current_labels()
+        agent = agent or labels.get("agent")
+        workflow = workflow or labels.get("workflow")
+
+        scopes = ["global"]
+        if workflow:
+            scopes.append(f"workflow:{workflow}")
+        if agent:
+            scopes.append(f"agent:{agent}")
+        return [self.budgets[scope] for scope in scopes if scope in self.budgets]
+
+    def record(self, record: CallRecord):
+        """Add a call's cost to the budgets matching its labels (cost tracker listener)."""
+        if not record.cost_usd or not self.budgets:
+            return
+        now = time.time()
+        for budget in self._budgets_for(record.agent, record.workflow):
+            budget.add(record.cost_usd, now)
+
+    def level(self, agent: Optional[str] = None, workflow: Optional[str] = None) -> str:
+        """
+        Get the budget level for calls made now.
+
+        Args:
+            agent: Agent to check (defaults to the current label)
+            workflow: Workflow to check (defaults to the current label)
+
+        Returns:
+            OK, DEGRADED or EXHAUSTED
+        """
+        now = time.time()
+        level = OK
+        for budget in self._budgets_for(agent, workflow):
+            budget_level = budget.level(now, self.degrade_at)
+            if _SEVERITY[budget_level] > _SEVERITY[level]:
+                level = budget_level
+        return level
+
+    def should_skip_optional(self, agent: Optional[str] = None, workflow: Optional[str] = None) -> bool:
+        """Whether optional work for this agent/workflow should be skipped."""
+        if self.level(agent, workflow) == OK:
+            return False
+        self.skipped += 1
+        return True
+
+    async def admit(self):
+        """
+        Wait until the budgets of the current call have room.
+
+        Raises:
+            BudgetExceededError: If that would take longer than max_wait
+        """
+        budgets = self._budgets_for()
+        if not budgets:
+            return
+
+        started = time.time()
+        queued = False
+        while True:
+            now = time.time()
+            wait = max(budget.wait_time(now) for budget in budgets)
+            if wait <= 0:
+                break
+
+            if now - started + wait > self.max_wait:
+                self.rejected += 1
+                scopes = ", ".join(budget.scope for budget in budgets)
+                raise BudgetExceededError(f"LLM budget exhausted for {scopes}; next room in {wait:.0f}s")
+
+            if not queued:
+                queued = True
+                self.queued += 1
+                print(f"⏳ LLM budget exhausted, queueing call for {wait:.0f}s")
+            await asyncio.sleep(wait)
+
+        if queued:
+            self.wait_seconds += time.time() - started
+
+    def stats(self) -> Dict[str, Any]:
+        """Get spend and level per budget, and how often calls were degraded or queued."""
+        now = time.time()
+        return {
+            "budgets": {
+                scope: budget.stats(now, self.degrade_at)
+                for scope, budget in self.budgets.items()
+            },
+            "downgraded": self.downgraded,
+            "skipped": self.skipped,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "wait_seconds": round(self.wait_seconds, 3)
+        }
+
+
+# Global governor instance
+_budget_governor = None
+
+
+def get_budget_governor() -> BudgetGovernor:
+    """Get or create the global budget governor, fed by the global cost tracker."""
+    global _budget_governor
+    if _budget_governor is None:
+        _budget_governor = BudgetGovernor()
+        get_cost_tracker().listeners.append(_budget_governor.record)
+    return _budget_governor
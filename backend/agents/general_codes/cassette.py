@@ -0,0 +1,429 @@
+"""
+Record-and-replay cassettes for provider calls.
+
+In record mode every provider instance from the provider registry is
+wrapped so each call's request, response, reported token usage and timing
+are appended to a cassette file. In replay mode the same calls are served
+from the cassette without touching the network, after the recorded latency
+(optionally scaled), so two pipeline versions can be compared on identical
+responses. Streams replay chunk by chunk with their recorded spacing. The
+wrapped provider is only created for calls made live, so replaying needs no
+API keys.
+
+Calls are keyed by a hash of provider, model, call kind, prompts, response
+schema and generation parameters. A key that is requested several times
+replays its recordings in order (the last one repeats), so retries and
+sampling at temperature > 0 play back as they happened. Provider failures
+are recorded too and replay as errors of the same category (status code
+and Retry-After included).
+
+The cassette is JSON lines, one call per line; a path ending in ``.gz`` is
+gzip-compressed.
+
+Settings (environment):
+    LLM_CASSETTE           cassette file (unset disables recording and replay)
+    LLM_CASSETTE_MODE      record (start a new cassette), replay (fail on
+                           unknown calls) or auto (replay known calls, record
+                           new ones) (replay)
+    LLM_CASSETTE_LATENCY   factor applied to recorded latencies on replay;
+                           0 replays instantly (1.0)
+"""
+
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Type, Union
+from pydantic import BaseModel
+import asyncio
+import gzip
+import inspect
+import json
+import os
+import threading
+import time
+
+from modules.agents.base_ai_agent import BaseAIAgent
+from modules.agents.usage import report_usage, track_usage
+from .retry_policy import CONNECTION, PARSE, TIMEOUT, classify_error, retry_after, status_code
+from .single_flight import request_key
+
+
+MODES = ("record", "replay", "auto")
+
+
+class CassetteMissError(LookupError):
+    """A call in replay mode that the cassette has no recording for."""
+
+
+class ReplayedProviderError(Exception):
+    """A recorded provider failure, raised again on replay."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class ReplayedTimeoutError(ReplayedProviderError, TimeoutError):
+    pass
+
+
+class ReplayedConnectionError(ReplayedProviderError, ConnectionError):
+    pass
+
+
+class ReplayedParseError(ReplayedProviderError, ValueError):
+    pass
+
+
+# Failure category -> replayed error class, so retries classify it the same way
+_REPLAYED_ERRORS: Dict[str, Type[ReplayedProviderError]] = {
+    TIMEOUT: ReplayedTimeoutError,
+    CONNECTION: ReplayedConnectionError,
+    PARSE: ReplayedParseError,
+}
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class Cassette:
+    """Recorded provider calls, keyed by request hash."""
+
+    def __init__(self, path: str, mode: str = "replay", latency_scale: float = 1.0):
+        """
+        Open a cassette.
+
+        Args:
+            path: Cassette file
+            mode: record, replay or auto (see module docstring)
+            latency_scale: Factor applied to recorded latencies on replay
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+        if mode == "record":
+            # A fresh recording replaces the previous cassette
+            with _open(path, "w"):
+                pass
+        elif os.path.exists(path):
+            self._load()
+
+    @classmethod
+    def from_env(cls) -> Optional["Cassette"]:
+        """Open the cassette configured by LLM_CASSETTE (None when unset)."""
+        path = os.getenv("LLM_CASSETTE")
+        if not path:
+            return None
+        return cls(
+            path,
+            mode=os.getenv("LLM_CASSETTE_MODE", "replay").lower(),
+            latency_scale=float(os.getenv("LLM_CASSETTE_LATENCY", "1.0"))
+        )
+
+    def _load(self):
+        with _open(self.path, "r") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+        print(f"📼 Loaded {len(self)} calls from cassette {self.path}")
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def next(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the next recording of a call.
+
+        Returns:
+            The recording, or None if the call has to be made live (and
+            recorded) in this mode
+
+        Raises:
+            CassetteMissError: In replay mode, if the call was never recorded
+        """
+        with self._lock:
+            entries = self._entries.get(key)
+            position = self._cursors.get(key, 0)
+            if self.mode == "record" or (self.mode == "auto" and (not entries or position >= len(entries))):
+                self.misses += 1
+                return None
+            if not entries:
+                self.misses += 1
+                raise CassetteMissError(f"No cassette recording for call {key[:12]} in {self.path}")
+
+            self._cursors[key] = position + 1
+            self.hits += 1
+            return entries[min(position, len(entries) - 1)]
+
+    def record(self, entry: Dict[str, Any]):
+        """Append a call's recording to the cassette."""
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n"
+        with self._lock:
+            entries = self._entries.setdefault(entry["key"], [])
+            entries.append(entry)
+            # Replaying in auto mode continues after what was just recorded
+            self._cursors[entry["key"]] = len(entries)
+            with _open(self.path, "a") as f:
+                f.write(line)
+            self.recorded += 1
+
+    async def delay(self, seconds: float):
+        """Wait out a recorded latency, scaled."""
+        if seconds and self.latency_scale:
+            await asyncio.sleep(seconds * self.latency_scale)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the mode, size and hit/miss counts of the cassette."""
+        return {
+            "path": self.path,
+            "mode": self.mode,
+            "latency_scale": self.latency_scale,
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded
+        }
+
+
+class CassetteAgent(BaseAIAgent):
+    """
+    Provider wrapper that records calls to or replays them from a cassette.
+
+    Looks like the wrapped provider (provider name, model, defaults), so
+    breakers, quotas and cost tracking treat replayed calls like live ones.
+    """
+
+    def __init__(
+        self,
+        inner: Union[BaseAIAgent, Type[BaseAIAgent]],
+        cassette: Cassette,
+        model_name: Optional[str] = None
+    ):
+        """
+        Wrap a provider.
+
+        Args:
+            inner: Provider instance, or provider class to instantiate only
+                when a call has to be made live, so replays need no API keys
+            cassette: Cassette to record to or replay from
+            model_name: Model for a provider class (defaults to the class default)
+        """
+        if isinstance(inner, BaseAIAgent):
+            super().__init__(inner.model_name, inner.api_key, inner.temperature, inner.max_tokens)
+            self.provider = inner.provider
+            self.supports_native_schema = inner.supports_native_schema
+            self._inner: Optional[BaseAIAgent] = inner
+            self._provider_class: Type[BaseAIAgent] = type(inner)
+        else:
+            # Take the defaults the provider would have, since they end up in call keys
+            defaults = {
+                name: parameter.default
+                for name, parameter in inspect.signature(inner.__init__).parameters.items()
+                if parameter.default is not inspect.Parameter.empty
+            }
+            super().__init__(
+                model_name or defaults["model_name"],
+                None,
+                defaults.get("temperature", 0.7),
+                defaults.get("max_tokens", 1024)
+            )
+            self.provider = inner.__name__.replace("Agent", "").lower()
+            self._inner = None
+            self._provider_class = inner
+        self.cassette = cassette
+
+    @property
+    def inner(self) -> BaseAIAgent:
+        """The wrapped provider, created on the first call made live."""
+        if self._inner is None:
+            self._inner = self._provider_class(model_name=self.model_name)
+            self._inner.supports_native_schema = self.supports_native_schema
+        return self._inner
+
+    def _key(self, kind: str, prompt: str, system_prompt: Optional[str], schema: Any, kwargs: Dict[str, Any]) -> str:
+        return request_key("cassette", self.provider, self.model_name, kind, system_prompt, prompt, schema, kwargs)
+
+    def _entry(self, key: str, kind: str, started: float, usage) -> Dict[str, Any]:
+        return {
+            "key": key,
+            "call": kind,
+            "model": f"{self.provider}:{self.model_name}",
+            "latency": round(time.monotonic() - started, 4),
+            "usage": [usage.input_tokens, usage.output_tokens, usage.cached_tokens] if usage.reported else None
+        }
+
+    @staticmethod
+    def _error(error: Exception) -> Dict[str, Any]:
+        delay = retry_after(error)
+        return {
+            "type": type(error).__name__,
+            "message": str(error),
+            "category": classify_error(error),
+            "status": status_code(error),
+            "retry_after": delay
+        }
+
+    @staticmethod
+    def _replay_error(recorded: Dict[str, Any]) -> ReplayedProviderError:
+        error_class = _REPLAYED_ERRORS.get(recorded["category"], ReplayedProviderError)
+        headers = {"retry-after": str(recorded["retry_after"])} if recorded.get("retry_after") is not None else None
+        return error_class(f"{recorded['type']}: {recorded['message']}", recorded.get("status"), headers)
+
+    def _finish(self, entry: Dict[str, Any]) -> Any:
+        """Report a recording's usage and return its result (or raise its error)."""
+        if entry.get("usage"):
+            report_usage(*entry["usage"])
+        if "error" in entry:
+            raise self._replay_error(entry["error"])
+        return entry.get("result")
+
+    async def _call(self, kind: str, key: str, call: Callable[[BaseAIAgent], Awaitable[Any]]) -> Any:
+        """Replay a call's recording, or make it live on the wrapped provider and record it."""
+        entry = self.cassette.next(key)
+        if entry is not None:
+            await self.cassette.delay(entry["latency"])
+            return self._finish(entry)
+
+        # Created outside the recording, so a missing API key is not taken for a provider failure
+        inner = self.inner
+        started = time.monotonic()
+        with track_usage() as usage:
+            try:
+                result = await call(inner)
+            except Exception as e:
+                entry = self._entry(key, kind, started, usage)
+                entry["error"] = self._error(e)
+                self.cassette.record(entry)
+                raise
+        entry = self._entry(key, kind, started, usage)
+        entry["result"] = result.model_dump(mode="json") if isinstance(result, BaseModel) else result
+        self.cassette.record(entry)
+        return result
+
+    async def _stream(
+        self,
+        kind: str,
+        key: str,
+        open_chunks: Callable[[BaseAIAgent], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        """Replay a stream's recorded chunks, or stream live from the wrapped provider and record them."""
+        entry = self.cassette.next(key)
+        if entry is not None:
+            started = time.monotonic()
+            for offset, chunk in entry.get("chunks", []):
+                wait = offset * self.cassette.latency_scale - (time.monotonic() - started)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                yield chunk
+            self._finish(entry)
+            return
+
+        chunks = open_chunks(self.inner)
+        started = time.monotonic()
+        recorded: List[Tuple[float, str]] = []
+        with track_usage() as usage:
+            try:
+                async for chunk in chunks:
+                    recorded.append((round(time.monotonic() - started, 4), chunk))
+                    yield chunk
+            except Exception as e:
+                entry = self._entry(key, kind, started, usage)
+                entry["error"] = self._error(e)
+                self.cassette.record(entry)
+                raise
+            finally:
+                await chunks.aclose()
+        # Streams abandoned by the caller are not recorded
+        entry = self._entry(key, kind, started, usage)
+        entry["chunks"] = recorded
+        self.cassette.record(entry)
+
+    async def generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """Generate text from the cassette or the wrapped provider."""
+        key = self._key("generate", prompt, system_prompt, None, kwargs)
+        return await self._call(
+            "generate", key, lambda inner: inner.generate(prompt, system_prompt=system_prompt, **kwargs)
+        )
+
+    async def generate_structured(
+        self,
+        prompt: str,
+        response_model: Type[BaseModel],
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> BaseModel:
+        """Generate structured output from the cassette or the wrapped provider."""
+        key = self._key("structured", prompt, system_prompt, self._get_schema(response_model), kwargs)
+        result = await self._call(
+            "structured",
+            key,
+            lambda inner: inner.generate_structured(prompt, response_model, system_prompt=system_prompt, **kwargs)
+        )
+        return result if isinstance(result, BaseModel) else response_model.model_validate(result)
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream text from the cassette or the wrapped provider."""
+        key = self._key("stream", prompt, system_prompt, None, kwargs)
+        async for chunk in self._stream(
+            "stream", key, lambda inner: inner.generate_stream(prompt, system_prompt=system_prompt, **kwargs)
+        ):
+            yield chunk
+
+    async def generate_structured_stream(
+        self,
+        prompt: str,
+        response_model: Type[BaseModel],
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream structured JSON text from the cassette or the wrapped provider."""
+        key = self._key("structured_stream", prompt, system_prompt, self._get_schema(response_model), kwargs)
+        async for chunk in self._stream(
+            "structured_stream",
+            key,
+            lambda inner: inner.generate_structured_stream(prompt, response_model, system_prompt=system_prompt, **kwargs)
+        ):
+            yield chunk
+
+    def get_info(self) -> Dict[str, Any]:
+        """Get the wrapped provider's info with the cassette mode."""
+        info = self._inner.get_info() if self._inner is not None else super().get_info()
+        info["cassette"] = self.cassette.mode
+        return info
+
+
+# Global cassette (False until LLM_CASSETTE has been read)
+_cassette = False
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Get the cassette configured by LLM_CASSETTE, or None when disabled."""
+    global _cassette
+    if _cassette is False:
+        _cassette = Cassette.from_env()
+        if _cassette is not None:
+            print(f"📼 LLM cassette {_cassette.mode}: {_cassette.path}")
+    return _cassette
@@ -0,0 +1,320 @@
+"""
+Map-reduce execution of agents over long inputs.
+
+An input that does not fit the model's context window (``context_window``
+in MODEL_REGISTRY, less the system prompt and output tokens), or that is
+longer than the agent's ``chunk_tokens``, is split into chunks on sentence
+(or word) boundaries, with ``chunk_overlap`` tokens of overlap. The agent
+runs on all chunks concurrently, so latency follows the chunk size rather
+than the document length. The structured results are then merged field by
+field.
+
+Each field is merged with a reducer. The defaults follow the field's type
+in the output schema: lists are unioned, numbers take the maximum,
+booleans are OR-ed and other values keep the first non-empty one. An agent
+definition can declare its own reducers:
+
+    chunk_tokens: 2000           split inputs longer than this (optional)
+    chunk_overlap: 150           overlap between chunks (default
+                                 LLM_CHUNK_OVERLAP or 200)
+    reducers: importance_score=max, entity_hints=dedupe:text, reasoning=join
+
+or ``REDUCERS = {"entity_hints": "dedupe:text"}`` in config.py.
+
+Reducers:
+    union          concatenated lists without duplicates
+    concat         concatenated lists
+    dedupe:<key>   lists of objects without duplicate ``key`` values
+                   (case-insensitive; the first object wins)
+    max, min, sum, mean
+    any, all       booleans
+    first, last    first/last non-empty value
+    join           distinct non-empty strings, one per line
+    merge          dicts merged, earlier chunks winning
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+import json
+import os
+import re
+
+from modules.agents.token_estimator import estimate_tokens
+
+
+# Share of the context window used for input, leaving room for estimation error
+CONTEXT_SAFETY = 0.8
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def _present(values: List[Any]) -> List[Any]:
+    return [value for value in values if value not in (None, "", [], {})]
+
+
+def _union(values: List[Any]) -> List[Any]:
+    merged, seen = [], set()
+    for value in values:
+        for item in value or []:
+            marker = json.dumps(item, sort_keys=True, default=str)
+            if marker not in seen:
+                seen.add(marker)
+                merged.append(item)
+    return merged
+
+
+def _dedupe(key: str) -> Callable[[List[Any]], List[Any]]:
+    def reduce(values: List[Any]) -> List[Any]:
+        merged, seen = [], set()
+        for value in values:
+            for item in value or []:
+                identity = item.get(key) if isinstance(item, dict) else item
+                marker = identity.strip().lower() if isinstance(identity, str) else json.dumps(identity, default=str)
+                if marker not in seen:
+                    seen.add(marker)
+                    merged.append(item)
+        return merged
+    return reduce
+
+
+def _mean(values: List[Any]) -> Any:
+    values = _present(values)
+    if not values:
+        return None
+    mean = sum(values) / len(values)
+    return round(mean) if all(isinstance(value, int) for value in values) else mean
+
+
+def _merge(values: List[Any]) -> Dict[str, Any]:
+    merged: Dict[str, Any] = {}
+    for value in reversed(_present(values)):
+        merged.update(value)
+    return merged
+
+
+REDUCERS: Dict[str, Callable[[List[Any]], Any]] = {
+    "union": _union,
+    "concat": lambda values: [item for value in values for item in value or []],
+    "max": lambda values: max(_present(values), default=None),
+    "min": lambda values: min(_present(values), default=None),
+    "sum": lambda values: sum(_present(values)),
+    "mean": _mean,
+    "any": lambda values: any(_present(values)),
+    "all": lambda values: all(value for value in values if value is not None),
+    "first": lambda values: next(iter(_present(values)), values[0] if values else None),
+    "last": lambda values: next(iter(reversed(_present(values))), values[-1] if values else None),
+    "join": lambda values: "\n".join(dict.fromkeys(str(value) for value in _present(values))),
+    "merge": _merge,
+}
+
+# Default reducer per JSON schema type
+DEFAULT_REDUCERS = {
+    "array": "union",
+    "number": "max",
+    "integer": "max",
+    "boolean": "any",
+    "object": "merge",
+}
+
+
+def get_reducer(name: str) -> Callable[[List[Any]], Any]:
+    """
+    Resolve a reducer name (see module docstring).
+
+    Raises:
+        ValueError: If the reducer is unknown
+    """
+    name = name.strip()
+    if name.startswith("dedupe:"):
+        return _dedupe(name.split(":", 1)[1].strip())
+    if name not in REDUCERS:
+        raise ValueError(f"Unknown reducer: {name}")
+    return REDUCERS[name]
+
+
+def _parse_reducers(value: Any) -> Dict[str, str]:
+    """Parse reducers from a dict or "field=reducer" pairs separated by commas or lines."""
+    if isinstance(value, dict):
+        return {str(key): str(name) for key, name in value.items()}
+
+    reducers = {}
+    for pair in re.split(r"[,\n]", value or ""):
+        pair = pair.strip().lstrip("-").strip()
+        if "=" in pair:
+            key, name = pair.split("=", 1)
+            reducers[key.strip()] = name.strip()
+    return reducers
+
+
+def split_text(text: str, max_tokens: int, overlap_tokens: int = 0) -> List[str]:
+    """
+    Split text into chunks of at most ~max_tokens tokens.
+
+    Chunks break between sentences (between words for sentences over the
+    budget) and keep paragraph breaks. Each chunk starts with up to
+    overlap_tokens of the end of the previous one.
+
+    Args:
+        text: Text to split
+        max_tokens: Token budget per chunk
+        overlap_tokens: Tokens repeated from the previous chunk
+
+    Returns:
+        Chunks in order (the whole text if it fits)
+    """
+    max_tokens = max(1, max_tokens)
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+
+    # Sentences (or runs of words) that fit the budget, each with its separator
+    pieces: List[str] = []
+    for paragraph in _PARAGRAPH_RE.split(text.strip()):
+        for sentence in _SENTENCE_RE.split(paragraph):
+            tokens = estimate_tokens(sentence)
+            if tokens <= max_tokens:
+                pieces.append(sentence + " ")
+                continue
+            words = sentence.split()
+            step = max(1, len(words) * max_tokens // tokens)
+            pieces.extend(" ".join(words[start:start + step]) + " " for start in range(0, len(words), step))
+        pieces[-1] = pieces[-1].rstrip() + "\n\n"
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for piece in pieces:
+        tokens = estimate_tokens(piece)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("".join(current).strip())
+            # Carry the tail of the chunk over as overlap
+            overlap: List[str] = []
+            overlap_size = 0
+            for previous in reversed(current):
+                size = estimate_tokens(previous)
+                if overlap_size + size > overlap_tokens or overlap_size + size + tokens > max_tokens:
+                    break
+                overlap.insert(0, previous)
+                overlap_size += size
+            current, current_tokens = overlap, overlap_size
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append("".join(current).strip())
+    return chunks or [text]
+
+
+def _model_info(model: Optional[str], provider: Any = None) -> Optional[Dict[str, Any]]:
+    """Get the MODEL_REGISTRY entry of the model a call will use (None if unknown or routed)."""
+    from .ai_model_selector import MODEL_ALIASES, MODEL_REGISTRY
+
+    if model and model != "auto":
+        return MODEL_REGISTRY.get(MODEL_ALIASES.get(model, model))
+    if provider is not None and not model:
+        for info in MODEL_REGISTRY.values():
+            if info["provider"] == provider.provider and info["name"] == provider.model_name:
+                return info
+    return None
+
+
+def context_window(model: Optional[str], provider: Any = None) -> int:
+    """
+    Get the context window of the model a call will use.
+
+    Args:
+        model: Model name or alias (None for the provider's model)
+        provider: Default provider instance
+
+    Returns:
+        Context window in tokens (the smallest routable window when the
+        model is unknown or chosen by the router; resolve the route first
+        to size for the routed model)
+    """
+    from .ai_model_selector import MODEL_REGISTRY
+    from .model_router import is_routable
+
+    info = _model_info(model, provider)
+    if info:
+        return info["context_window"]
+    return min(info["context_window"] for info in MODEL_REGISTRY.values() if is_routable(info))
+
+
+def output_limit(model: Optional[str], provider: Any = None) -> int:
+    """
+    Get the most output tokens the model a call will use generates per call.
+
+    Args:
+        model: Model name or alias (None for the provider's model)
+        provider: Default provider instance
+
+    Returns:
+        The model's max_output_tokens, or its context window when not set
+    """
+    info = _model_info(model, provider)
+    if info and info.get("max_output_tokens"):
+        return info["max_output_tokens"]
+    return context_window(model, provider)
+
+
+@dataclass(frozen=True)
+class ChunkPolicy:
+    """How an agent splits long inputs and merges the chunk results."""
+
+    chunk_tokens: Optional[int] = None
+    overlap: int = 200
+    reducers: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_definition(cls, info: Dict[str, Any], config: Dict[str, Any]) -> "ChunkPolicy":
+        """Build the policy declared in an agent's info.txt or config.py."""
+        def setting(key: str) -> Any:
+            value = info.get(key)
+            return value if value not in (None, "") else config.get(key.upper())
+
+        chunk_tokens = setting("chunk_tokens")
+        overlap = setting("chunk_overlap")
+        reducers = _parse_reducers(setting("reducers"))
+        for name in reducers.values():
+            get_reducer(name)
+        return cls(
+            chunk_tokens=int(chunk_tokens) if chunk_tokens else None,
+            overlap=int(overlap if overlap is not None else os.getenv("LLM_CHUNK_OVERLAP", "200")),
+            reducers=reducers
+        )
+
+    def budget(self, window: int, prompt_tokens: int, max_tokens: int, copies: int = 1) -> int:
+        """
+        Get the input token budget per chunk.
+
+        Args:
+            window: Model context window
+            prompt_tokens: Tokens of the system prompt
+            max_tokens: Output tokens reserved
+            copies: Times each chunk is sent in a request (e.g. also
+                formatted into the system prompt)
+        """
+        available = int((window - prompt_tokens - max_tokens) * CONTEXT_SAFETY / copies)
+        if self.chunk_tokens:
+            available = min(available, self.chunk_tokens)
+        return max(available, 1)
+
+    def reduce(self, results: List[Dict[str, Any]], schema: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Merge chunk results field by field.
+
+        Args:
+            results: Structured results of the chunks, in order
+            schema: The agent's output schema (for default reducers)
+        """
+        properties = schema.get("properties", {})
+        fields = list(properties)
+        for result in results:
+            fields.extend(key for key in result if key not in fields)
+
+        merged = {}
+        for name in fields:
+            values = [result.get(name) for result in results if name in result]
+            if not values:
+                continue
+            reducer = self.reducers.get(name) or DEFAULT_REDUCERS.get(properties.get(name, {}).get("type"), "first")
+            merged[name] = get_reducer(reducer)(values)
+        return merged
@@ -0,0 +1,309 @@
+"""
+Circuit breakers for LLM provider endpoints.
+
+Each provider endpoint (provider + provider-side model) has a breaker:
+
+    closed     calls pass; outcomes of the last calls are tracked, and the
+               breaker opens when the failure rate (slow calls count as
+               failures) crosses the threshold
+    open       calls are rejected immediately with CircuitOpenError; after
+               a cooldown the endpoint is probed in the background
+    half_open  used when no background probe is available: one live call
+               is let through as the probe
+
+A successful probe closes the breaker; a failed one reopens it with a
+doubled cooldown. Endpoints that cannot even be constructed (e.g. a
+missing API key) are tripped open immediately.
+
+Settings (environment):
+    LLM_BREAKER_FAILURE_RATE   failure rate that opens the breaker (0.5)
+    LLM_BREAKER_MIN_CALLS      calls needed before the rate is evaluated (5)
+    LLM_BREAKER_WINDOW         number of recent calls tracked (20)
+    LLM_BREAKER_SLOW_SECONDS   calls slower than this count as failures (60)
+    LLM_BREAKER_OPEN_SECONDS   initial cooldown before probing (30)
+    LLM_BREAKER_PROBE          probe open endpoints in the background (1)
+"""
+
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Optional
+import asyncio
+import os
+import time
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Longest cooldown after repeated failed probes
+MAX_OPEN_SECONDS = 300.0
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the endpoint's breaker is open."""
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one provider endpoint."""
+
+    def __init__(
+        self,
+        name: str,
+        probe: Optional[Callable[[], Awaitable[None]]] = None,
+        failure_rate: Optional[float] = None,
+        min_calls: Optional[int] = None,
+        window: Optional[int] = None,
+        slow_seconds: Optional[float] = None,
+        open_seconds: Optional[float] = None
+    ):
+        """
+        Initialize breaker.
+
+        Args:
+            name: Endpoint name, e.g. "gemini:gemini-2.0-flash"
+            probe: Health check run in the background when the cooldown ends
+                (raises on failure); None lets one live call probe instead
+            failure_rate: Opening threshold (LLM_BREAKER_FAILURE_RATE)
+            min_calls: Minimum tracked calls to evaluate (LLM_BREAKER_MIN_CALLS)
+            window: Recent calls tracked (LLM_BREAKER_WINDOW)
+            slow_seconds: Slow-call threshold (LLM_BREAKER_SLOW_SECONDS)
+            open_seconds: Initial cooldown (LLM_BREAKER_OPEN_SECONDS)
+        """
+        self.name = name
+        self.probe = probe
+        self.failure_rate = failure_rate or float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+        self.min_calls = min_calls or int(os.getenv("LLM_BREAKER_MIN_CALLS", "5"))
+        self.slow_seconds = slow_seconds or float(os.getenv("LLM_BREAKER_SLOW_SECONDS", "60"))
+        self.base_open_seconds = open_seconds or float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))
+
+        self.state = CLOSED
+        self.open_seconds = self.base_open_seconds
+        self.opened_at = 0.0
+        self.last_error: Optional[str] = None
+        self.rejected = 0
+        self._outcomes: Deque[bool] = deque(maxlen=window or int(os.getenv("LLM_BREAKER_WINDOW", "20")))
+        self._probe_task: Optional[asyncio.Task] = None
+        self._half_open_busy = False
+
+    def allow(self) -> bool:
+        """Check whether a call may proceed (starts a probe when the cooldown has ended)."""
+        if self.state == CLOSED:
+            return True
+
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+            if self.probe is not None:
+                self._start_probe()
+            else:
+                self.state = HALF_OPEN
+
+        if self.state == HALF_OPEN and not self._half_open_busy:
+            self._half_open_busy = True
+            return True
+
+        self.rejected += 1
+        return False
+
+    def check(self):
+        """
+        Fail fast if the breaker would reject calls, without taking a half-open slot.
+
+        Lets callers skip queueing for an endpoint that is known to be down.
+
+        Raises:
+            CircuitOpenError: If the endpoint is open
+        """
+        rejecting = False
+        if self.state == HALF_OPEN:
+            rejecting = self._half_open_busy
+        elif self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                rejecting = True
+            elif self.probe is not None:
+                self._start_probe()
+                rejecting = self.state == OPEN
+
+        if rejecting:
+            self.rejected += 1
+            raise CircuitOpenError(f"Circuit open for {self.name}: {self.last_error}")
+
+    def record_success(self, latency: float = 0.0):
+        """Record a completed call."""
+        if latency > self.slow_seconds:
+            self.record_failure(f"slow call ({latency:.1f}s)")
+            return
+
+        if self.state == HALF_OPEN:
+            self._close()
+        elif self.state == CLOSED:
+            self._outcomes.append(True)
+
+    def record_failure(self, error: Optional[str] = None):
+        """Record a failed call."""
+        self.last_error = error
+        if self.state == HALF_OPEN:
+            self._open(backoff=True)
+            return
+        if self.state == OPEN:
+            # A call started before the breaker opened
+            return
+
+        self._outcomes.append(False)
+        if len(self._outcomes) >= self.min_calls:
+            failures = self._outcomes.count(False)
+            if failures / len(self._outcomes) >= self.failure_rate:
+                self._open()
+
+    def trip(self, error: Optional[str] = None):
+        """Open immediately (e.g. the endpoint is misconfigured)."""
+        self.last_error = error
+        self._open(backoff=self.state != CLOSED)
+
+    def _open(self, backoff: bool = False):
+        if backoff:
+            self.open_seconds = min(MAX_OPEN_SECONDS, self.open_seconds * 2)
+        if self.state == CLOSED:
+            print(f"⚡ Circuit opened for {self.name}: {self.last_error}")
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._half_open_busy = False
+        self._outcomes.clear()
+
+    def _close(self):
+        print(f"✅ Circuit closed for {self.name}")
+        self.state = CLOSED
+        self.open_seconds = self.base_open_seconds
+        self._half_open_busy = False
+        self._outcomes.clear()
+
+    def _start_probe(self):
+        if self._probe_task is not None and not self._probe_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop to probe on; fall back to a live half-open call
+            self.state = HALF_OPEN
+            return
+        self._probe_task = loop.create_task(self._run_probe())
+
+    async def _run_probe(self):
+        started = time.monotonic()
+        try:
+            await self.probe()
+        except Exception as e:
+            self.last_error = f"probe failed: {e}"
+            self._open(backoff=True)
+            return
+
+        if time.monotonic() - started > self.slow_seconds:
+            self.last_error = "probe too slow"
+            self._open(backoff=True)
+        else:
+            self._close()
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """
+        Run a call through the breaker.
+
+        Raises:
+            CircuitOpenError: If the breaker rejects the call
+
+        ValueError (bad output) is not counted against the endpoint, and
+        cancelled calls or abandoned streams are not counted at all.
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit open for {self.name}: {self.last_error}")
+
+        started = time.monotonic()
+        try:
+            yield
+        except (asyncio.CancelledError, GeneratorExit):
+            self._half_open_busy = False
+            raise
+        except ValueError:
+            self.record_success(time.monotonic() - started)
+            raise
+        except Exception as e:
+            self.record_failure(str(e))
+            raise
+        else:
+            self.record_success(time.monotonic() - started)
+
+    def stats(self) -> Dict[str, object]:
+        """Get state, recent failure rate and rejection count."""
+        outcomes = len(self._outcomes)
+        return {
+            "state": self.state,
+            "failure_rate": round(self._outcomes.count(False) / outcomes, 3) if outcomes else 0.0,
+            "calls_tracked": outcomes,
+            "rejected": self.rejected,
+            "open_seconds": self.open_seconds,
+            "last_error": self.last_error
+        }
+
+
+async def _probe_endpoint(provider_type: str, model_name: str):
+    """Default probe: a provider availability check or a one-token generation."""
+    from .provider_registry import get_provider_registry
+
+    provider = get_provider_registry().get(provider_type, model_name)
+    is_available = getattr(provider, "is_available", None)
+    if is_available is not None:
+        if not await is_available():
+            raise ConnectionError(f"{provider_type} is not available")
+        return
+    await provider.generate("ping", max_tokens=1, temperature=0)
+
+
+class CircuitBreakers:
+    """Circuit breakers keyed by provider endpoint."""
+
+    def __init__(self, probe: Optional[bool] = None):
+        """
+        Initialize breakers.
+
+        Args:
+            probe: Probe open endpoints in the background (LLM_BREAKER_PROBE)
+        """
+        if probe is None:
+            probe = os.getenv("LLM_BREAKER_PROBE", "1").lower() in ("1", "true", "yes")
+        self.probe = probe
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, provider_type: str, model_name: str) -> CircuitBreaker:
+        """
+        Get or create the breaker for an endpoint.
+
+        Args:
+            provider_type: Provider name (e.g. "gemini")
+            model_name: Provider-side model name (provider.model_name)
+        """
+        key = f"{provider_type}:{model_name}"
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            probe = (lambda: _probe_endpoint(provider_type, model_name)) if self.probe else None
+            breaker = CircuitBreaker(key, probe=probe)
+            self._breakers[key] = breaker
+        return breaker
+
+    def find(self, provider_type: str, model_name: str) -> Optional[CircuitBreaker]:
+        """Get the breaker for an endpoint if one has been created."""
+        return self._breakers.get(f"{provider_type}:{model_name}")
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        """Get breaker stats per endpoint."""
+        return {key: breaker.stats() for key, breaker in self._breakers.items()}
+
+
+# Global breakers instance
+_circuit_breakers = None
+
+
+def get_circuit_breakers() -> CircuitBreakers:
+    """Get or create the global circuit breakers."""
+    global _circuit_breakers
+    if _circuit_breakers is None:
+        _circuit_breakers = CircuitBreakers()
+    return _circuit_breakers
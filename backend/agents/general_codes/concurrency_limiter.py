@@ -0,0 +1,221 @@
+"""
+Adaptive concurrency limits for LLM provider endpoints.
+
+Each provider endpoint (provider + model) gets an AIMD limit on in-flight
+calls. While latency stays near its baseline (a low percentile of recent
+successful calls) and calls succeed, the limit grows by about one per round
+of calls; when latency rises above ``tolerance`` x baseline or calls fail,
+it is cut multiplicatively. Calls
+over the limit wait in FIFO order, so queueing happens here rather than
+inside the provider and tail latency stays bounded as conditions change.
+
+Streams hold their slot until the stream ends, so each endpoint has a
+separate limiter for them; a long stream never queues the endpoint's
+regular calls (e.g. the stages a streaming gate starts early).
+
+Settings (environment):
+    LLM_CONCURRENCY_INITIAL    starting limit per endpoint (16)
+    LLM_CONCURRENCY_MIN        lower bound (1)
+    LLM_CONCURRENCY_MAX        upper bound (64)
+    LLM_LATENCY_TOLERANCE      latency/baseline ratio treated as congestion (2.0)
+    LLM_CONCURRENCY_BACKOFF    multiplicative decrease factor (0.7)
+"""
+
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+import asyncio
+import os
+import time
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit for one provider endpoint, driven by latency and errors."""
+
+    # EWMA weight for the short-term latency sample
+    SHORT_ALPHA = 0.3
+    # The baseline is this percentile of the last BASELINE_WINDOW latencies
+    BASELINE_WINDOW = 100
+    BASELINE_PERCENTILE = 0.1
+
+    def __init__(
+        self,
+        initial_limit: Optional[float] = None,
+        min_limit: Optional[float] = None,
+        max_limit: Optional[float] = None,
+        tolerance: Optional[float] = None,
+        backoff: Optional[float] = None
+    ):
+        """
+        Initialize limiter.
+
+        Args:
+            initial_limit: Starting limit (defaults to LLM_CONCURRENCY_INITIAL or 16)
+            min_limit: Lower bound (defaults to LLM_CONCURRENCY_MIN or 1)
+            max_limit: Upper bound (defaults to LLM_CONCURRENCY_MAX or 64)
+            tolerance: Latency/baseline ratio above which the limit backs off
+                (defaults to LLM_LATENCY_TOLERANCE or 2.0)
+            backoff: Multiplicative decrease factor
+                (defaults to LLM_CONCURRENCY_BACKOFF or 0.7)
+        """
+        self.min_limit = min_limit or float(os.getenv("LLM_CONCURRENCY_MIN", "1"))
+        self.max_limit = max_limit or float(os.getenv("LLM_CONCURRENCY_MAX", "64"))
+        self.tolerance = tolerance or float(os.getenv("LLM_LATENCY_TOLERANCE", "2.0"))
+        self.backoff = backoff or float(os.getenv("LLM_CONCURRENCY_BACKOFF", "0.7"))
+        initial = initial_limit or float(os.getenv("LLM_CONCURRENCY_INITIAL", "16"))
+
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.in_flight = 0
+        self.baseline: Optional[float] = None
+        self.latency: Optional[float] = None
+        self.successes = 0
+        self.errors = 0
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._latencies: Deque[float] = deque(maxlen=self.BASELINE_WINDOW)
+
+    async def acquire(self):
+        """Wait for a free slot (FIFO)."""
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was granted just before cancellation; pass it on
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, latency: Optional[float] = None, error: bool = False):
+        """
+        Free a slot and update the limit.
+
+        Args:
+            latency: Call duration in seconds (None for cancelled calls and
+                ValueErrors, whose duration says nothing about load)
+            error: Whether the call failed in a way that signals overload
+        """
+        saturated = self.in_flight >= int(self.limit)
+        self.in_flight -= 1
+
+        if error:
+            self.errors += 1
+            self._decrease()
+        elif latency is not None:
+            self.successes += 1
+            self._observe(latency, saturated)
+
+        self._wake()
+
+    def _observe(self, latency: float, saturated: bool):
+        # A low percentile over a window: one fast outlier does not become the
+        # baseline, and a lasting shift becomes the new normal once it fills
+        # the window
+        self._latencies.append(latency)
+        ordered = sorted(self._latencies)
+        self.baseline = ordered[int(self.BASELINE_PERCENTILE * (len(ordered) - 1))]
+
+        if self.latency is None:
+            self.latency = latency
+            return
+
+        self.latency += self.SHORT_ALPHA * (latency - self.latency)
+
+        if self.latency > self.tolerance * self.baseline:
+            self._decrease()
+            return
+
+        if saturated:
+            # Additive increase: about +1 per limit's worth of successful calls
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def _decrease(self):
+        # At most one decrease per observed latency, so one burst of slow or
+        # failed calls does not collapse the limit
+        now = time.monotonic()
+        if now - self._last_decrease < (self.latency or 0.0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Hold a slot for the duration of a provider call and feed back its outcome.
+
+        ValueError (bad output, missing configuration) is neither an overload
+        signal nor a latency sample, since it can fail fast; any other
+        exception is an overload signal.
+        """
+        await self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        except (asyncio.CancelledError, GeneratorExit):
+            self.release()
+            raise
+        except ValueError:
+            self.release()
+            raise
+        except Exception:
+            self.release(error=True)
+            raise
+        else:
+            self.release(latency=time.monotonic() - started)
+
+    def stats(self) -> Dict[str, float]:
+        """Get the current limit, load and latency estimates."""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "latency_seconds": round(self.latency, 3) if self.latency is not None else None,
+            "baseline_seconds": round(self.baseline, 3) if self.baseline is not None else None,
+            "successes": self.successes,
+            "errors": self.errors
+        }
+
+
+class ConcurrencyLimits:
+    """Adaptive limiters keyed by provider endpoint."""
+
+    def __init__(self):
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+
+    def get(self, provider_type: str, model_name: str, stream: bool = False) -> AdaptiveLimiter:
+        """Get or create the limiter for a provider endpoint (or for its streams)."""
+        key = f"{provider_type}:{model_name}" + (":stream" if stream else "")
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = AdaptiveLimiter()
+            self._limiters[key] = limiter
+        return limiter
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Get limiter stats per endpoint."""
+        return {key: limiter.stats() for key, limiter in self._limiters.items()}
+
+
+# Global limits instance
+_concurrency_limits = None
+
+
+def get_concurrency_limits() -> ConcurrencyLimits:
+    """Get or create the global concurrency limits."""
+    global _concurrency_limits
+    if _concurrency_limits is None:
+        _concurrency_limits = ConcurrencyLimits()
+    return _concurrency_limits
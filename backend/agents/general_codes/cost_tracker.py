@@ -0,0 +1,290 @@
+"""
+Token and cost accounting for LLM calls.
+
+Every governed provider call is recorded with its model, token usage as
+reported by the provider, latency and cost from MODEL_PRICING. Calls are
+attributed to the agent and workflow active when they were made (see
+attribute) and aggregated per agent, model and workflow. An execution
+profile collects the calls made inside a block, e.g. one pipeline run.
+"""
+
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import time
+
+from modules.agents.usage import Usage, track_usage
+
+
+# Labels ({"agent": ..., "workflow": ...}) and open profiles for the current context
+_call_labels: ContextVar[Dict[str, str]] = ContextVar("llm_call_labels", default={})
+_open_profiles: ContextVar[Tuple["ExecutionProfile", ...]] = ContextVar("llm_profiles", default=())
+
+
+def model_cost(model_name: str, input_tokens: int, output_tokens: int) -> float:
+    """
+    Get the cost of a call in USD.
+
+    Args:
+        model_name: Registry or provider model name
+        input_tokens: Prompt tokens
+        output_tokens: Completion tokens
+    """
+    from .ai_model_selector import MODEL_PRICING
+
+    pricing = MODEL_PRICING.get(model_name, {})
+    return (
+        input_tokens * pricing.get("input", 0.0)
+        + output_tokens * pricing.get("output", 0.0)
+    ) / 1_000_000
+
+
+def current_labels() -> Dict[str, str]:
+    """Get the agent/workflow labels calls made now are attributed to."""
+    return _call_labels.get()
+
+
+@contextmanager
+def attribute(agent: Optional[str] = None, workflow: Optional[str] = None) -> Iterator[None]:
+    """
+    Attribute LLM calls made inside the block to an agent and/or workflow.
+
+    Blocks nest; inner labels override outer ones.
+    """
+    labels = dict(_call_labels.get())
+    if agent is not None:
+        labels["agent"] = agent
+    if workflow is not None:
+        labels["workflow"] = workflow
+    token = _call_labels.set(labels)
+    try:
+        yield
+    finally:
+        try:
+            _call_labels.reset(token)
+        except ValueError:
+            # Closed from another context (an abandoned stream finalized by the event loop)
+            pass
+
+
+@dataclass
+class CallRecord:
+    """One provider call."""
+
+    model: str
+    provider: str
+    agent: Optional[str]
+    workflow: Optional[str]
+    input_tokens: int
+    output_tokens: int
+    cached_tokens: int
+    latency_seconds: float
+    cost_usd: float
+    error: bool = False
+    timestamp: float = field(default_factory=time.time)
+
+
+class _Totals:
+    """Running totals for one aggregation key."""
+
+    __slots__ = ("calls", "errors", "input_tokens", "output_tokens", "cached_tokens", "cost_usd", "latency_seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        self.cost_usd = 0.0
+        self.latency_seconds = 0.0
+
+    def add(self, record: CallRecord):
+        self.calls += 1
+        self.errors += int(record.error)
+        self.input_tokens += record.input_tokens
+        self.output_tokens += record.output_tokens
+        self.cached_tokens += record.cached_tokens
+        self.cost_usd += record.cost_usd
+        self.latency_seconds += record.latency_seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "avg_latency_seconds": round(self.latency_seconds / self.calls, 3) if self.calls else None
+        }
+
+
+class ExecutionProfile:
+    """Calls made during one execution, with totals per agent and model."""
+
+    def __init__(self, name: Optional[str] = None):
+        self.name = name
+        self.calls: List[CallRecord] = []
+        self.started = time.monotonic()
+        self.duration_seconds: Optional[float] = None
+
+    def add(self, record: CallRecord):
+        self.calls.append(record)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get totals, per-agent and per-model breakdowns and the call list."""
+        total, by_agent, by_model = _Totals(), {}, {}
+        for record in self.calls:
+            total.add(record)
+            by_agent.setdefault(record.agent or "unattributed", _Totals()).add(record)
+            by_model.setdefault(record.model, _Totals()).add(record)
+
+        duration = self.duration_seconds
+        if duration is None:
+            duration = time.monotonic() - self.started
+        return {
+            "name": self.name,
+            "duration_seconds": round(duration, 3),
+            "total": total.to_dict(),
+            "by_agent": {key: totals.to_dict() for key, totals in by_agent.items()},
+            "by_model": {key: totals.to_dict() for key, totals in by_model.items()},
+            "calls": [asdict(record) for record in self.calls]
+        }
+
+
+class CostTracker:
+    """Aggregates token usage and cost of LLM calls per agent, model and workflow."""
+
+    def __init__(self, recent: int = 200):
+        """
+        Initialize tracker.
+
+        Args:
+            recent: Number of recent call records to keep
+        """
+        self.total = _Totals()
+        self.by_agent: Dict[str, _Totals] = {}
+        self.by_model: Dict[str, _Totals] = {}
+        self.by_workflow: Dict[str, _Totals] = {}
+        self.recent: Deque[CallRecord] = deque(maxlen=recent)
+        # Called with every record (e.g. the budget governor)
+        self.listeners: List[Callable[[CallRecord], None]] = []
+
+    def record(
+        self,
+        model: str,
+        provider: str,
+        usage: Usage,
+        latency_seconds: float,
+        error: bool = False
+    ) -> CallRecord:
+        """
+        Record a finished provider call under the current labels and profiles.
+
+        Args:
+            model: Model name (priced via MODEL_PRICING)
+            provider: Provider type
+            usage: Usage the provider reported for the call
+            latency_seconds: Call duration
+            error: Whether the call failed
+
+        Returns:
+            The call record
+        """
+        labels = _call_labels.get()
+        record = CallRecord(
+            model=model,
+            provider=provider,
+            agent=labels.get("agent"),
+            workflow=labels.get("workflow"),
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cached_tokens=usage.cached_tokens,
+            latency_seconds=round(latency_seconds, 4),
+            cost_usd=model_cost(model, usage.input_tokens, usage.output_tokens),
+            error=error
+        )
+
+        self.total.add(record)
+        self.by_model.setdefault(model, _Totals()).add(record)
+        self.by_agent.setdefault(record.agent or "unattributed", _Totals()).add(record)
+        if record.workflow:
+            self.by_workflow.setdefault(record.workflow, _Totals()).add(record)
+        self.recent.append(record)
+
+        for profile in _open_profiles.get():
+            profile.add(record)
+        for listener in self.listeners:
+            listener(record)
+        return record
+
+    @contextmanager
+    def track(self, model: str, provider: str) -> Iterator[Usage]:
+        """
+        Record the provider call made inside the block.
+
+        Usage:
+            with get_cost_tracker().track("gpt-4o-mini", "openai"):
+                await provider.generate(...)
+        """
+        started = time.monotonic()
+        error = True
+        with track_usage() as usage:
+            try:
+                yield usage
+                error = False
+            except (asyncio.CancelledError, GeneratorExit):
+                # Abandoned, not failed; tokens used so far are still counted
+                error = False
+                raise
+            finally:
+                self.record(model, provider, usage, time.monotonic() - started, error)
+
+    @contextmanager
+    def profile(self, name: Optional[str] = None) -> Iterator[ExecutionProfile]:
+        """
+        Collect the calls made inside the block into an execution profile.
+
+        Profiles nest; a call is added to every open profile.
+        """
+        profile = ExecutionProfile(name)
+        token = _open_profiles.set(_open_profiles.get() + (profile,))
+        try:
+            yield profile
+        finally:
+            profile.duration_seconds = time.monotonic() - profile.started
+            _open_profiles.reset(token)
+
+    def get_total_cost(self) -> float:
+        """Get total cost in USD across all calls."""
+        return self.total.cost_usd
+
+    def get_breakdown(self) -> Dict[str, Any]:
+        """Get totals per agent, model and workflow."""
+        return {
+            "total": self.total.to_dict(),
+            "by_agent": {key: totals.to_dict() for key, totals in self.by_agent.items()},
+            "by_model": {key: totals.to_dict() for key, totals in self.by_model.items()},
+            "by_workflow": {key: totals.to_dict() for key, totals in self.by_workflow.items()}
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the breakdown plus the most recent calls."""
+        stats = self.get_breakdown()
+        stats["recent_calls"] = [asdict(record) for record in list(self.recent)[-20:]]
+        return stats
+
+
+# Global cost tracker
+_cost_tracker = None
+
+
+def get_cost_tracker() -> CostTracker:
+    """Get or create the global cost tracker."""
+    global _cost_tracker
+    if _cost_tracker is None:
+        _cost_tracker = CostTracker()
+    return _cost_tracker
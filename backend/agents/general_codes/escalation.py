@@ -0,0 +1,256 @@
+"""
+Confidence-based model escalation for agents.
+
+An agent definition can declare a cascade of stronger models. Each call is
+served by the agent's usual model first (its default provider, or the model
+or route the caller asked for), and the result is escalated to the next
+tier only when it falls short:
+
+    low_confidence  the confidence field is below the threshold
+    importance      the first answer's importance field is at or above the
+                    importance threshold (escalates straight to the last tier)
+    invalid         the output could not be parsed or validated
+
+Tiers whose registry quality is not above the first tier's are skipped,
+so a result is never replaced by a weaker model's. Nothing is escalated
+while the call's spend budget is past its degrade level. An escalation
+tier that fails leaves the best result so far.
+
+Settings (info.txt, or the upper-case config.py equivalents):
+
+    cascade: gpt-4o-mini, gpt-4o     escalation tiers, cheapest first
+    confidence_field: extraction_confidence
+                                     (default "confidence", else the first
+                                     "*_confidence" field of the result)
+    escalation_threshold: 0.6        (default LLM_ESCALATION_THRESHOLD or 0.6)
+    importance_field: importance_score
+    escalation_importance: 0.8       (default LLM_ESCALATION_IMPORTANCE or 0.8)
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import os
+
+
+# Escalation reasons
+LOW_CONFIDENCE = "low_confidence"
+IMPORTANCE = "importance"
+INVALID = "invalid"
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def _quality(model_name: str) -> Optional[int]:
+    """Get a model's registry quality tier by registry or provider-side name."""
+    from .ai_model_selector import MODEL_REGISTRY
+
+    info = MODEL_REGISTRY.get(model_name)
+    if info is None:
+        info = next((entry for entry in MODEL_REGISTRY.values() if entry["name"] == model_name), None)
+    return info.get("quality") if info else None
+
+
+@dataclass(frozen=True)
+class EscalationPolicy:
+    """When and where an agent's results are escalated."""
+
+    tiers: Tuple[str, ...]
+    threshold: float = 0.6
+    importance_threshold: float = 0.8
+    confidence_field: Optional[str] = None
+    importance_field: str = "importance_score"
+
+    @classmethod
+    def from_definition(cls, info: Dict[str, Any], config: Dict[str, Any]) -> Optional["EscalationPolicy"]:
+        """
+        Build the policy declared in an agent's info.txt or config.py.
+
+        Returns:
+            The policy, or None if the agent declares no escalation tiers
+        """
+        def setting(key: str) -> Any:
+            value = info.get(key)
+            return value if value not in (None, "") else config.get(key.upper())
+
+        tiers = setting("cascade")
+        if not tiers:
+            return None
+        if isinstance(tiers, str):
+            tiers = [tier.strip() for tier in tiers.split(",")]
+
+        threshold = setting("escalation_threshold")
+        importance_threshold = setting("escalation_importance")
+        return cls(
+            tiers=tuple(tier for tier in tiers if tier),
+            threshold=float(threshold if threshold is not None else os.getenv("LLM_ESCALATION_THRESHOLD", "0.6")),
+            importance_threshold=float(
+                importance_threshold if importance_threshold is not None
+                else os.getenv("LLM_ESCALATION_IMPORTANCE", "0.8")
+            ),
+            confidence_field=setting("confidence_field"),
+            importance_field=setting("importance_field") or "importance_score"
+        )
+
+    def tiers_above(self, first_tier: str) -> Tuple[str, ...]:
+        """
+        Get the tiers stronger than the model that served the first answer.
+
+        Tiers are kept unless both models have a registry quality and the
+        tier's is not strictly higher. A routed or unregistered first tier
+        keeps every tier.
+        """
+        first_quality = _quality(first_tier)
+        if first_quality is None:
+            return self.tiers
+        return tuple(
+            tier for tier in self.tiers
+            if _quality(tier) is None or _quality(tier) > first_quality
+        )
+
+    def confidence(self, result: Dict[str, Any]) -> Optional[float]:
+        """Get the result's confidence, if it reports one."""
+        name = self.confidence_field
+        if name is None:
+            if "confidence" in result:
+                name = "confidence"
+            else:
+                name = next((key for key in result if key.endswith("_confidence")), None)
+        return _number(result.get(name)) if name else None
+
+    def reason(self, result: Optional[Dict[str, Any]], first: bool) -> Optional[str]:
+        """
+        Get why a result should be escalated.
+
+        Args:
+            result: The tier's result (None if its output was invalid)
+            first: Whether the result came from the first tier (only first
+                answers are escalated for importance)
+
+        Returns:
+            LOW_CONFIDENCE, IMPORTANCE or INVALID, or None to keep the result
+        """
+        if result is None:
+            return INVALID
+        if first:
+            importance = _number(result.get(self.importance_field))
+            if importance is not None and importance >= self.importance_threshold:
+                return IMPORTANCE
+        confidence = self.confidence(result)
+        if confidence is not None and confidence < self.threshold:
+            return LOW_CONFIDENCE
+        return None
+
+
+@dataclass
+class _AgentCounts:
+    calls: int = 0
+    escalated: int = 0
+    budget_blocked: int = 0
+    reasons: Dict[str, int] = field(default_factory=dict)
+    served_by: Dict[str, int] = field(default_factory=dict)
+
+
+class EscalationManager:
+    """Runs agent cascades and records how often each agent escalates."""
+
+    def __init__(self):
+        self._agents: Dict[str, _AgentCounts] = {}
+
+    async def run(
+        self,
+        agent_id: str,
+        policy: EscalationPolicy,
+        call: Callable[[Optional[str]], Awaitable[Dict[str, Any]]],
+        first_tier: str
+    ) -> Dict[str, Any]:
+        """
+        Serve a call from the first tier whose result is good enough.
+
+        Args:
+            agent_id: Agent making the call
+            policy: The agent's escalation policy
+            call: Runs the agent with a model (None for the agent's usual model)
+            first_tier: Name of the usual model, for stats and to skip
+                tiers that are not stronger
+
+        Returns:
+            The result of the last tier that ran successfully
+
+        Raises:
+            The first tier's error if its output was invalid and no tier
+            produced a result
+        """
+        from .budget_governor import OK, get_budget_governor
+
+        counts = self._agents.setdefault(agent_id, _AgentCounts())
+        counts.calls += 1
+
+        result, error = None, None
+        try:
+            result = await call(None)
+        except ValueError as e:
+            # Unparseable or invalid structured output
+            error = e
+
+        served_by = first_tier
+        reason = policy.reason(result, first=True)
+        tiers = policy.tiers_above(first_tier)
+        tier = 0
+        while reason is not None and tier < len(tiers):
+            if get_budget_governor().level() != OK:
+                counts.budget_blocked += 1
+                break
+
+            tier = len(tiers) - 1 if reason == IMPORTANCE else tier
+            target = tiers[tier]
+            tier += 1
+            counts.reasons[reason] = counts.reasons.get(reason, 0) + 1
+            print(f"⬆️  Escalating {agent_id} from {served_by} to {target} ({reason})")
+
+            try:
+                escalated = await call(target)
+            except Exception as e:
+                print(f"⚠️  Escalation of {agent_id} to {target} failed: {e}")
+                error = error or e
+                continue
+
+            result, served_by = escalated, target
+            reason = policy.reason(result, first=False)
+
+        if result is None:
+            raise error
+
+        counts.served_by[served_by] = counts.served_by.get(served_by, 0) + 1
+        if served_by != first_tier:
+            counts.escalated += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-agent escalation rates, reasons and serving tiers."""
+        return {
+            agent_id: {
+                "calls": counts.calls,
+                "escalated": counts.escalated,
+                "escalation_rate": round(counts.escalated / counts.calls, 3) if counts.calls else 0.0,
+                "budget_blocked": counts.budget_blocked,
+                "reasons": dict(counts.reasons),
+                "served_by": dict(counts.served_by)
+            }
+            for agent_id, counts in self._agents.items()
+        }
+
+
+# Global escalation manager
+_escalation_manager = None
+
+
+def get_escalation_manager() -> EscalationManager:
+    """Get or create the global escalation manager."""
+    global _escalation_manager
+    if _escalation_manager is None:
+        _escalation_manager = EscalationManager()
+    return _escalation_manager
@@ -0,0 +1,164 @@
+"""
+Hedged LLM requests.
+
+When a call has not returned after a high percentile of its model's recent
+latency, a second request is sent to an equivalent model and the first
+successful result wins. Hedges are paid for from a budget that accrues a
+fraction of a hedge per request, capping the extra load.
+
+Settings (environment):
+    LLM_HEDGING            enable hedging for calls that do not opt in/out (0)
+    LLM_HEDGE_PERCENTILE   latency percentile that triggers a hedge (95)
+    LLM_HEDGE_BUDGET       max hedges per request, e.g. 0.05 = 5% (0.05)
+    LLM_HEDGE_MIN_SAMPLES  latencies needed before a model is hedged (20)
+    LLM_HEDGE_MODELS       JSON {model: [equivalent models]}; a model without
+                           equivalents is hedged against itself
+"""
+
+from collections import deque
+from typing import Deque, Dict, List, Optional
+import json
+import math
+import os
+
+
+class LatencyTracker:
+    """Recent successful-call latencies per model."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, model_name: str, seconds: float):
+        """Record the latency of a successful call."""
+        samples = self._samples.get(model_name)
+        if samples is None:
+            samples = self._samples[model_name] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def count(self, model_name: str) -> int:
+        return len(self._samples.get(model_name, ()))
+
+    def percentile(self, model_name: str, percentile: float) -> Optional[float]:
+        """Get a latency percentile (nearest rank) or None without samples."""
+        samples = self._samples.get(model_name)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        rank = max(1, math.ceil(percentile / 100.0 * len(ordered)))
+        return ordered[rank - 1]
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Get sample count and p50/p95/p99 per model."""
+        return {
+            model_name: {
+                "samples": len(samples),
+                "p50": round(self.percentile(model_name, 50), 3),
+                "p95": round(self.percentile(model_name, 95), 3),
+                "p99": round(self.percentile(model_name, 99), 3)
+            }
+            for model_name, samples in self._samples.items()
+            if samples
+        }
+
+
+class HedgePolicy:
+    """Decides when and where to hedge, within a hedge budget."""
+
+    # Unused budget carried over, in hedges
+    MAX_BALANCE = 10.0
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        percentile: Optional[float] = None,
+        budget: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        equivalents: Optional[Dict[str, List[str]]] = None
+    ):
+        """
+        Initialize policy.
+
+        Args:
+            enabled: Default for calls that do not pass hedge= (LLM_HEDGING)
+            percentile: Latency percentile that triggers a hedge (LLM_HEDGE_PERCENTILE)
+            budget: Hedges allowed per request (LLM_HEDGE_BUDGET)
+            min_samples: Samples required before hedging a model (LLM_HEDGE_MIN_SAMPLES)
+            equivalents: Hedge targets per model (LLM_HEDGE_MODELS)
+        """
+        if enabled is None:
+            enabled = os.getenv("LLM_HEDGING", "0").lower() in ("1", "true", "yes")
+        if equivalents is None:
+            equivalents = json.loads(os.getenv("LLM_HEDGE_MODELS", "{}"))
+
+        self.enabled = enabled
+        self.percentile = percentile or float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+        self.budget = budget if budget is not None else float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))
+        self.min_samples = min_samples or int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+        self.equivalents = equivalents
+        self.latencies = LatencyTracker()
+
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._balance = 0.0
+        self._next_target: Dict[str, int] = {}
+
+    def delay(self, model_name: str) -> Optional[float]:
+        """
+        Count a request and get how long to wait before hedging it.
+
+        Returns:
+            Seconds, or None if the model has too few samples to hedge
+        """
+        self.requests += 1
+        self._balance = min(self.MAX_BALANCE, self._balance + self.budget)
+
+        if self.latencies.count(model_name) < self.min_samples:
+            return None
+        return self.latencies.percentile(model_name, self.percentile)
+
+    def try_spend(self) -> bool:
+        """Take one hedge from the budget if available."""
+        if self._balance < 1.0:
+            return False
+        self._balance -= 1.0
+        self.hedges += 1
+        return True
+
+    def refund(self):
+        """Return a hedge taken with try_spend() that was not sent."""
+        self._balance = min(self.MAX_BALANCE, self._balance + 1.0)
+        self.hedges -= 1
+
+    def target(self, model_name: str) -> str:
+        """Pick the model to hedge against (round-robin over equivalents)."""
+        candidates = self.equivalents.get(model_name)
+        if not candidates:
+            return model_name
+        index = self._next_target.get(model_name, 0)
+        self._next_target[model_name] = index + 1
+        return candidates[index % len(candidates)]
+
+    def stats(self) -> Dict[str, object]:
+        """Get hedge counts and per-model latency percentiles."""
+        return {
+            "enabled": self.enabled,
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": round(self.hedges / self.requests, 4) if self.requests else 0.0,
+            "latency": self.latencies.stats()
+        }
+
+
+# Global policy instance
+_hedge_policy = None
+
+
+def get_hedge_policy() -> HedgePolicy:
+    """Get or create the global hedge policy."""
+    global _hedge_policy
+    if _hedge_policy is None:
+        _hedge_policy = HedgePolicy()
+    return _hedge_policy
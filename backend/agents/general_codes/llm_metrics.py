@@ -0,0 +1,54 @@
+"""
+Snapshot of runtime metrics for LLM calls.
+
+Collects the stats of the process-wide components that govern provider
+calls. Components that have not been created yet are reported as empty
+rather than being instantiated.
+"""
+
+from typing import Any, Dict
+
+from . import (
+    budget_governor, cassette, circuit_breaker, concurrency_limiter, cost_tracker, escalation, hedging, micro_batcher,
+    model_router, provider_registry, rate_limiter, response_cache, retry_policy, single_flight
+)
+
+
+def collect_llm_metrics() -> Dict[str, Any]:
+    """
+    Get current LLM call metrics.
+
+    Returns:
+        Dictionary with one section per component
+    """
+    governor = rate_limiter._quota_governor
+    limits = concurrency_limiter._concurrency_limits
+    registry = provider_registry._provider_registry
+    hedge_policy = hedging._hedge_policy
+    breakers = circuit_breaker._circuit_breakers
+    router = model_router._model_router
+    coalescing = single_flight._single_flight
+    cache = response_cache._response_cache
+    retries = retry_policy._retry_policy
+    costs = cost_tracker._cost_tracker
+    budgets = budget_governor._budget_governor
+    escalations = escalation._escalation_manager
+    recording = cassette._cassette
+    batcher = micro_batcher._micro_batcher
+
+    return {
+        "rate_limits": governor.stats() if governor else {},
+        "concurrency": limits.stats() if limits else {},
+        "hedging": hedge_policy.stats() if hedge_policy else {},
+        "circuit_breakers": breakers.stats() if breakers else {},
+        "routing": router.stats() if router else {},
+        "single_flight": coalescing.stats() if coalescing else {},
+        "response_cache": cache.stats() if cache else {},
+        "retries": retries.stats() if retries else {},
+        "costs": costs.get_breakdown() if costs else {},
+        "budgets": budgets.stats() if budgets else {},
+        "escalation": escalations.stats() if escalations else {},
+        "micro_batching": batcher.stats() if batcher else {},
+        "cassette": recording.stats() if recording else {},
+        "providers": registry.stats() if registry else {}
+    }
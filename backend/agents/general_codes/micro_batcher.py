@@ -0,0 +1,339 @@
+"""
+Micro-batching of concurrent agent calls into multi-item prompts.
+
+High-volume agents (e.g. attention_filter) are called once per post, so the
+system prompt and round trip dominate each call. An agent that declares a
+batch size collects concurrent calls with the same model and parameters for
+up to a short window or until the batch is full, then sends one prompt with
+the inputs numbered and a schema asking for an array of results, one per
+input, tagged with its index. Each caller gets its own result back.
+
+A call with no other call to the agent in flight runs on its own right
+away, so batching only adds latency under concurrent load. A batch asks
+for max_tokens per input, capped at the model's max_output_tokens and at
+what its context window leaves after the prompt; a batch without room for
+one full answer is not sent. Batches that fail, whose results cannot be
+parsed, or whose indexes do not match the inputs, fall back to one call per
+input. Token usage of a batch is split evenly between its callers.
+
+Settings (info.txt, or the upper-case config.py equivalents):
+
+    batch_size: 8           maximum inputs per prompt (batching is off below 2)
+    batch_window_ms: 25     how long to collect calls (default
+                            LLM_BATCH_WINDOW_MS or 25)
+
+LLM_MICRO_BATCHING=false turns batching off for every agent.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Type
+from pydantic import BaseModel, create_model
+import asyncio
+import contextvars
+import os
+import weakref
+
+from modules.agents.token_estimator import estimate_tokens
+from modules.agents.usage import report_usage, track_usage
+from .chunking import CONTEXT_SAFETY, context_window, output_limit
+from .cost_tracker import attribute, current_labels
+from .single_flight import request_key
+
+
+# Replaces the input in prompt templates with an input placeholder
+BATCH_INPUT_PLACEHOLDER = "(the numbered inputs in the message; analyze each one separately)"
+
+BATCH_INSTRUCTIONS = """
+
+BATCH MODE: The message contains {count} separate inputs, each starting with "### Input <number>".
+Analyze every input independently, exactly as instructed above, as if it were the only input.
+Return one result per input in the "results" array, in input order, each with "index" set to the input's number."""
+
+
+# Batch response model per agent response model
+_BATCH_MODELS: "weakref.WeakKeyDictionary[type, Type[BaseModel]]" = weakref.WeakKeyDictionary()
+
+
+def batch_model(response_model: Type[BaseModel]) -> Type[BaseModel]:
+    """Get the array-of-results model for an agent's response model (cached)."""
+    model = _BATCH_MODELS.get(response_model)
+    if model is None:
+        item = create_model(f"{response_model.__name__}Item", __base__=response_model, index=(int, ...))
+        model = create_model(f"{response_model.__name__}Batch", results=(List[item], ...))
+        _BATCH_MODELS[response_model] = model
+    return model
+
+
+def batch_input(inputs: List[str]) -> str:
+    """Number inputs for a batch prompt."""
+    return "\n\n".join(f"### Input {index}\n{text}" for index, text in enumerate(inputs))
+
+
+@dataclass(frozen=True)
+class BatchPolicy:
+    """How many calls an agent batches and for how long."""
+
+    max_items: int
+    window: float
+
+    @classmethod
+    def from_definition(cls, info: Dict[str, Any], config: Dict[str, Any]) -> Optional["BatchPolicy"]:
+        """
+        Build the policy declared in an agent's info.txt or config.py.
+
+        Returns:
+            The policy, or None if the agent does not batch
+        """
+        def setting(key: str) -> Any:
+            value = info.get(key)
+            return value if value not in (None, "") else config.get(key.upper())
+
+        if os.getenv("LLM_MICRO_BATCHING", "true").lower() in ("0", "false", "no"):
+            return None
+
+        max_items = int(setting("batch_size") or 1)
+        if max_items < 2:
+            return None
+
+        window_ms = setting("batch_window_ms")
+        window_ms = float(window_ms if window_ms is not None else os.getenv("LLM_BATCH_WINDOW_MS", "25"))
+        return cls(max_items=max_items, window=window_ms / 1000.0)
+
+
+# Resolves a caller that should make its own single call
+_SINGLE = object()
+
+
+@dataclass
+class _Batch:
+    agent: Any
+    model: Optional[str]
+    params: Dict[str, Any]
+    labels: Dict[str, str]
+    items: List[Tuple[str, asyncio.Future]] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+@dataclass
+class _AgentCounts:
+    calls: int = 0
+    batches: int = 0
+    batched: int = 0
+    fallbacks: int = 0
+
+
+class MicroBatcher:
+    """Collects concurrent calls per agent and parameters into batch prompts."""
+
+    def __init__(self):
+        self._pending: Dict[str, _Batch] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._tasks: set = set()
+        self._agents: Dict[str, _AgentCounts] = {}
+
+    async def submit(
+        self,
+        agent: Any,
+        input_data: str,
+        model: Optional[str],
+        logger: Any,
+        params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Run an agent call, batched with concurrent calls when possible.
+
+        Args:
+            agent: BaseAgent with a batch policy and output schema
+            input_data: Input text
+            model: Model override (None for the agent's default provider)
+            logger: Waterfall logger
+            params: Call parameters (as passed to BaseAgent._process)
+
+        Returns:
+            The call's result
+        """
+        policy = agent.batching
+        key = request_key("batch", agent.agent_id, agent.definition_hash, model, params)
+        counts = self._agents.setdefault(agent.agent_id, _AgentCounts())
+        counts.calls += 1
+
+        if key not in self._pending and not self._in_flight.get(key):
+            return await self._single(key, agent, input_data, model, logger, params)
+
+        loop = asyncio.get_running_loop()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _Batch(agent, model, dict(params), dict(current_labels()))
+            batch.timer = loop.call_later(policy.window, self._flush, key)
+            self._pending[key] = batch
+
+        future = loop.create_future()
+        batch.items.append((input_data, future))
+        if len(batch.items) >= policy.max_items:
+            self._flush(key)
+
+        outcome = await future
+        if outcome is _SINGLE:
+            return await self._single(key, agent, input_data, model, logger, params)
+
+        result, usage, size = outcome
+        report_usage(*usage)
+        logger.agent_step(agent.agent_id, "Micro-batched", {"batch_size": size})
+        logger.agent_result(agent.agent_id, result)
+        return result
+
+    async def _single(
+        self,
+        key: str,
+        agent: Any,
+        input_data: str,
+        model: Optional[str],
+        logger: Any,
+        params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        try:
+            return await agent._process(input_data, model, logger, **params)
+        finally:
+            self._done(key)
+
+    def _done(self, key: str):
+        self._in_flight[key] -= 1
+        if not self._in_flight[key]:
+            del self._in_flight[key]
+
+    def _flush(self, key: str):
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+
+        if len(batch.items) == 1:
+            _, future = batch.items[0]
+            if not future.done():
+                future.set_result(_SINGLE)
+            return
+
+        # A fresh context, so the batch's usage is not counted against the
+        # caller that happened to fill it; callers report their share
+        self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        task = asyncio.get_running_loop().create_task(self._run(key, batch), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: str, batch: _Batch):
+        agent = batch.agent
+        counts = self._agents[agent.agent_id]
+        inputs = [text for text, _ in batch.items]
+        futures = [future for _, future in batch.items]
+
+        def resolve(outcome: Any):
+            for future in futures:
+                if not future.done():
+                    future.set_result(outcome)
+
+        try:
+            with attribute(**batch.labels), track_usage() as usage:
+                results = await self._call(agent, batch.model, batch.params, inputs)
+        except Exception as e:
+            print(f"⚠️  Batch of {len(inputs)} {agent.agent_id} calls failed, running them one by one: {e}")
+            counts.fallbacks += 1
+            resolve(_SINGLE)
+            return
+        except BaseException as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            raise
+        finally:
+            self._done(key)
+
+        counts.batches += 1
+        counts.batched += len(inputs)
+        size = len(inputs)
+        share = (usage.input_tokens // size, usage.output_tokens // size, usage.cached_tokens // size)
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result((result, share, size))
+
+    @staticmethod
+    async def _call(agent: Any, model: Optional[str], params: Dict[str, Any], inputs: List[str]) -> List[Dict[str, Any]]:
+        """
+        Make one structured call for a batch of inputs.
+
+        Raises:
+            ValueError: If the model has no room for one full answer, or the
+                response is invalid or does not have exactly one result per
+                input
+        """
+        from .ai_model_selector import get_model_selector
+
+        params = dict(params)
+        provider = None
+        if not model and params.get("route") is None:
+            if not agent.ai_provider:
+                raise ValueError(f"Agent {agent.agent_id} has no AI provider configured")
+            provider = agent.ai_provider
+            params.setdefault("temperature", agent.ai_provider.temperature)
+            params.setdefault("max_tokens", agent.ai_provider.max_tokens)
+        if agent.hedge is not None:
+            params.setdefault("hedge", agent.hedge)
+        if agent.schema_format:
+            params.setdefault("schema_format", agent.schema_format)
+
+        input_text = batch_input(inputs)
+        system_prompt = agent._format_prompt(BATCH_INPUT_PLACEHOLDER) + BATCH_INSTRUCTIONS.format(count=len(inputs))
+        answer_tokens = params.get("max_tokens", 2048)
+        if params.get("route") is not None or model == "auto":
+            # Route first, so the output is capped for the model the router picked
+            model = get_model_selector().resolve_model(
+                model, params.pop("route", None), input_text, system_prompt, answer_tokens * len(inputs), True
+            )
+
+        # Room for one full answer per input, within what the model can generate and fit
+        prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(input_text)
+        room = int((context_window(model, provider) - prompt_tokens) * CONTEXT_SAFETY)
+        params["max_tokens"] = min(answer_tokens * len(inputs), output_limit(model, provider), room)
+        if params["max_tokens"] < answer_tokens:
+            raise ValueError(f"{model or provider.model_name} has room for {params['max_tokens']} output tokens")
+
+        response = await get_model_selector().generate_structured(
+            input_text=input_text,
+            output_schema=batch_model(agent._create_pydantic_model()),
+            model=model,
+            system_prompt=system_prompt,
+            provider=provider,
+            **params
+        )
+
+        results = {item.index: item for item in response.results}
+        if len(response.results) != len(inputs) or sorted(results) != list(range(len(inputs))):
+            raise ValueError(
+                f"Batch returned indexes {sorted(item.index for item in response.results)} for {len(inputs)} inputs"
+            )
+        return [results[index].model_dump(exclude={"index"}) for index in range(len(inputs))]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-agent batch counts, average batch size and fallbacks."""
+        return {
+            agent_id: {
+                "calls": counts.calls,
+                "batches": counts.batches,
+                "batched_calls": counts.batched,
+                "avg_batch_size": round(counts.batched / counts.batches, 2) if counts.batches else 0.0,
+                "fallbacks": counts.fallbacks
+            }
+            for agent_id, counts in self._agents.items()
+        }
+
+
+# Global micro-batcher
+_micro_batcher = None
+
+
+def get_micro_batcher() -> MicroBatcher:
+    """Get or create the global micro-batcher."""
+    global _micro_batcher
+    if _micro_batcher is None:
+        _micro_batcher = MicroBatcher()
+    return _micro_batcher
@@ -0,0 +1,250 @@
+"""
+Latency- and cost-aware model routing.
+
+Picks a model for a call from a capability requirement (structured
+output, context size, minimum quality tier, allowed providers) and an
+objective:
+
+    latency   lowest expected latency
+    cost      lowest expected cost per call
+    balanced  lowest latency plus cost converted to seconds at
+              LLM_ROUTER_SECONDS_PER_DOLLAR (default 1000, i.e. one cent
+              is worth ten seconds)
+
+Expected latency is an EWMA of observed call latency per model (models
+without observations get LLM_ROUTER_DEFAULT_LATENCY), expected cost comes
+from MODEL_PRICING and the call's token estimate. Both are divided by the
+model's EWMA success rate, so flaky models rank lower. Models whose
+circuit breaker is open are skipped.
+
+Models without observations are assumed no faster than the slowest
+observed candidate, so an untried model does not win on an optimistic
+default. Local (Ollama) models are only routed when OLLAMA_BASE_URL is
+set, since a provider instance can be built without a running server.
+"""
+
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Tuple
+import os
+
+from .circuit_breaker import CircuitOpenError, get_circuit_breakers
+from .cost_tracker import model_cost
+
+
+OBJECTIVES = ("latency", "cost", "balanced")
+
+
+def is_routable(info: Dict[str, Any]) -> bool:
+    """Whether routing and budget downgrades may pick a MODEL_REGISTRY entry."""
+    if not info.get("routable", True):
+        return False
+    return not info.get("local") or bool(os.getenv("OLLAMA_BASE_URL"))
+
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    """What a routed call needs and what to optimize for."""
+
+    objective: str = "balanced"
+    min_quality: int = 1
+    structured: bool = False
+    min_context: int = 0
+    providers: Optional[Tuple[str, ...]] = None
+    exclude: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_value(cls, value: Any) -> "RoutePolicy":
+        """Build a policy from a RoutePolicy, an objective name or a dict."""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            return cls(objective=value)
+        if isinstance(value, dict):
+            value = dict(value)
+            if value.get("providers") is not None:
+                value["providers"] = tuple(value["providers"])
+            if "exclude" in value:
+                value["exclude"] = tuple(value["exclude"])
+            return cls(**value)
+        raise ValueError(f"Invalid route policy: {value!r}")
+
+
+class ModelStats:
+    """EWMA latency and error rate of one model."""
+
+    ALPHA = 0.2
+
+    def __init__(self):
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.calls = 0
+        self.errors = 0
+
+    def observe(self, latency: Optional[float], error: bool):
+        self.calls += 1
+        if error:
+            self.errors += 1
+        self.error_rate += self.ALPHA * ((1.0 if error else 0.0) - self.error_rate)
+        if latency is not None:
+            self.latency = latency if self.latency is None else self.latency + self.ALPHA * (latency - self.latency)
+
+
+class ModelRouter:
+    """Chooses models by live latency, error rate and pricing."""
+
+    def __init__(
+        self,
+        default_latency: Optional[float] = None,
+        seconds_per_dollar: Optional[float] = None
+    ):
+        """
+        Initialize router.
+
+        Args:
+            default_latency: Assumed latency in seconds for models without
+                observations (defaults to LLM_ROUTER_DEFAULT_LATENCY or 2.0)
+            seconds_per_dollar: Exchange rate between cost and latency for the
+                balanced objective (defaults to LLM_ROUTER_SECONDS_PER_DOLLAR or 1000)
+        """
+        self.default_latency = default_latency or float(os.getenv("LLM_ROUTER_DEFAULT_LATENCY", "2.0"))
+        self.seconds_per_dollar = seconds_per_dollar or float(os.getenv("LLM_ROUTER_SECONDS_PER_DOLLAR", "1000"))
+        self._stats: Dict[str, ModelStats] = {}
+        self.decisions: Dict[str, Dict[str, int]] = {}
+        self.last_decision: Optional[Dict[str, Any]] = None
+
+    def observe(self, model_name: str, latency: Optional[float] = None, error: bool = False):
+        """Record the outcome of a call (latency of successful calls, or an error)."""
+        stats = self._stats.get(model_name)
+        if stats is None:
+            stats = self._stats[model_name] = ModelStats()
+        stats.observe(latency, error)
+
+    def candidates(self, policy: RoutePolicy) -> List[str]:
+        """Get models that meet the policy's capability requirements."""
+        from .ai_model_selector import MODEL_REGISTRY
+
+        breakers = get_circuit_breakers()
+        names = []
+        seen = set()
+        for name, info in MODEL_REGISTRY.items():
+            endpoint = (info["provider"], info["name"])
+            if endpoint in seen:
+                # Same endpoint registered under another name
+                continue
+            if not is_routable(info) or name in policy.exclude:
+                continue
+            if info.get("quality", 1) < policy.min_quality:
+                continue
+            if policy.structured and not info.get("supports_structured"):
+                continue
+            if info.get("context_window", 0) < policy.min_context:
+                continue
+            if policy.providers and info["provider"] not in policy.providers:
+                continue
+            breaker = breakers.find(*endpoint)
+            try:
+                if breaker is not None:
+                    breaker.check()
+            except CircuitOpenError:
+                continue
+            seen.add(endpoint)
+            names.append(name)
+        return names
+
+    def _estimate(
+        self,
+        model_name: str,
+        input_tokens: int,
+        output_tokens: int,
+        cold_latency: float
+    ) -> Tuple[float, float]:
+        stats = self._stats.get(model_name)
+        latency = stats.latency if stats and stats.latency is not None else cold_latency
+        success = max(0.05, 1.0 - stats.error_rate) if stats else 1.0
+        cost = model_cost(model_name, input_tokens, output_tokens)
+
+        # Failed calls are retried elsewhere, so divide by the success rate
+        return latency / success, cost / success
+
+    def route(self, policy: RoutePolicy, input_tokens: int = 0, output_tokens: int = 0) -> str:
+        """
+        Pick the best model for a call.
+
+        Args:
+            policy: Requirements and objective
+            input_tokens: Estimated prompt tokens
+            output_tokens: Maximum output tokens
+
+        Returns:
+            Registry model name
+
+        Raises:
+            ValueError: If the objective is unknown or no model qualifies
+        """
+        if policy.objective not in OBJECTIVES:
+            raise ValueError(f"Unknown routing objective: {policy.objective}")
+
+        if input_tokens + output_tokens > policy.min_context:
+            policy = replace(policy, min_context=input_tokens + output_tokens)
+
+        names = self.candidates(policy)
+        if not names:
+            raise ValueError(f"No available model satisfies {policy}")
+
+        # Untried models are assumed as slow as the slowest observed candidate
+        observed = [
+            self._stats[name].latency for name in names
+            if name in self._stats and self._stats[name].latency is not None
+        ]
+        cold_latency = max([self.default_latency] + observed)
+        estimates = {name: self._estimate(name, input_tokens, output_tokens, cold_latency) for name in names}
+
+        def score(name: str) -> Tuple[float, float]:
+            latency, cost = estimates[name]
+            if policy.objective == "latency":
+                return latency, cost
+            if policy.objective == "cost":
+                return cost, latency
+            return latency + cost * self.seconds_per_dollar, cost
+
+        chosen = min(names, key=score)
+
+        counts = self.decisions.setdefault(policy.objective, {})
+        counts[chosen] = counts.get(chosen, 0) + 1
+        latency, cost = estimates[chosen]
+        self.last_decision = {
+            "objective": policy.objective,
+            "model": chosen,
+            "candidates": len(names),
+            "expected_latency_seconds": round(latency, 3),
+            "expected_cost_usd": round(cost, 6)
+        }
+        return chosen
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-model latency/error estimates and routing decision counts."""
+        return {
+            "models": {
+                name: {
+                    "latency_seconds": round(stats.latency, 3) if stats.latency is not None else None,
+                    "error_rate": round(stats.error_rate, 3),
+                    "calls": stats.calls,
+                    "errors": stats.errors
+                }
+                for name, stats in self._stats.items()
+            },
+            "decisions": self.decisions,
+            "last_decision": self.last_decision
+        }
+
+
+# Global router instance
+_model_router = None
+
+
+def get_model_router() -> ModelRouter:
+    """Get or create the global model router."""
+    global _model_router
+    if _model_router is None:
+        _model_router = ModelRouter()
+    return _model_router
@@ -0,0 +1,161 @@
+"""
+Process-wide registry of AI provider instances.
+
+Shared by the model selector and the agent loader so each (provider, model)
+pair is instantiated once. Provider instances in turn share one SDK client
+per (provider, credentials); generation parameters such as temperature and
+max_tokens are passed per call rather than baked into instances.
+
+Provider classes are imported on first use, so a process only loads the
+SDKs (google.generativeai, openai, groq, aiohttp) of providers it calls.
+"""
+
+from typing import Dict, Optional, Tuple, Type
+import importlib
+import os
+import threading
+
+from modules.agents.base_ai_agent import BaseAIAgent
+
+
+# Default model per provider when only a provider name is given
+DEFAULT_PROVIDER_MODELS: Dict[str, Tuple[str, str]] = {
+    "gemini": ("GEMINI_MODEL", "gemini-2.0-flash-exp"),
+    "openai": ("OPENAI_MODEL", "gpt-4o-mini"),
+    "groq": ("GROQ_MODEL", "llama-3.3-70b-versatile"),
+    "ollama": ("OLLAMA_MODEL", "llama3.2"),
+    "deepinfra": ("DEEPINFRA_MODEL", "openai/gpt-oss-20b"),
+    "mock": ("MOCK_MODEL", "mock"),
+}
+
+
+# Provider name -> (module, class), imported on first use
+PROVIDER_CLASSES: Dict[str, Tuple[str, str]] = {
+    "gemini": ("modules.agents.gemini_agent", "GeminiAgent"),
+    "openai": ("modules.agents.openai_agent", "OpenAIAgent"),
+    "groq": ("modules.agents.groq_agent", "GroqAgent"),
+    "ollama": ("modules.agents.ollama_agent", "OllamaAgent"),
+    "deepinfra": ("modules.agents.deepinfra_agent", "DeepInfraAgent"),
+    "mock": ("modules.agents.mock_agent", "MockAgent"),
+}
+
+_provider_classes: Dict[str, Type[BaseAIAgent]] = {}
+
+
+def get_provider_class(provider_type: str) -> Type[BaseAIAgent]:
+    """
+    Resolve a provider class, importing its module on first use.
+
+    Raises:
+        ValueError: If the provider is unknown or its SDK is not installed
+    """
+    provider_type = provider_type.lower()
+    provider_class = _provider_classes.get(provider_type)
+    if provider_class is not None:
+        return provider_class
+
+    if provider_type not in PROVIDER_CLASSES:
+        raise ValueError(f"Unknown provider: {provider_type}")
+
+    module_name, class_name = PROVIDER_CLASSES[provider_type]
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError as e:
+        raise ValueError(f"Provider {provider_type} unavailable - {e}") from e
+
+    provider_class = getattr(module, class_name)
+    _provider_classes[provider_type] = provider_class
+    return provider_class
+
+
+def default_model_for(provider_type: str) -> str:
+    """Get the default model name for a provider (overridable via environment)."""
+    provider_type = provider_type.lower()
+    if provider_type not in DEFAULT_PROVIDER_MODELS:
+        raise ValueError(f"Unknown provider: {provider_type}")
+
+    env_var, default = DEFAULT_PROVIDER_MODELS[provider_type]
+    return os.getenv(env_var, default)
+
+
+class ProviderRegistry:
+    """Creates and caches provider instances keyed by (provider, model)."""
+
+    def __init__(self):
+        self._providers: Dict[Tuple[str, str], BaseAIAgent] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider_type: str, model_name: Optional[str] = None) -> BaseAIAgent:
+        """
+        Get or create a provider instance.
+
+        Args:
+            provider_type: Provider name (gemini, openai, groq, ollama, deepinfra)
+            model_name: Provider-side model name (defaults to default_model_for)
+
+        Returns:
+            Shared provider instance
+        """
+        provider_type = provider_type.lower()
+        model_name = model_name or default_model_for(provider_type)
+        key = (provider_type, model_name)
+
+        provider = self._providers.get(key)
+        if provider is not None:
+            return provider
+
+        with self._lock:
+            provider = self._providers.get(key)
+            if provider is None:
+                provider = self._create(provider_type, model_name)
+                self._providers[key] = provider
+            return provider
+
+    def register(self, provider: BaseAIAgent, provider_type: Optional[str] = None):
+        """Register an existing instance (e.g. a preconfigured or test provider)."""
+        key = ((provider_type or provider.provider).lower(), provider.model_name)
+        self._providers[key] = provider
+
+    def clear(self):
+        """Drop all cached provider instances."""
+        self._providers.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Get the number of cached provider instances per provider."""
+        counts: Dict[str, int] = {}
+        for provider_type, _ in self._providers:
+            counts[provider_type] = counts.get(provider_type, 0) + 1
+        return counts
+
+    @staticmethod
+    def _create(provider_type: str, model_name: str) -> BaseAIAgent:
+        from .ai_model_selector import MODEL_REGISTRY
+        from .cassette import CassetteAgent, get_cassette
+
+        provider_class = get_provider_class(provider_type)
+        # Record calls to or replay them from LLM_CASSETTE. The provider
+        # itself is only created for calls made live, so replays need no keys.
+        cassette = get_cassette()
+        if cassette is not None:
+            provider = CassetteAgent(provider_class, cassette, model_name)
+        else:
+            provider = provider_class(model_name=model_name)
+        # Schema-constrained decoding follows the model's registry entry,
+        # since support differs between models of one provider
+        for info in MODEL_REGISTRY.values():
+            if info["provider"] == provider_type and info["name"] == model_name:
+                provider.supports_native_schema = info.get("supports_native_schema", False)
+                break
+        return provider
+
+
+# Global registry instance
+_provider_registry = None
+
+
+def get_provider_registry() -> ProviderRegistry:
+    """Get or create the global provider registry."""
+    global _provider_registry
+    if _provider_registry is None:
+        _provider_registry = ProviderRegistry()
+    return _provider_registry
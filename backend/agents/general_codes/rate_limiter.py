@@ -0,0 +1,234 @@
+"""
+Token-bucket rate limiting for LLM provider calls.
+
+The QuotaGovernor enforces requests-per-minute (RPM) and tokens-per-minute
+(TPM) limits per provider and per model. Callers wait in FIFO order for
+capacity instead of failing, token reservations are estimated up front from
+the prompt and corrected with the usage the provider reports.
+
+Limits come from optional "rpm"/"tpm" keys in MODEL_REGISTRY entries and
+from the LLM_RATE_LIMITS environment variable, a JSON object keyed by
+provider or model name, e.g.:
+
+    LLM_RATE_LIMITS='{"gemini": {"rpm": 2000, "tpm": 4000000}, "gpt-oss-20b": {"rpm": 300}}'
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import os
+import time
+
+
+class TokenBucket:
+    """Bucket refilled continuously at ``per_minute`` units per minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` units are available (0 if available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+@dataclass
+class _Scope:
+    """Limits and queue for one provider or model."""
+
+    requests: Optional[TokenBucket] = None
+    tokens: Optional[TokenBucket] = None
+    queue: asyncio.Lock = field(default_factory=asyncio.Lock)
+    waited: float = 0.0
+    queued: int = 0
+
+
+@dataclass
+class Reservation:
+    """Capacity taken for one call, to be reconciled with actual usage."""
+
+    scopes: List[_Scope]
+    estimated_tokens: int
+    wait_seconds: float
+
+
+class QuotaGovernor:
+    """Enforces per-provider and per-model RPM/TPM limits with fair queueing."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Dict[str, float]]] = None,
+        headroom: Optional[float] = None
+    ):
+        """
+        Initialize governor.
+
+        Args:
+            limits: {provider_or_model: {"rpm": ..., "tpm": ...}}
+                (defaults to LLM_RATE_LIMITS)
+            headroom: Fraction of each quota to use, keeping throughput just
+                under provider limits (defaults to LLM_RATE_HEADROOM or 0.95)
+        """
+        if limits is None:
+            limits = json.loads(os.getenv("LLM_RATE_LIMITS", "{}"))
+        if headroom is None:
+            headroom = float(os.getenv("LLM_RATE_HEADROOM", "0.95"))
+
+        self.limits = limits
+        self.headroom = headroom
+        self._scopes: Dict[str, _Scope] = {}
+
+    def _scope(
+        self,
+        scope_key: str,
+        limits_key: str,
+        registry_info: Optional[Dict[str, Any]] = None
+    ) -> Optional[_Scope]:
+        scope = self._scopes.get(scope_key)
+        if scope is None:
+            limits = {}
+            if registry_info:
+                limits.update({k: registry_info[k] for k in ("rpm", "tpm") if registry_info.get(k)})
+            limits.update(self.limits.get(limits_key, {}))
+
+            scope = _Scope(
+                requests=TokenBucket(limits["rpm"] * self.headroom) if limits.get("rpm") else None,
+                tokens=TokenBucket(limits["tpm"] * self.headroom) if limits.get("tpm") else None
+            )
+            self._scopes[scope_key] = scope
+
+        if scope.requests is None and scope.tokens is None:
+            return None
+        return scope
+
+    def _scopes_for(
+        self,
+        provider_type: str,
+        model_name: str,
+        registry_info: Optional[Dict[str, Any]]
+    ) -> List[_Scope]:
+        # Always provider before model, so queues are acquired in a consistent order
+        scopes = [
+            self._scope(f"provider:{provider_type}", provider_type),
+            self._scope(f"model:{model_name}", model_name, registry_info)
+        ]
+        return [scope for scope in scopes if scope is not None]
+
+    async def acquire(
+        self,
+        provider_type: str,
+        model_name: str,
+        estimated_tokens: int,
+        registry_info: Optional[Dict[str, Any]] = None
+    ) -> Reservation:
+        """
+        Wait until the call fits within every applicable limit, then reserve it.
+
+        Args:
+            provider_type: Provider name (e.g. "gemini")
+            model_name: Registry model name (e.g. "gemini-2.0-flash")
+            estimated_tokens: Expected input + output tokens
+            registry_info: MODEL_REGISTRY entry, for per-model rpm/tpm
+
+        Returns:
+            Reservation to pass to reconcile() after the call
+        """
+        scopes = self._scopes_for(provider_type, model_name, registry_info)
+        started = time.monotonic()
+
+        acquired = []
+        try:
+            for scope in scopes:
+                scope.queued += 1
+                try:
+                    # asyncio.Lock wakes waiters in FIFO order, so callers are served fairly
+                    await scope.queue.acquire()
+                finally:
+                    scope.queued -= 1
+                acquired.append(scope)
+
+            while True:
+                now = time.monotonic()
+                delay = 0.0
+                for scope in scopes:
+                    if scope.requests:
+                        delay = max(delay, scope.requests.wait_time(1, now))
+                    if scope.tokens:
+                        delay = max(delay, scope.tokens.wait_time(estimated_tokens, now))
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+
+            for scope in scopes:
+                if scope.requests:
+                    scope.requests.take(1)
+                if scope.tokens:
+                    scope.tokens.take(estimated_tokens)
+        finally:
+            for scope in reversed(acquired):
+                scope.queue.release()
+
+        waited = time.monotonic() - started
+        for scope in scopes:
+            scope.waited += waited
+        return Reservation(scopes=scopes, estimated_tokens=estimated_tokens, wait_seconds=waited)
+
+    def reconcile(self, reservation: Reservation, actual_tokens: Optional[int]):
+        """Correct a reservation with the tokens the provider actually reported."""
+        if actual_tokens is None:
+            return
+
+        difference = reservation.estimated_tokens - actual_tokens
+        for scope in reservation.scopes:
+            if not scope.tokens:
+                continue
+            if difference > 0:
+                scope.tokens.give_back(difference)
+            else:
+                scope.tokens.take(-difference)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Get remaining capacity, queue length and total wait per limited scope."""
+        now = time.monotonic()
+        stats = {}
+        for key, scope in self._scopes.items():
+            if scope.requests is None and scope.tokens is None:
+                continue
+            entry = {"queued": scope.queued, "waited_seconds": round(scope.waited, 3)}
+            if scope.requests:
+                scope.requests.wait_time(0, now)
+                entry["requests_available"] = round(scope.requests.tokens, 2)
+            if scope.tokens:
+                scope.tokens.wait_time(0, now)
+                entry["tokens_available"] = round(scope.tokens.tokens, 2)
+            stats[key] = entry
+        return stats
+
+
+# Global governor instance
+_quota_governor = None
+
+
+def get_quota_governor() -> QuotaGovernor:
+    """Get or create the global quota governor."""
+    global _quota_governor
+    if _quota_governor is None:
+        _quota_governor = QuotaGovernor()
+    return _quota_governor
@@ -0,0 +1,229 @@
+"""
+Two-tier cache for LLM responses.
+
+A bounded in-memory LRU sits in front of a SQLite file shared by all worker
+processes on the host. Entries expire after a per-entry TTL. Values are
+stored as JSON, so every hit returns a fresh copy. Async callers use
+aget()/aset(), which run SQLite reads and writes in a worker thread.
+
+Settings (environment):
+    LLM_CACHE_ENTRIES   in-memory LRU size (1024)
+    LLM_CACHE_PATH      SQLite file for the disk tier (in the temp dir by
+                        default; empty disables the disk tier)
+    LLM_CACHE_TTL       default TTL in seconds (86400)
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+
+class ResponseCache:
+    """In-memory LRU plus SQLite disk tier with TTL expiry."""
+
+    # Expired disk rows are purged once every this many writes
+    PURGE_EVERY = 100
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        path: Optional[str] = None,
+        default_ttl: Optional[float] = None
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Memory tier size (defaults to LLM_CACHE_ENTRIES or 1024)
+            path: SQLite file ("" disables the disk tier; defaults to LLM_CACHE_PATH)
+            default_ttl: TTL when set() is given none (defaults to LLM_CACHE_TTL or 86400)
+        """
+        if path is None:
+            path = os.getenv(
+                "LLM_CACHE_PATH",
+                os.path.join(tempfile.gettempdir(), "b4_llm_responses.sqlite3")
+            )
+
+        self.max_entries = max_entries or int(os.getenv("LLM_CACHE_ENTRIES", "1024"))
+        self.default_ttl = default_ttl or float(os.getenv("LLM_CACHE_TTL", "86400"))
+        self.path = path
+
+        # key -> (expires_at, json value, tokens)
+        self._memory: "OrderedDict[str, Tuple[float, str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # SQLite work can run in worker threads (aget/aset) while the event
+        # loop serves memory hits, so the two tiers are locked separately
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._db is None:
+            try:
+                db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                    "tokens INTEGER NOT NULL, expires_at REAL NOT NULL)"
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️  LLM response cache disk tier disabled: {e}")
+                self.path = ""
+                return None
+            self._db = db
+        return self._db
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Returns:
+            A fresh copy of the value, or None on a miss
+        """
+        found, value = self._get_memory(key)
+        return value if found else self._get_disk(key)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Like get(), reading the disk tier in a worker thread instead of on the event loop."""
+        found, value = self._get_memory(key)
+        if found:
+            return value
+        if not self.path:
+            return self._get_disk(key)
+        return await asyncio.to_thread(self._get_disk, key)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, tokens: int = 0):
+        """
+        Store a JSON-serializable value.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Seconds until expiry (defaults to default_ttl)
+            tokens: Tokens the call used, counted as saved on each hit
+        """
+        entry = self._set_memory(key, value, ttl, tokens)
+        self._set_disk(key, *entry)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None, tokens: int = 0):
+        """Like set(), writing the disk tier in a worker thread instead of on the event loop."""
+        entry = self._set_memory(key, value, ttl, tokens)
+        if self.path:
+            await asyncio.to_thread(self._set_disk, key, *entry)
+
+    def _get_memory(self, key: str) -> Tuple[bool, Optional[Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= now:
+                del self._memory[key]
+                return False, None
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            self.saved_tokens += entry[2]
+            return True, json.loads(entry[1])
+
+    def _get_disk(self, key: str) -> Optional[Any]:
+        row = None
+        with self._db_lock:
+            db = self._connection()
+            if db is not None:
+                try:
+                    row = db.execute(
+                        "SELECT value, tokens, expires_at FROM responses WHERE key = ? AND expires_at > ?",
+                        (key, time.time())
+                    ).fetchone()
+                except sqlite3.Error:
+                    row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self._remember(key, row[2], row[0], row[1])
+            self.disk_hits += 1
+            self.saved_tokens += row[1]
+        return json.loads(row[0])
+
+    def _set_memory(self, key: str, value: Any, ttl: Optional[float], tokens: int) -> Tuple[str, int, float]:
+        expires_at = time.time() + (ttl or self.default_ttl)
+        data = json.dumps(value)
+        with self._lock:
+            self._remember(key, expires_at, data, tokens)
+        return data, tokens, expires_at
+
+    def _set_disk(self, key: str, data: str, tokens: int, expires_at: float):
+        with self._db_lock:
+            db = self._connection()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, tokens, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, data, tokens, expires_at)
+                )
+                self._writes += 1
+                if self._writes % self.PURGE_EVERY == 0:
+                    db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+                db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️  LLM response cache write failed: {e}")
+
+    def _remember(self, key: str, expires_at: float, data: str, tokens: int):
+        self._memory[key] = (expires_at, data, tokens)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries from both tiers."""
+        with self._lock:
+            self._memory.clear()
+        with self._db_lock:
+            db = self._connection()
+            if db is not None:
+                db.execute("DELETE FROM responses")
+                db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counts, hit rate and tokens saved."""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "saved_tokens": self.saved_tokens,
+            "disk_path": self.path or None
+        }
+
+
+# Global cache instance
+_response_cache = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get or create the global response cache."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
@@ -0,0 +1,248 @@
+"""
+Retries for provider calls.
+
+Failures are classified first. Rate limits, timeouts, connection errors and
+5xx responses are retried with capped exponential backoff and full jitter,
+waiting at least as long as a ``Retry-After`` header asks. Unparseable or
+invalid structured output is retried without delay, since it is not a sign
+of overload. Client errors (bad request, auth) and open circuits are not
+retried. No retry starts past the overall deadline.
+
+Settings (environment):
+    LLM_RETRY_ATTEMPTS        attempts per call, including the first (3)
+    LLM_RETRY_PARSE_ATTEMPTS  attempts for parse/validation failures (2)
+    LLM_RETRY_BASE_DELAY      backoff base in seconds (0.5)
+    LLM_RETRY_MAX_DELAY       backoff cap in seconds (20)
+    LLM_RETRY_DEADLINE        seconds after the first attempt after which no
+                              retry is started (60)
+"""
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+import asyncio
+import os
+import random
+import time
+
+from .circuit_breaker import CircuitOpenError
+
+
+T = TypeVar("T")
+
+# Error categories
+RATE_LIMIT = "rate_limit"
+TIMEOUT = "timeout"
+SERVER = "server"
+CONNECTION = "connection"
+PARSE = "parse"
+CLIENT = "client"
+CIRCUIT_OPEN = "circuit_open"
+UNKNOWN = "unknown"
+
+# Categories retried with backoff
+TRANSIENT = (RATE_LIMIT, TIMEOUT, SERVER, CONNECTION)
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """Get the HTTP status of a provider error (OpenAI/Groq, aiohttp, Google API core)."""
+    for attribute in ("status_code", "status", "code"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int) and 100 <= value < 600:
+            return value
+    return None
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Classify a provider call failure.
+
+    Returns:
+        One of RATE_LIMIT, TIMEOUT, SERVER, CONNECTION, PARSE, CLIENT,
+        CIRCUIT_OPEN or UNKNOWN
+    """
+    if isinstance(error, CircuitOpenError):
+        return CIRCUIT_OPEN
+
+    status = status_code(error)
+    if status is not None:
+        if status == 429:
+            return RATE_LIMIT
+        if status in (408, 504):
+            return TIMEOUT
+        if status >= 500:
+            return SERVER
+        if status >= 400:
+            return CLIENT
+
+    # Pydantic ValidationError and json.JSONDecodeError are ValueErrors too
+    if isinstance(error, ValueError):
+        return PARSE
+
+    name = type(error).__name__
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)) or "Timeout" in name:
+        return TIMEOUT
+    if isinstance(error, ConnectionError) or "Connection" in name or "Connector" in name:
+        return CONNECTION
+    if "RateLimit" in name or "ResourceExhausted" in name:
+        return RATE_LIMIT
+    return UNKNOWN
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Get the delay a provider asked for, in seconds.
+
+    Reads ``retry-after-ms`` or ``Retry-After`` (seconds or an HTTP date)
+    from the error's response headers.
+    """
+    headers = getattr(error, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    try:
+        milliseconds = headers.get("retry-after-ms")
+        if milliseconds is not None:
+            return max(0.0, float(milliseconds) / 1000.0)
+
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            moment = parsedate_to_datetime(value)
+            return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Backoff-and-retry for provider calls with per-category counts."""
+
+    def __init__(
+        self,
+        max_attempts: Optional[int] = None,
+        parse_attempts: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        deadline: Optional[float] = None
+    ):
+        """
+        Initialize policy.
+
+        Args:
+            max_attempts: Attempts for transient failures (defaults to LLM_RETRY_ATTEMPTS or 3)
+            parse_attempts: Attempts for parse failures (defaults to LLM_RETRY_PARSE_ATTEMPTS or 2)
+            base_delay: Backoff base in seconds (defaults to LLM_RETRY_BASE_DELAY or 0.5)
+            max_delay: Backoff cap in seconds (defaults to LLM_RETRY_MAX_DELAY or 20)
+            deadline: Seconds after which no retry starts (defaults to LLM_RETRY_DEADLINE or 60)
+        """
+        self.max_attempts = max_attempts or int(os.getenv("LLM_RETRY_ATTEMPTS", "3"))
+        self.parse_attempts = parse_attempts or int(os.getenv("LLM_RETRY_PARSE_ATTEMPTS", "2"))
+        self.base_delay = base_delay if base_delay is not None else float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+        self.max_delay = max_delay if max_delay is not None else float(os.getenv("LLM_RETRY_MAX_DELAY", "20"))
+        self.deadline = deadline or float(os.getenv("LLM_RETRY_DEADLINE", "60"))
+
+        self.calls = 0
+        self.retries: Dict[str, int] = {}
+        self.failures: Dict[str, int] = {}
+        self.recovered = 0
+        self.deadline_exceeded = 0
+        self.sleep_seconds = 0.0
+
+    def backoff(self, retry: int, error: BaseException, category: str) -> float:
+        """
+        Get the delay before a retry.
+
+        Args:
+            retry: Retry number (1 for the first retry)
+            error: The failure being retried
+            category: Its category
+        """
+        if category == PARSE:
+            return 0.0
+        # Full jitter: uniform over [0, capped exponential]
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (retry - 1))))
+        requested = retry_after(error)
+        if requested is not None:
+            delay = max(delay, requested)
+        return delay
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[T]],
+        label: str = "",
+        max_attempts: Optional[int] = None
+    ) -> T:
+        """
+        Run a call, retrying failures the policy considers retryable.
+
+        Args:
+            call: Makes one attempt (called again for each retry)
+            label: Name for log lines (e.g. the model)
+            max_attempts: Override the attempts for transient failures
+
+        Returns:
+            The first successful result
+
+        Raises:
+            The last failure once retries are exhausted, not allowed, or
+            would start past the deadline
+        """
+        attempts = max_attempts or self.max_attempts
+        started = time.monotonic()
+        self.calls += 1
+        retry = 0
+
+        while True:
+            try:
+                result = await call()
+            except Exception as e:
+                category = classify_error(e)
+                self.failures[category] = self.failures.get(category, 0) + 1
+
+                limit = attempts if category in TRANSIENT else self.parse_attempts if category == PARSE else 1
+                if retry + 1 >= limit:
+                    raise
+
+                retry += 1
+                delay = self.backoff(retry, e, category)
+                if time.monotonic() - started + delay > self.deadline:
+                    self.deadline_exceeded += 1
+                    raise
+
+                self.retries[category] = self.retries.get(category, 0) + 1
+                self.sleep_seconds += delay
+                print(f"🔁 Retrying {label or 'call'} after {category} ({retry}/{limit - 1}) in {delay:.2f}s: {e}")
+                await asyncio.sleep(delay)
+                continue
+
+            if retry:
+                self.recovered += 1
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Get call, retry and failure counts."""
+        return {
+            "calls": self.calls,
+            "retries": dict(self.retries),
+            "failures": dict(self.failures),
+            "recovered": self.recovered,
+            "deadline_exceeded": self.deadline_exceeded,
+            "sleep_seconds": round(self.sleep_seconds, 3)
+        }
+
+
+# Global retry policy
+_retry_policy = None
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Get or create the global retry policy."""
+    global _retry_policy
+    if _retry_policy is None:
+        _retry_policy = RetryPolicy()
+    return _retry_policy
@@ -0,0 +1,128 @@
+"""
+Single-flight coalescing of identical concurrent requests.
+
+While a request is in flight, identical requests (same key) wait for it
+and share its result instead of making their own upstream call. Nothing
+is kept once the call completes; see the response cache for that.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import copy
+import hashlib
+import json
+import os
+
+
+def request_key(*parts: Any) -> str:
+    """
+    Build a stable key from request parts (agent, definition, model, input, params).
+
+    Parts are serialized as sorted JSON; values without a JSON form use repr().
+    """
+    payload = json.dumps(parts, sort_keys=True, default=repr, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def normalize_input(text: str) -> str:
+    """Normalize input text for keying (surrounding and repeated whitespace)."""
+    return " ".join(text.split())
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution."""
+
+    def __init__(self, enabled: Optional[bool] = None):
+        """
+        Initialize single-flight group.
+
+        Args:
+            enabled: Coalesce calls (defaults to LLM_SINGLE_FLIGHT or on)
+        """
+        if enabled is None:
+            enabled = os.getenv("LLM_SINGLE_FLIGHT", "1").lower() in ("1", "true", "yes")
+        self.enabled = enabled
+        # key -> (shared task, number of callers waiting on it)
+        self._calls: Dict[str, Tuple[asyncio.Task, int]] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn once per key among concurrent callers.
+
+        Coalesced callers get deep copies of the result, so no two callers
+        share a mutable object. If fn raises, every waiting caller gets the error.
+        A cancelled caller does not cancel the shared call unless it was the
+        last one waiting.
+
+        Args:
+            key: Request key (see request_key)
+            fn: Coroutine function performing the call
+
+        Returns:
+            The call's result
+        """
+        if not self.enabled:
+            return await fn()
+
+        entry = self._calls.get(key)
+        if entry is None or entry[0].done():
+            task = asyncio.ensure_future(fn())
+            task.add_done_callback(self._consume)
+            self._calls[key] = (task, 1)
+            self.executed += 1
+            shared = False
+        else:
+            task = entry[0]
+            self._calls[key] = (task, entry[1] + 1)
+            self.coalesced += 1
+            shared = True
+
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            self._leave(key, task)
+            raise
+
+        self._leave(key, task)
+        return copy.deepcopy(result) if shared else result
+
+    def _leave(self, key: str, task: asyncio.Task):
+        entry = self._calls.get(key)
+        if entry is None or entry[0] is not task:
+            return
+        waiters = entry[1] - 1
+        if waiters > 0:
+            self._calls[key] = (task, waiters)
+            return
+        del self._calls[key]
+        if not task.done():
+            # Nobody is waiting for the result anymore
+            task.cancel()
+
+    @staticmethod
+    def _consume(task: asyncio.Task):
+        if not task.cancelled():
+            # Retrieve the exception so a failure nobody awaited is not reported as lost
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """Get executed and coalesced call counts."""
+        return {
+            "in_flight": len(self._calls),
+            "executed": self.executed,
+            "coalesced": self.coalesced
+        }
+
+
+# Global single-flight instance
+_single_flight = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Get or create the global single-flight group."""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
@@ -1,6 +1,7 @@
 """Structure output handling utilities."""
 
 import json
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, Type, Optional
 from pydantic import BaseModel, create_model, Field
@@ -49,6 +50,10 @@ def create_response_model(
     """
     Create Pydantic model from JSON schema.
 
+    Models are cached by schema content and name, so repeated calls with
+    the same schema (including nested object types) return the same class.
+    Key order is part of the cache key since it fixes the field order.
+
     Args:
         schema: JSON schema with properties and types
         model_name: Name for the generated model
@@ -56,6 +61,20 @@ def create_response_model(
     Returns:
         Pydantic model class
     """
+    return _cached_response_model(json.dumps(schema), model_name)
+
+
+@lru_cache(maxsize=256)
+def _cached_response_model(schema_key: str, model_name: str) -> Type[BaseModel]:
+    """Build a response model from a serialized JSON schema."""
+    return _build_response_model(json.loads(schema_key), model_name)
+
+
+def _build_response_model(
+    schema: Dict[str, Any],
+    model_name: str
+) -> Type[BaseModel]:
+    """Build Pydantic model from JSON schema without caching."""
     properties = schema.get('properties', {})
     required = schema.get('required', [])
 
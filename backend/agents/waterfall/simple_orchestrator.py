@@ -3,9 +3,11 @@ Simple waterfall orchestrator with integrated logging.
 Shows how agents work together in the pipeline.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import asyncio
 from agents.agent_loader import AgentLoader
+from agents.general_codes.budget_governor import get_budget_governor
+from agents.general_codes.cost_tracker import attribute, get_cost_tracker
 from agents.general_codes.waterfall_logger import get_waterfall_logger
 
 class SimpleWaterfallOrchestrator:
@@ -17,10 +19,15 @@ class SimpleWaterfallOrchestrator:
         self.loader = AgentLoader()
         self.logger = get_waterfall_logger()
 
-        # Define the waterfall stages
+        # Define the waterfall stages. A stage either pins a "model" or gives a
+        # "route" policy (e.g. RoutePolicy(objective="cost", min_quality=3)) and
+        # lets the model router pick by live latency and cost.
+        # A "gate" field is read from the stage's streamed output: false stops
+        # generation and the pipeline, true starts the next stages right away.
+        # Agents that micro-batch (info.txt batch_size) gate on their result.
         self.stages = [
             # Stage 1: Attention
-            {"agent": "attention_filter", "model": "gpt-oss-20b", "required": True},
+            {"agent": "attention_filter", "model": "gpt-oss-20b", "required": True, "gate": "should_process"},
 
             # Stage 2: Context (when created)
             # {"agent": "context_builder", "model": "gemini-2.0-flash-lite", "required": False},
@@ -47,50 +54,11 @@ class SimpleWaterfallOrchestrator:
 
         # Track results from each stage
         stage_results = {}
-        should_continue = True
 
         try:
-            for stage in self.stages:
-                if not should_continue:
-                    break
-
-                agent_id = stage["agent"]
-                model = stage["model"]
-                required = stage.get("required", False)
-
-                try:
-                    # Load agent
-                    agent = self.loader.load_agent(agent_id)
-
-                    # Process with agent
-                    result = await agent.process(
-                        input_data=input_text,
-                        model=model
-                    )
-
-                    # Store result
-                    stage_results[agent_id] = result
-
-                    # Check if we should continue (attention filter decision)
-                    if agent_id == "attention_filter":
-                        should_process = result.get("should_process", True)
-                        if not should_process:
-                            self.logger.agent_step(
-                                agent_id,
-                                "Pipeline stopped",
-                                {"reason": result.get("skip_reason", "Unknown")}
-                            )
-                            should_continue = False
-
-                except Exception as e:
-                    if required:
-                        # Required agent failed, stop pipeline
-                        self.logger.agent_error(agent_id, f"Required agent failed: {e}", e)
-                        raise
-                    else:
-                        # Optional agent failed, continue
-                        self.logger.agent_error(agent_id, f"Optional agent failed: {e}", e)
-                        stage_results[agent_id] = {"error": str(e)}
+            # Attribute LLM spend to the pipeline and profile this run
+            with attribute(workflow="waterfall"), get_cost_tracker().profile("waterfall") as profile:
+                should_continue = await self._run_stages(self.stages, input_text, stage_results)
 
             # Complete pipeline
             self.logger.pipeline_complete(stage_results)
@@ -100,13 +68,123 @@ class SimpleWaterfallOrchestrator:
                 "processed": should_continue,
                 "stages_completed": len(stage_results),
                 "results": stage_results,
-                "trace": self.logger.get_trace()
+                "trace": self.logger.get_trace(),
+                "profile": profile.to_dict()
             }
 
         except Exception as e:
             self.logger.pipeline_complete({"error": str(e)})
             raise
 
+    async def _run_stages(self, stages: List[Dict[str, Any]], input_text: str, stage_results: Dict[str, Any]) -> bool:
+        """
+        Run stages in order, storing each result in stage_results.
+
+        Returns:
+            False if a gate stopped the pipeline
+        """
+        for index, stage in enumerate(stages):
+            agent_id = stage["agent"]
+            model = stage.get("model")
+            route = stage.get("route")
+            required = stage.get("required", False)
+            gate = stage.get("gate")
+            downstream = None
+
+            # Spend budget running low: keep only the stages the pipeline needs
+            if not required and get_budget_governor().should_skip_optional(agent=agent_id):
+                self.logger.agent_step(agent_id, "Skipped", {"reason": "LLM budget low"})
+                stage_results[agent_id] = {"skipped": "budget"}
+                continue
+
+            try:
+                # Load agent
+                agent = self.loader.load_agent(agent_id)
+
+                # Batching agents gate on their full result, so their calls
+                # still go through the micro-batcher, cache and escalation
+                if gate and agent.output_schema and agent.batching is None:
+                    result, downstream = await self._run_gate(agent, stage, stages[index + 1:], input_text, stage_results)
+                else:
+                    # Process with agent
+                    result = await agent.process(
+                        input_data=input_text,
+                        model=model,
+                        route=route
+                    )
+
+                # Store result
+                stage_results[agent_id] = result
+
+            except Exception as e:
+                if required:
+                    # Required agent failed, stop pipeline
+                    self.logger.agent_error(agent_id, f"Required agent failed: {e}", e)
+                    raise
+                else:
+                    # Optional agent failed, continue
+                    self.logger.agent_error(agent_id, f"Optional agent failed: {e}", e)
+                    stage_results[agent_id] = {"error": str(e)}
+
+            # Remaining stages were started as soon as the gate opened
+            if downstream is not None:
+                return await downstream
+
+            # Check if we should continue (e.g. attention filter decision)
+            if gate and not stage_results[agent_id].get(gate, True):
+                self.logger.agent_step(
+                    agent_id,
+                    "Pipeline stopped",
+                    {"reason": stage_results[agent_id].get("skip_reason", "Unknown")}
+                )
+                return False
+
+        return True
+
+    async def _run_gate(
+        self,
+        agent: Any,
+        stage: Dict[str, Any],
+        remaining: List[Dict[str, Any]],
+        input_text: str,
+        stage_results: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Optional[asyncio.Task]]:
+        """
+        Stream a gating stage, deciding as soon as its gate field is complete.
+
+        A false gate stops the stage's generation. A true gate starts the
+        remaining stages while the stage finishes its output.
+
+        Returns:
+            The stage's result, and the task running the remaining stages if
+            the gate opened
+        """
+        downstream: Optional[asyncio.Task] = None
+
+        def decide(value: Any) -> bool:
+            nonlocal downstream
+            if value:
+                downstream = asyncio.ensure_future(self._run_stages(remaining, input_text, stage_results))
+                return False
+            return True
+
+        result: Dict[str, Any] = {}
+        try:
+            async for event in agent.process_stream(
+                input_data=input_text,
+                model=stage.get("model"),
+                route=stage.get("route"),
+                hooks={stage["gate"]: decide}
+            ):
+                if event["type"] == "result":
+                    result = event["data"]
+        except BaseException:
+            if downstream is not None:
+                downstream.cancel()
+            raise
+
+        return result, downstream
+
     async def process_batch(self, inputs: list) -> list:
         """
         Process multiple inputs through the pipeline.
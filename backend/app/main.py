@@ -130,7 +130,8 @@ async def get_execution_status(execution_id: str) -> dict:
         "state": context.state,
         "error": getattr(context, "error", None),
         "outputs": context.node_outputs,
-        "logs": getattr(context, "logs", [])
+        "logs": getattr(context, "logs", []),
+        "profile": context.profile.to_dict() if context.profile else None
     }
 
 @app.get("/api/workflows")
@@ -208,6 +209,14 @@ async def on_startup() -> None:
     startup()
 
 
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    """Close shared provider HTTP connections."""
+    from modules.agents.http_client import close_http_pool
+
+    await close_http_pool()
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,11 +1,17 @@
 """API routes for file-based agents."""
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
 
 from agents.agent_loader import get_loader
 from agents.general_codes.ai_model_selector import list_available_models, get_model_info
+from agents.general_codes.budget_governor import get_budget_governor
+from agents.general_codes.cost_tracker import get_cost_tracker
+from agents.general_codes.llm_metrics import collect_llm_metrics
+
+from .streaming import STREAM_FORMATS, stream_response
 
 
 router = APIRouter(prefix="/agents", tags=["agents"])
@@ -123,6 +129,44 @@ async def process_with_agent(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/{agent_id}/stream")
+async def stream_with_agent(
+    agent_id: str,
+    request: AgentRequest,
+    format: str = "ndjson"
+) -> StreamingResponse:
+    """
+    Process input with a specific agent, streaming output as it is generated.
+
+    Events are {"type": "delta", "text": ...} per chunk, then
+    {"type": "result", "data": ...}, or {"type": "error", "error": ...} if
+    the call fails after the stream has started.
+
+    Args:
+        agent_id: Agent identifier
+        request: Request with input text and optional model/provider
+        format: "ndjson" (one JSON event per line) or "sse" (Server-Sent Events)
+
+    Returns:
+        Streaming response of events
+    """
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown stream format: {format}")
+
+    model_to_use = request.model or request.provider
+    try:
+        agent = get_loader().load_agent(
+            agent_id=agent_id,
+            provider=request.provider if not request.model else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return stream_response(agent.process_stream(input_data=request.input, model=model_to_use), format)
+
+
 @router.get("/{agent_id}/info")
 async def get_detailed_info(agent_id: str):
     """
@@ -193,3 +237,33 @@ async def get_model_details(model_name: str):
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/metrics/llm")
+async def get_llm_metrics():
+    """
+    Get runtime metrics for LLM provider calls.
+
+    Returns:
+        Stats of each component that governs provider calls
+    """
+    return {
+        "success": True,
+        "metrics": collect_llm_metrics()
+    }
+
+
+@router.get("/metrics/costs")
+async def get_cost_metrics():
+    """
+    Get token usage and cost of LLM calls, and spend against budgets.
+
+    Returns:
+        Totals per agent, model and workflow, the most recent calls, and
+        rolling-window spend and level per budget
+    """
+    return {
+        "success": True,
+        "costs": get_cost_tracker().stats(),
+        "budgets": get_budget_governor().stats()
+    }
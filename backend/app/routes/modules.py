@@ -2,11 +2,14 @@
 
 from typing import Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, Body
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from modules.registry import registry
 from modules.router import router as module_router
 
+from .streaming import STREAM_FORMATS, stream_response
+
 
 # Request/Response Models
 class ChatRequest(BaseModel):
@@ -108,6 +111,46 @@ async def process_with_module(
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
 
 
+@modules_router.post("/{module_name}/stream")
+async def stream_with_module(
+    module_name: str,
+    request: ModuleProcessRequest,
+    format: str = "ndjson"
+) -> StreamingResponse:
+    """
+    Process input with a streaming-capable module (e.g. ai_chat).
+
+    Args:
+        module_name: Name of the module to use
+        request: Request data
+        format: "ndjson" (one JSON event per line) or "sse" (Server-Sent Events)
+
+    Returns:
+        Streaming response of the module's events
+
+    Raises:
+        HTTPException: If module not found or does not support streaming
+    """
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown stream format: {format}")
+
+    try:
+        module = registry.get_module(module_name)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    if not hasattr(module, "process_stream"):
+        raise HTTPException(status_code=400, detail=f"Module {module_name} does not support streaming")
+
+    input_data = {
+        "text": request.text,
+        "user_id": request.user_id,
+        "params": request.params or {}
+    }
+
+    return stream_response(module.process_stream(input_data), format)
+
+
 @modules_router.post("/chat")
 async def chat(request: ChatRequest) -> Dict[str, Any]:
     """
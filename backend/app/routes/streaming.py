@@ -0,0 +1,48 @@
+"""Streaming response helpers (NDJSON and Server-Sent Events)."""
+
+from typing import Any, AsyncIterator, Dict
+import json
+
+from fastapi.responses import StreamingResponse
+
+
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream"
+}
+
+
+async def encode_stream_events(
+    events: AsyncIterator[Dict[str, Any]],
+    format: str = "ndjson"
+) -> AsyncIterator[str]:
+    """
+    Encode stream events as NDJSON lines or SSE messages.
+
+    Errors raised by the event source become a final error event, since the
+    response status has already been sent.
+    """
+    def encode(event: Dict[str, Any]) -> str:
+        data = json.dumps(event, ensure_ascii=False)
+        if format == "sse":
+            return f"event: {event['type']}\ndata: {data}\n\n"
+        return data + "\n"
+
+    try:
+        async for event in events:
+            yield encode(event)
+    except Exception as e:
+        yield encode({"type": "error", "error": str(e)})
+    finally:
+        await events.aclose()
+
+
+def stream_response(events: AsyncIterator[Dict[str, Any]], format: str = "ndjson") -> StreamingResponse:
+    """
+    Build a streaming response for events.
+
+    Args:
+        events: Async iterator of event dicts, each with a "type" key
+        format: "ndjson" or "sse"
+    """
+    return StreamingResponse(encode_stream_events(events, format), media_type=STREAM_FORMATS[format])
@@ -4,6 +4,7 @@ import uuid
 from typing import Dict, List, Any
 from datetime import datetime
 from runners.base import ExecutionContext, BaseNodeRunner
+from agents.general_codes.cost_tracker import attribute, get_cost_tracker
 from registry import registry
 import importlib
 
@@ -43,7 +44,14 @@ class ExecutionEngine:
         return execution_id
 
     async def _run_graph(self, workflow: Dict[str, Any], context: ExecutionContext):
-        """Internal method to run the graph (Topological Sort + Execution)."""
+        """Internal method to run the graph, profiling its LLM calls."""
+        workflow_id = workflow.get("id") or "workflow"
+        with attribute(workflow=workflow_id), get_cost_tracker().profile(workflow_id) as profile:
+            context.profile = profile
+            await self._run_graph_nodes(workflow, context)
+
+    async def _run_graph_nodes(self, workflow: Dict[str, Any], context: ExecutionContext):
+        """Run the graph (Topological Sort + Execution)."""
         try:
             nodes = {n["id"]: n for n in workflow["nodes"]}
             edges = workflow["edges"]
@@ -1,9 +1,59 @@
 """Base AI agent class with structured output support."""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, Type
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Type
 from pydantic import BaseModel
 import json
+import re
+import weakref
+
+from .schema_renderer import default_schema_format, render_schema
+from .usage import report_openai_usage
+
+
+# Schemas and prompt fragments keyed by response model class. Weak keys let
+# dynamically created models be collected once their agent is reloaded.
+_SCHEMA_CACHE: "weakref.WeakKeyDictionary[type, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+_SCHEMA_PROMPT_CACHE: "weakref.WeakKeyDictionary[type, Dict[str, str]]" = weakref.WeakKeyDictionary()
+_NATIVE_SCHEMA_CACHE: "weakref.WeakKeyDictionary[type, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+# SDK clients keyed by (provider, credentials...). Agents for different
+# models or generation parameters share one client and its connection pool.
+_SHARED_CLIENTS: Dict[tuple, Any] = {}
+
+
+def parse_structured(text: str, response_model: Type[BaseModel]) -> BaseModel:
+    """
+    Parse model output into response_model.
+
+    Tolerates markdown code fences and text around a single JSON object.
+    """
+    try:
+        return response_model(**json.loads(text))
+    except Exception as e:
+        error = e
+
+    # Remove markdown code blocks if present
+    cleaned = text.strip()
+    if cleaned.startswith("```json"):
+        cleaned = cleaned.split("```json")[1].split("```")[0].strip()
+    elif cleaned.startswith("```"):
+        cleaned = cleaned.split("```")[1].split("```")[0].strip()
+
+    try:
+        return response_model(**json.loads(cleaned))
+    except Exception as e:
+        error = e
+
+    # Try to find JSON in the text
+    json_match = re.search(r'\{.*\}', cleaned, re.DOTALL)
+    if json_match:
+        try:
+            return response_model(**json.loads(json_match.group()))
+        except Exception as e:
+            error = e
+
+    raise ValueError(f"Failed to parse structured output: {error}\nResponse: {text}")
 
 
 class BaseAIAgent(ABC):
@@ -14,6 +64,11 @@ class BaseAIAgent(ABC):
     with support for structured output using Pydantic models.
     """
 
+    # Whether generate_structured uses the provider's schema-constrained
+    # decoding by default. The model selector overrides this per call with
+    # the model's supports_native_schema flag via the native_schema kwarg.
+    supports_native_schema: bool = False
+
     def __init__(
         self,
         model_name: str,
@@ -69,14 +124,170 @@ class BaseAIAgent(ABC):
         """
         pass
 
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream a text completion as it is generated.
+
+        Providers without token streaming yield the whole completion as a
+        single chunk.
+
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system instruction
+            **kwargs: Additional provider-specific parameters
+
+        Yields:
+            Text chunks in order
+        """
+        yield await self.generate(prompt, system_prompt=system_prompt, **kwargs)
+
+    async def generate_structured_stream(
+        self,
+        prompt: str,
+        response_model: Type[BaseModel],
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream the raw JSON text of a structured response.
+
+        The schema is embedded in the system prompt; parse the joined
+        chunks with parse_structured.
+
+        Args:
+            prompt: User prompt
+            response_model: Pydantic model class for response structure
+            system_prompt: Optional system instruction
+            **kwargs: Additional provider-specific parameters
+
+        Yields:
+            JSON text chunks in order
+        """
+        schema_str = self._format_schema_for_prompt(response_model, kwargs.pop("schema_format", None))
+        kwargs.pop("native_schema", None)
+
+        structured_system = f"""{system_prompt or "You are a helpful assistant."}
+
+You must respond with valid JSON that matches this schema:
+{schema_str}
+
+IMPORTANT: Return ONLY valid JSON, no additional text."""
+
+        async for chunk in self.generate_stream(prompt, system_prompt=structured_system, **kwargs):
+            yield chunk
+
+    async def _stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        **request: Any
+    ) -> AsyncIterator[str]:
+        """
+        Stream an OpenAI-compatible chat completion (OpenAI, DeepInfra, Groq).
+
+        Usage is reported from the chunk that carries it: the final chunk
+        when ``stream_options.include_usage`` is set, or Groq's ``x_groq``.
+        """
+        stream = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=messages,
+            stream=True,
+            **request
+        )
+        try:
+            async for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    report_openai_usage(chunk)
+                elif getattr(getattr(chunk, "x_groq", None), "usage", None) is not None:
+                    report_openai_usage(chunk.x_groq)
+
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing the response stops generation when the caller stops early
+            await stream.close()
+
+    def _shared_client(self, factory: Callable[[], Any], *credentials: Any) -> Any:
+        """
+        Get the process-wide SDK client for this provider and credentials.
+
+        Args:
+            factory: Creates the client if none exists yet
+            *credentials: Values identifying the account/endpoint (API key, base URL)
+        """
+        key = (self.provider, *credentials)
+        client = _SHARED_CLIENTS.get(key)
+        if client is None:
+            client = factory()
+            _SHARED_CLIENTS[key] = client
+        return client
+
     def _get_schema(self, model: Type[BaseModel]) -> Dict[str, Any]:
-        """Get JSON schema from Pydantic model."""
-        return model.model_json_schema()
+        """Get JSON schema from Pydantic model (cached per model class, do not mutate)."""
+        schema = _SCHEMA_CACHE.get(model)
+        if schema is None:
+            schema = model.model_json_schema()
+            _SCHEMA_CACHE[model] = schema
+        return schema
 
-    def _format_schema_for_prompt(self, model: Type[BaseModel]) -> str:
-        """Format schema as string for prompt injection."""
-        schema = self._get_schema(model)
-        return json.dumps(schema, indent=2)
+    def _format_schema_for_prompt(
+        self,
+        model: Type[BaseModel],
+        schema_format: Optional[str] = None
+    ) -> str:
+        """
+        Format schema as string for prompt injection (cached per model class).
+
+        Args:
+            model: Pydantic model class
+            schema_format: json, compact or typescript (see schema_renderer)
+        """
+        schema_format = schema_format or default_schema_format()
+        fragments = _SCHEMA_PROMPT_CACHE.get(model)
+        if fragments is None:
+            fragments = {}
+            _SCHEMA_PROMPT_CACHE[model] = fragments
+
+        fragment = fragments.get(schema_format)
+        if fragment is None:
+            fragment = render_schema(self._get_schema(model), schema_format)
+            fragments[schema_format] = fragment
+        return fragment
+
+    def _get_native_schema(
+        self,
+        model: Type[BaseModel],
+        kind: str,
+        build: Callable[[Dict[str, Any]], Any]
+    ) -> Any:
+        """
+        Get a provider-native schema for a model (cached per model class).
+
+        Args:
+            model: Pydantic model class
+            kind: Cache key for the native format (e.g. "gemini")
+            build: Converts the JSON schema to the native format
+        """
+        natives = _NATIVE_SCHEMA_CACHE.get(model)
+        if natives is None:
+            natives = {}
+            _NATIVE_SCHEMA_CACHE[model] = natives
+
+        if kind not in natives:
+            natives[kind] = build(self._get_schema(model))
+        return natives[kind]
+
+    def _use_native_schema(self, kwargs: Dict[str, Any]) -> bool:
+        """Pop the per-call native_schema flag, defaulting to the provider capability."""
+        return kwargs.pop("native_schema", self.supports_native_schema)
+
+    def _parse_structured(self, text: str, response_model: Type[BaseModel]) -> BaseModel:
+        """Parse model output into response_model (see parse_structured)."""
+        return parse_structured(text, response_model)
 
     async def generate_with_retry(
         self,
@@ -84,18 +295,24 @@ class BaseAIAgent(ABC):
         max_retries: int = 3,
         **kwargs
     ) -> str:
-        """Generate with automatic retry on failure."""
-        last_error = None
-
-        for attempt in range(max_retries):
-            try:
-                return await self.generate(prompt, **kwargs)
-            except Exception as e:
-                last_error = e
-                if attempt < max_retries - 1:
-                    continue
-
-        raise last_error
+        """
+        Generate with retries under the shared retry policy.
+
+        Transient failures (rate limits, timeouts, 5xx) are retried with
+        jittered exponential backoff and Retry-After; see RetryPolicy.
+
+        Args:
+            prompt: User prompt
+            max_retries: Attempts for transient failures, including the first
+            **kwargs: Passed to generate
+        """
+        from agents.general_codes.retry_policy import get_retry_policy
+
+        return await get_retry_policy().run(
+            lambda: self.generate(prompt, **kwargs),
+            label=self.model_name,
+            max_attempts=max_retries
+        )
 
     def get_info(self) -> Dict[str, Any]:
         """Get agent information."""
@@ -1,12 +1,16 @@
 """DeepInfra AI agent."""
 
 import os
-import json
-from typing import Optional, Type, Dict, Any
+from typing import Optional, Type, Dict, Any, AsyncIterator
 from pydantic import BaseModel
 from openai import AsyncOpenAI
 
 from .base_ai_agent import BaseAIAgent
+from .usage import report_openai_usage
+from .native_schema import openai_response_format
+
+
+DEEPINFRA_BASE_URL = "https://api.deepinfra.com/v1/openai"
 
 
 class DeepInfraAgent(BaseAIAgent):
@@ -32,19 +36,24 @@ class DeepInfraAgent(BaseAIAgent):
         if not self.api_key:
             raise ValueError("DEEPINFRA_API_KEY or DEEPINFRA_TOKEN not found in environment")
 
-        # Initialize DeepInfra client using OpenAI-compatible interface
+        # Shared DeepInfra client using OpenAI-compatible interface
+        self.client = self._shared_client(self._create_client, DEEPINFRA_BASE_URL, self.api_key)
+
+    def _create_client(self) -> AsyncOpenAI:
+        """Create the OpenAI-compatible client for DeepInfra."""
         # Note: We explicitly avoid passing any proxy settings
         try:
-            self.client = AsyncOpenAI(
-                base_url="https://api.deepinfra.com/v1/openai",
+            return AsyncOpenAI(
+                base_url=DEEPINFRA_BASE_URL,
                 api_key=self.api_key,
                 timeout=60.0,
-                max_retries=2
+                # Retries are left to the shared retry policy
+                max_retries=0
             )
         except TypeError:
             # Fallback for older OpenAI client versions
-            self.client = AsyncOpenAI(
-                base_url="https://api.deepinfra.com/v1/openai",
+            return AsyncOpenAI(
+                base_url=DEEPINFRA_BASE_URL,
                 api_key=self.api_key
             )
 
@@ -72,9 +81,35 @@ class DeepInfraAgent(BaseAIAgent):
             temperature=kwargs.get("temperature", self.temperature),
             max_tokens=kwargs.get("max_tokens", self.max_tokens)
         )
+        report_openai_usage(response)
 
         return response.choices[0].message.content
 
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream text completion with DeepInfra."""
+
+        messages = []
+
+        # Add system message
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+
+        # Add user message
+        messages.append({"role": "user", "content": prompt})
+
+        async for chunk in self._stream_chat_completion(
+            messages,
+            temperature=kwargs.get("temperature", self.temperature),
+            max_tokens=kwargs.get("max_tokens", self.max_tokens),
+            stream_options={"include_usage": True}
+        ):
+            yield chunk
+
     async def generate_structured(
         self,
         prompt: str,
@@ -82,14 +117,24 @@ class DeepInfraAgent(BaseAIAgent):
         system_prompt: Optional[str] = None,
         **kwargs
     ) -> BaseModel:
-        """Generate structured output using prompt engineering."""
+        """
+        Generate structured output.
 
-        # Get schema
-        schema = self._get_schema(response_model)
-        schema_str = json.dumps(schema, indent=2)
+        Uses prompt engineering by default since not all DeepInfra models
+        support ``response_format``; models flagged with native schema
+        support get an OpenAI-compatible json_schema response format.
+        """
+        schema_format = kwargs.pop("schema_format", None)
+        native = self._use_native_schema(kwargs)
 
-        # Create structured prompt
-        structured_system = f"""{system_prompt or "You are a helpful assistant."}
+        if native:
+            structured_system = system_prompt or "You are a helpful assistant."
+        else:
+            # Get schema
+            schema_str = self._format_schema_for_prompt(response_model, schema_format)
+
+            # Create structured prompt
+            structured_system = f"""{system_prompt or "You are a helpful assistant."}
 
 You must respond with valid JSON that matches this schema:
 {schema_str}
@@ -101,30 +146,24 @@ IMPORTANT: Return ONLY valid JSON, no additional text."""
             {"role": "user", "content": prompt}
         ]
 
-        # Generate without JSON mode (not all DeepInfra models support it)
-        response = await self.client.chat.completions.create(
-            model=self.model_name,
-            messages=messages,
-            temperature=kwargs.get("temperature", self.temperature),
-            max_tokens=kwargs.get("max_tokens", self.max_tokens)
-        )
+        request = {
+            "model": self.model_name,
+            "messages": messages,
+            "temperature": kwargs.get("temperature", self.temperature),
+            "max_tokens": kwargs.get("max_tokens", self.max_tokens)
+        }
+        if native:
+            request["response_format"] = self._get_native_schema(
+                response_model,
+                "openai",
+                lambda schema: openai_response_format(schema, "response")
+            )
 
-        # Parse and validate
-        content = response.choices[0].message.content
+        response = await self.client.chat.completions.create(**request)
+        report_openai_usage(response)
 
-        try:
-            json_response = json.loads(content)
-            return response_model(**json_response)
-        except Exception as e:
-            # Fallback: try to extract JSON from text
-            text = content.strip()
-            if text.startswith("```json"):
-                text = text.split("```json")[1].split("```")[0].strip()
-            elif text.startswith("```"):
-                text = text.split("```")[1].split("```")[0].strip()
-
-            json_response = json.loads(text)
-            return response_model(**json_response)
+        # Parse and validate
+        return self._parse_structured(response.choices[0].message.content, response_model)
 
     def get_info(self) -> Dict[str, Any]:
         """Get DeepInfra agent info."""
@@ -132,4 +171,5 @@ IMPORTANT: Return ONLY valid JSON, no additional text."""
         info["provider"] = "deepinfra"
         info["supports_structured"] = True
         info["supports_json_mode"] = False  # Model doesn't support response_format json_object
+        info["supports_native_schema"] = self.supports_native_schema
         return info
@@ -1,12 +1,13 @@
 """Google Gemini AI agent."""
 
 import os
-import json
-from typing import Optional, Type, Dict, Any
+from typing import Optional, Type, Dict, Any, AsyncIterator
 from pydantic import BaseModel
 import google.generativeai as genai
 
 from .base_ai_agent import BaseAIAgent
+from .native_schema import gemini_response_schema
+from .usage import report_usage
 
 
 class GeminiAgent(BaseAIAgent):
@@ -14,8 +15,12 @@ class GeminiAgent(BaseAIAgent):
     Google Gemini AI agent with structured output support.
 
     Supports models: gemini-2.0-flash-exp, gemini-1.5-pro, gemini-1.5-flash
+
+    Uses the SDK's async API so requests never block the event loop.
     """
 
+    supports_native_schema = True
+
     def __init__(
         self,
         model_name: str = "gemini-2.0-flash-exp",
@@ -49,7 +54,7 @@ class GeminiAgent(BaseAIAgent):
             full_prompt = f"{system_prompt}\n\nUser: {prompt}"
 
         # Generate
-        response = self.model.generate_content(
+        response = await self.model.generate_content_async(
             full_prompt,
             generation_config=genai.GenerationConfig(
                 temperature=kwargs.get("temperature", self.temperature),
@@ -57,8 +62,46 @@ class GeminiAgent(BaseAIAgent):
             )
         )
 
+        self._report_usage(response)
         return response.text
 
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream text completion with Gemini."""
+
+        # Combine system and user prompts
+        full_prompt = prompt
+        if system_prompt:
+            full_prompt = f"{system_prompt}\n\nUser: {prompt}"
+
+        response = await self.model.generate_content_async(
+            full_prompt,
+            generation_config=genai.GenerationConfig(
+                temperature=kwargs.get("temperature", self.temperature),
+                max_output_tokens=kwargs.get("max_tokens", self.max_tokens),
+            ),
+            stream=True
+        )
+
+        last = None
+        async for chunk in response:
+            last = chunk
+            # Chunks without text parts (e.g. only a finish reason) raise on .text
+            try:
+                text = chunk.text
+            except ValueError:
+                continue
+            if text:
+                yield text
+
+        # Usage metadata is cumulative; the last chunk has the totals
+        if last is not None:
+            self._report_usage(last)
+
     async def generate_structured(
         self,
         prompt: str,
@@ -66,14 +109,26 @@ class GeminiAgent(BaseAIAgent):
         system_prompt: Optional[str] = None,
         **kwargs
     ) -> BaseModel:
-        """Generate structured output using Gemini's JSON mode."""
-
-        # Get schema
-        schema = self._get_schema(response_model)
-
-        # Create prompt with schema
-        schema_str = json.dumps(schema, indent=2)
-        structured_prompt = f"""{system_prompt or "You are a helpful assistant."}
+        """
+        Generate structured output using Gemini's JSON mode.
+
+        With native schemas enabled and a schema Gemini can express, the
+        schema is sent as ``response_schema`` for constrained decoding
+        instead of being embedded in the prompt.
+        """
+        schema_format = kwargs.pop("schema_format", None)
+        response_schema = None
+        if self._use_native_schema(kwargs):
+            response_schema = self._get_native_schema(response_model, "gemini", gemini_response_schema)
+
+        if response_schema is not None:
+            structured_prompt = f"""{system_prompt or "You are a helpful assistant."}
+
+User request: {prompt}"""
+        else:
+            # Get schema
+            schema_str = self._format_schema_for_prompt(response_model, schema_format)
+            structured_prompt = f"""{system_prompt or "You are a helpful assistant."}
 
 Generate a JSON response that matches this schema:
 {schema_str}
@@ -82,30 +137,36 @@ User request: {prompt}
 
 Respond ONLY with valid JSON matching the schema above."""
 
+        generation_config = {
+            "temperature": kwargs.get("temperature", self.temperature),
+            "max_output_tokens": kwargs.get("max_tokens", self.max_tokens),
+            "response_mime_type": "application/json"
+        }
+        if response_schema is not None:
+            generation_config["response_schema"] = response_schema
+
         # Generate with JSON mode
-        response = self.model.generate_content(
+        response = await self.model.generate_content_async(
             structured_prompt,
-            generation_config=genai.GenerationConfig(
-                temperature=kwargs.get("temperature", self.temperature),
-                max_output_tokens=kwargs.get("max_tokens", self.max_tokens),
-                response_mime_type="application/json"
-            )
+            generation_config=genai.GenerationConfig(**generation_config)
         )
 
+        self._report_usage(response)
+
         # Parse and validate
-        try:
-            json_response = json.loads(response.text)
-            return response_model(**json_response)
-        except Exception as e:
-            # Fallback: try to extract JSON from text
-            text = response.text.strip()
-            if text.startswith("```json"):
-                text = text.split("```json")[1].split("```")[0].strip()
-            elif text.startswith("```"):
-                text = text.split("```")[1].split("```")[0].strip()
-
-            json_response = json.loads(text)
-            return response_model(**json_response)
+        return self._parse_structured(response.text, response_model)
+
+    @staticmethod
+    def _report_usage(response):
+        """Report token usage from Gemini usage metadata."""
+        metadata = getattr(response, "usage_metadata", None)
+        if metadata is None:
+            return
+        report_usage(
+            metadata.prompt_token_count,
+            metadata.candidates_token_count,
+            getattr(metadata, "cached_content_token_count", 0)
+        )
 
     def get_info(self) -> Dict[str, Any]:
         """Get Gemini agent info."""
@@ -113,4 +174,5 @@ Respond ONLY with valid JSON matching the schema above."""
         info["provider"] = "gemini"
         info["supports_structured"] = True
         info["supports_json_mode"] = True
+        info["supports_native_schema"] = self.supports_native_schema
         return info
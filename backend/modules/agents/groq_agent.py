@@ -1,12 +1,12 @@
 """Groq AI agent."""
 
 import os
-import json
-from typing import Optional, Type, Dict, Any
+from typing import Optional, Type, Dict, Any, AsyncIterator
 from pydantic import BaseModel
 from groq import AsyncGroq
 
 from .base_ai_agent import BaseAIAgent
+from .usage import report_openai_usage
 
 
 class GroqAgent(BaseAIAgent):
@@ -31,8 +31,9 @@ class GroqAgent(BaseAIAgent):
         if not self.api_key:
             raise ValueError("GROQ_API_KEY not found in environment")
 
-        # Initialize Groq client
-        self.client = AsyncGroq(api_key=self.api_key)
+        # Shared Groq client (one connection pool per API key). Retries are
+        # left to the shared retry policy so they are not multiplied.
+        self.client = self._shared_client(lambda: AsyncGroq(api_key=self.api_key, max_retries=0), self.api_key)
 
     async def generate(
         self,
@@ -58,9 +59,34 @@ class GroqAgent(BaseAIAgent):
             temperature=kwargs.get("temperature", self.temperature),
             max_tokens=kwargs.get("max_tokens", self.max_tokens)
         )
+        report_openai_usage(response)
 
         return response.choices[0].message.content
 
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream text completion with Groq."""
+
+        messages = []
+
+        # Add system message
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+
+        # Add user message
+        messages.append({"role": "user", "content": prompt})
+
+        async for chunk in self._stream_chat_completion(
+            messages,
+            temperature=kwargs.get("temperature", self.temperature),
+            max_tokens=kwargs.get("max_tokens", self.max_tokens)
+        ):
+            yield chunk
+
     async def generate_structured(
         self,
         prompt: str,
@@ -71,8 +97,7 @@ class GroqAgent(BaseAIAgent):
         """Generate structured output using JSON mode."""
 
         # Get schema
-        schema = self._get_schema(response_model)
-        schema_str = json.dumps(schema, indent=2)
+        schema_str = self._format_schema_for_prompt(response_model, kwargs.pop("schema_format", None))
 
         # Create structured prompt
         structured_system = f"""{system_prompt or "You are a helpful assistant."}
@@ -93,23 +118,10 @@ You must respond with valid JSON that matches this schema:
             max_tokens=kwargs.get("max_tokens", self.max_tokens),
             response_format={"type": "json_object"}
         )
+        report_openai_usage(response)
 
         # Parse and validate
-        content = response.choices[0].message.content
-
-        try:
-            json_response = json.loads(content)
-            return response_model(**json_response)
-        except Exception as e:
-            # Fallback: try to extract JSON
-            text = content.strip()
-            if text.startswith("```json"):
-                text = text.split("```json")[1].split("```")[0].strip()
-            elif text.startswith("```"):
-                text = text.split("```")[1].split("```")[0].strip()
-
-            json_response = json.loads(text)
-            return response_model(**json_response)
+        return self._parse_structured(response.choices[0].message.content, response_model)
 
     def get_info(self) -> Dict[str, Any]:
         """Get Groq agent info."""
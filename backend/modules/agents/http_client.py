@@ -0,0 +1,118 @@
+"""Shared keep-alive HTTP sessions for HTTP-native AI providers."""
+
+import asyncio
+import os
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+
+class HTTPClientPool:
+    """
+    Pool of aiohttp sessions, one per (event loop, host).
+
+    Each session owns a keep-alive TCPConnector limited to a configurable
+    number of connections for its host, so providers reuse connections
+    instead of opening a new one per request.
+    """
+
+    def __init__(
+        self,
+        limit_per_host: Optional[int] = None,
+        keepalive_timeout: Optional[float] = None,
+        request_timeout: Optional[float] = None
+    ):
+        """
+        Initialize pool.
+
+        Args:
+            limit_per_host: Default max connections per host
+                (defaults to PROVIDER_HTTP_LIMIT_PER_HOST or 32)
+            keepalive_timeout: Seconds to keep idle connections open
+                (defaults to PROVIDER_HTTP_KEEPALIVE or 30)
+            request_timeout: Default total request timeout in seconds
+                (defaults to PROVIDER_HTTP_TIMEOUT or 120)
+        """
+        self.limit_per_host = limit_per_host or int(os.getenv("PROVIDER_HTTP_LIMIT_PER_HOST", "32"))
+        self.keepalive_timeout = keepalive_timeout or float(os.getenv("PROVIDER_HTTP_KEEPALIVE", "30"))
+        self.request_timeout = request_timeout or float(os.getenv("PROVIDER_HTTP_TIMEOUT", "120"))
+        self._host_limits: Dict[str, int] = {}
+        self._sessions: Dict[Tuple[int, str], Tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession]] = {}
+
+    @staticmethod
+    def _host_key(base_url: str) -> str:
+        parts = urlsplit(base_url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def set_host_limit(self, base_url: str, limit: int):
+        """Set the connection limit for one host (applies to sessions created afterwards)."""
+        self._host_limits[self._host_key(base_url)] = limit
+
+    def session(self, base_url: str) -> aiohttp.ClientSession:
+        """
+        Get the shared session for a host on the running event loop.
+
+        Args:
+            base_url: Any URL on the host (scheme and netloc are used)
+
+        Returns:
+            aiohttp.ClientSession (do not close it; use close())
+        """
+        loop = asyncio.get_running_loop()
+        host = self._host_key(base_url)
+        key = (id(loop), host)
+
+        entry = self._sessions.get(key)
+        if entry and entry[0] is loop and not entry[1].closed:
+            return entry[1]
+
+        connector = aiohttp.TCPConnector(
+            limit=self._host_limits.get(host, self.limit_per_host),
+            keepalive_timeout=self.keepalive_timeout
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+        )
+        self._sessions[key] = (loop, session)
+        return session
+
+    async def close(self):
+        """Close all sessions that belong to the running event loop and drop stale ones."""
+        loop = asyncio.get_running_loop()
+        for key, (session_loop, session) in list(self._sessions.items()):
+            if session_loop is loop:
+                await session.close()
+                del self._sessions[key]
+            elif session_loop.is_closed():
+                del self._sessions[key]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Get open session count and connection limit per host."""
+        stats: Dict[str, Dict[str, int]] = {}
+        for (_, host), (_, session) in self._sessions.items():
+            if session.closed:
+                continue
+            entry = stats.setdefault(host, {"sessions": 0, "limit": 0})
+            entry["sessions"] += 1
+            entry["limit"] = session.connector.limit
+        return stats
+
+
+# Global pool instance
+_http_pool = None
+
+
+def get_http_pool() -> HTTPClientPool:
+    """Get or create the global HTTP client pool."""
+    global _http_pool
+    if _http_pool is None:
+        _http_pool = HTTPClientPool()
+    return _http_pool
+
+
+async def close_http_pool():
+    """Close the global pool's sessions (call on application shutdown)."""
+    if _http_pool is not None:
+        await _http_pool.close()
@@ -0,0 +1,308 @@
+"""
+Deterministic mock AI agent for offline load and latency testing.
+
+Responses are derived from a hash of the model, prompts and seed, so the
+same request always gets the same answer. Structured responses are sampled
+from the response model's JSON schema and are always valid. Latency, 5xx
+errors and 429 rate limits are injected from a seeded random sequence.
+
+Settings (environment):
+    MOCK_LLM_SEED             seed for content, latency and faults (0)
+    MOCK_LLM_LATENCY          latency per call in seconds: "fixed:0.2",
+                              "uniform:0.1,0.5", "normal:0.4,0.1" or
+                              "lognormal:-1.0,0.5" (mu, sigma of the
+                              underlying normal) (fixed:0)
+    MOCK_LLM_CHUNK_DELAY      seconds between streamed chunks (0)
+    MOCK_LLM_ERROR_RATE       fraction of calls failing with HTTP 503 (0)
+    MOCK_LLM_RATE_LIMIT_RATE  fraction of calls failing with HTTP 429 (0)
+    MOCK_LLM_RPM              requests per minute above which every call
+                              gets a 429, like a provider quota (unlimited)
+    MOCK_LLM_RETRY_AFTER      Retry-After seconds of injected 429s (1)
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Type
+from pydantic import BaseModel
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+
+from .base_ai_agent import BaseAIAgent
+from .token_estimator import estimate_tokens
+from .usage import report_usage
+
+
+_WORDS = (
+    "market", "signal", "report", "update", "growth", "launch", "policy", "team",
+    "result", "review", "forecast", "change", "energy", "quarter", "partner", "study"
+)
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+
+class MockProviderError(Exception):
+    """HTTP-style failure injected by the mock provider."""
+
+    def __init__(self, status_code: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def seeded_random(*parts: Any) -> random.Random:
+    """Get a random generator seeded from a hash of ``parts``."""
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def sample_from_schema(
+    schema: Dict[str, Any],
+    rng: random.Random,
+    name: str = "value",
+    defs: Optional[Dict[str, Any]] = None
+) -> Any:
+    """
+    Generate a value that is valid for a JSON schema.
+
+    Supports the subset produced by Pydantic and structure_output.json:
+    objects, arrays, scalars, enums, consts, ``$ref`` and ``anyOf``/``oneOf``.
+    Numbers default to the range 0-1 (scores and confidences).
+
+    Args:
+        schema: JSON schema
+        rng: Random generator (seed it for deterministic output)
+        name: Property name, used in generated strings
+        defs: ``$defs`` of the root schema (taken from schema when omitted)
+    """
+    if defs is None:
+        defs = schema.get("$defs") or schema.get("definitions") or {}
+
+    if "$ref" in schema:
+        return sample_from_schema(defs.get(schema["$ref"].split("/")[-1], {}), rng, name, defs)
+    if "const" in schema:
+        return schema["const"]
+    if schema.get("enum"):
+        return rng.choice(schema["enum"])
+    for key in ("anyOf", "oneOf", "allOf"):
+        if schema.get(key):
+            options = [option for option in schema[key] if option.get("type") != "null"] or schema[key]
+            return sample_from_schema(options[0], rng, name, defs)
+
+    schema_type = schema.get("type")
+    if isinstance(schema_type, list):
+        schema_type = next((item for item in schema_type if item != "null"), "null")
+    if schema_type is None:
+        schema_type = "object" if "properties" in schema else "string"
+
+    if schema_type == "object":
+        return {
+            key: sample_from_schema(property_schema, rng, key, defs)
+            for key, property_schema in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        low = schema.get("minItems", 1)
+        high = max(low, min(schema.get("maxItems", 3), 3))
+        return [sample_from_schema(schema.get("items", {}), rng, name, defs) for _ in range(rng.randint(low, high))]
+    if schema_type == "integer":
+        return rng.randint(int(schema.get("minimum", 0)), int(schema.get("maximum", 100)))
+    if schema_type == "number":
+        return round(rng.uniform(schema.get("minimum", 0.0), schema.get("maximum", 1.0)), 3)
+    if schema_type == "boolean":
+        return rng.random() < 0.5
+    if schema_type == "null":
+        return None
+
+    text = f"{name} {rng.choice(_WORDS)} {rng.randint(1, 999)}"
+    if schema.get("maxLength"):
+        text = text[:schema["maxLength"]]
+    return text.ljust(schema.get("minLength", 0), "x")
+
+
+def sample_text(rng: random.Random, max_tokens: int) -> str:
+    """Generate deterministic filler text of up to ~max_tokens tokens."""
+    count = rng.randint(min(8, max_tokens), max(8, min(max_tokens, 120)))
+    return "Mock response: " + " ".join(rng.choice(_WORDS) for _ in range(count)) + "."
+
+
+@dataclass
+class MockBehavior:
+    """Latency distribution and fault injection of a mock endpoint."""
+
+    seed: int = 0
+    latency: str = "fixed:0"
+    chunk_delay: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    rpm: Optional[int] = None
+    retry_after: float = 1.0
+    _recent: Deque[float] = field(default_factory=deque, init=False, repr=False)
+
+    def __post_init__(self):
+        kind, _, params = self.latency.partition(":")
+        if kind not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown mock latency distribution: {self.latency}")
+        self._kind = kind
+        self._params = [float(value) for value in params.split(",") if value.strip()] or [0.0]
+        self.rng = random.Random(self.seed)
+
+    @classmethod
+    def from_env(cls) -> "MockBehavior":
+        """Build the behavior from MOCK_LLM_* settings."""
+        rpm = os.getenv("MOCK_LLM_RPM")
+        return cls(
+            seed=int(os.getenv("MOCK_LLM_SEED", "0")),
+            latency=os.getenv("MOCK_LLM_LATENCY", "fixed:0"),
+            chunk_delay=float(os.getenv("MOCK_LLM_CHUNK_DELAY", "0")),
+            error_rate=float(os.getenv("MOCK_LLM_ERROR_RATE", "0")),
+            rate_limit_rate=float(os.getenv("MOCK_LLM_RATE_LIMIT_RATE", "0")),
+            rpm=int(rpm) if rpm else None,
+            retry_after=float(os.getenv("MOCK_LLM_RETRY_AFTER", "1"))
+        )
+
+    def sample_latency(self) -> float:
+        """Draw the next call's latency in seconds."""
+        params = self._params
+        if self._kind == "uniform":
+            value = self.rng.uniform(params[0], params[1] if len(params) > 1 else params[0])
+        elif self._kind == "normal":
+            value = self.rng.gauss(params[0], params[1] if len(params) > 1 else 0.0)
+        elif self._kind == "lognormal":
+            value = self.rng.lognormvariate(params[0], params[1] if len(params) > 1 else 0.0)
+        else:
+            value = params[0]
+        return max(0.0, value)
+
+    def fault(self) -> Optional[MockProviderError]:
+        """Draw whether the next call fails; None if it succeeds."""
+        if self.rpm:
+            now = time.monotonic()
+            while self._recent and self._recent[0] <= now - 60:
+                self._recent.popleft()
+            if len(self._recent) >= self.rpm:
+                wait = self._recent[0] + 60 - now
+                return MockProviderError(429, "Mock quota exceeded", {"retry-after": f"{wait:.3f}"})
+            self._recent.append(now)
+
+        draw = self.rng.random()
+        if draw < self.rate_limit_rate:
+            return MockProviderError(429, "Mock rate limit", {"retry-after": str(self.retry_after)})
+        if draw < self.rate_limit_rate + self.error_rate:
+            return MockProviderError(503, "Mock server error")
+        return None
+
+    async def simulate(self):
+        """Wait out the call's latency, then raise an injected fault if drawn."""
+        latency = self.sample_latency()
+        error = self.fault()
+        if latency:
+            await asyncio.sleep(latency)
+        if error is not None:
+            raise error
+
+
+class MockAgent(BaseAIAgent):
+    """
+    Mock AI agent with deterministic, schema-valid responses.
+
+    Needs no API key or network; see the module docstring for settings.
+    """
+
+    supports_native_schema = True
+
+    def __init__(
+        self,
+        model_name: str = "mock",
+        api_key: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        behavior: Optional[MockBehavior] = None
+    ):
+        super().__init__(model_name, api_key, temperature, max_tokens)
+        self.behavior = behavior or MockBehavior.from_env()
+        self.calls = 0
+
+    async def _simulate(self):
+        self.calls += 1
+        await self.behavior.simulate()
+
+    def _rng(self, *parts: Any) -> random.Random:
+        return seeded_random(self.behavior.seed, self.model_name, *parts)
+
+    def _report(self, prompt: str, system_prompt: Optional[str], text: str):
+        report_usage(estimate_tokens(f"{system_prompt or ''}\n{prompt}"), estimate_tokens(text))
+
+    def _structured_text(self, prompt: str, response_model: Type[BaseModel], system_prompt: Optional[str]) -> str:
+        schema = self._get_schema(response_model)
+        return json.dumps(sample_from_schema(schema, self._rng(system_prompt, prompt, schema)))
+
+    async def _chunks(self, text: str, size: int) -> AsyncIterator[str]:
+        for start in range(0, len(text), size):
+            if start and self.behavior.chunk_delay:
+                await asyncio.sleep(self.behavior.chunk_delay)
+            yield text[start:start + size]
+
+    async def generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """Generate deterministic filler text."""
+        await self._simulate()
+        text = sample_text(self._rng(system_prompt, prompt), kwargs.get("max_tokens", self.max_tokens))
+        self._report(prompt, system_prompt, text)
+        return text
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream deterministic filler text (latency applies before the first chunk)."""
+        await self._simulate()
+        text = sample_text(self._rng(system_prompt, prompt), kwargs.get("max_tokens", self.max_tokens))
+        async for chunk in self._chunks(text, 12):
+            yield chunk
+        self._report(prompt, system_prompt, text)
+
+    async def generate_structured(
+        self,
+        prompt: str,
+        response_model: Type[BaseModel],
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> BaseModel:
+        """Generate a response sampled from the response model's schema."""
+        await self._simulate()
+        text = self._structured_text(prompt, response_model, system_prompt)
+        self._report(prompt, system_prompt, text)
+        return self._parse_structured(text, response_model)
+
+    async def generate_structured_stream(
+        self,
+        prompt: str,
+        response_model: Type[BaseModel],
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream the JSON text of a response sampled from the schema."""
+        await self._simulate()
+        text = self._structured_text(prompt, response_model, system_prompt)
+        async for chunk in self._chunks(text, 16):
+            yield chunk
+        self._report(prompt, system_prompt, text)
+
+    def get_info(self) -> Dict[str, Any]:
+        """Get mock agent info."""
+        info = super().get_info()
+        info["provider"] = "mock"
+        info["supports_structured"] = True
+        info["local"] = True
+        info["cost"] = "free"
+        info["latency"] = self.behavior.latency
+        return info
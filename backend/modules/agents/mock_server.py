@@ -0,0 +1,199 @@
+"""
+Local HTTP stand-in for LLM provider APIs, backed by the mock agent.
+
+Serves the OpenAI-compatible chat completions API and Ollama's generate
+API, so the real provider classes and their HTTP clients can be load
+tested offline:
+
+    python -m modules.agents.mock_server --port 8089
+    export OPENAI_BASE_URL=http://localhost:8089/v1 OPENAI_API_KEY=mock
+    export OLLAMA_BASE_URL=http://localhost:8089
+
+Latency, errors and 429s follow the MOCK_LLM_* settings (see mock_agent).
+Structured responses follow the request's schema: OpenAI json_schema
+``response_format``, Ollama ``format``, or else the first JSON schema
+embedded in the prompt.
+"""
+
+from typing import Any, AsyncIterator, Dict, Optional
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from .mock_agent import MockBehavior, MockProviderError, sample_from_schema, sample_text, seeded_random
+from .token_estimator import estimate_tokens
+
+
+def _embedded_schema(text: str) -> Optional[Dict[str, Any]]:
+    """Find the first JSON object with "properties" in a prompt."""
+    decoder = json.JSONDecoder()
+    position = text.find("{")
+    while position != -1:
+        try:
+            value, _ = decoder.raw_decode(text, position)
+        except ValueError:
+            value = None
+        if isinstance(value, dict) and "properties" in value:
+            return value
+        position = text.find("{", position + 1)
+    return None
+
+
+def _respond(
+    behavior: MockBehavior,
+    model: str,
+    prompt_text: str,
+    schema: Optional[Dict[str, Any]],
+    json_mode: bool,
+    max_tokens: int
+) -> str:
+    rng = seeded_random(behavior.seed, model, prompt_text)
+    if schema is None and json_mode:
+        schema = _embedded_schema(prompt_text)
+    if schema is not None:
+        return json.dumps(sample_from_schema(schema, rng))
+    if json_mode:
+        return "{}"
+    return sample_text(rng, max_tokens)
+
+
+def _chunks(text: str, size: int = 12):
+    return [text[start:start + size] for start in range(0, len(text), size)] or [""]
+
+
+def create_app(behavior: Optional[MockBehavior] = None) -> FastAPI:
+    """
+    Create the mock provider app.
+
+    Args:
+        behavior: Latency and fault injection (defaults to MOCK_LLM_* settings)
+    """
+    behavior = behavior or MockBehavior.from_env()
+    app = FastAPI(title="Mock LLM provider")
+
+    async def simulate(error_body) -> Optional[JSONResponse]:
+        try:
+            await behavior.simulate()
+        except MockProviderError as e:
+            return JSONResponse(error_body(e), status_code=e.status_code, headers=e.headers)
+        return None
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        error = await simulate(lambda e: {"error": {"message": str(e), "type": "mock_error", "code": e.status_code}})
+        if error is not None:
+            return error
+
+        prompt_text = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        response_format = body.get("response_format") or {}
+        schema = None
+        if response_format.get("type") == "json_schema":
+            schema = response_format.get("json_schema", {}).get("schema")
+        text = _respond(
+            behavior,
+            body.get("model", "mock"),
+            prompt_text,
+            schema,
+            bool(response_format) or "JSON" in prompt_text,
+            body.get("max_tokens") or 1024
+        )
+
+        usage = {
+            "prompt_tokens": estimate_tokens(prompt_text),
+            "completion_tokens": estimate_tokens(text)
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        base = {
+            "id": f"chatcmpl-mock-{seeded_random(prompt_text).getrandbits(32):08x}",
+            "created": int(time.time()),
+            "model": body.get("model", "mock")
+        }
+
+        if not body.get("stream"):
+            return {
+                **base,
+                "object": "chat.completion",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            }
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        async def events() -> AsyncIterator[str]:
+            chunk = {**base, "object": "chat.completion.chunk"}
+            for index, piece in enumerate(_chunks(text)):
+                if index and behavior.chunk_delay:
+                    await asyncio.sleep(behavior.chunk_delay)
+                delta = {"content": piece} if index else {"role": "assistant", "content": piece}
+                yield f"data: {json.dumps({**chunk, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]})}\n\n"
+            yield f"data: {json.dumps({**chunk, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})}\n\n"
+            if include_usage:
+                yield f"data: {json.dumps({**chunk, 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/api/generate")
+    async def ollama_generate(request: Request):
+        body = await request.json()
+        error = await simulate(lambda e: {"error": str(e)})
+        if error is not None:
+            return error
+
+        prompt_text = f"{body.get('system') or ''}\n{body.get('prompt', '')}"
+        output_format = body.get("format")
+        text = _respond(
+            behavior,
+            body.get("model", "mock"),
+            prompt_text,
+            output_format if isinstance(output_format, dict) else None,
+            output_format is not None or "JSON" in prompt_text,
+            (body.get("options") or {}).get("num_predict") or 1024
+        )
+        final = {
+            "model": body.get("model", "mock"),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "done": True,
+            "prompt_eval_count": estimate_tokens(prompt_text),
+            "eval_count": estimate_tokens(text)
+        }
+
+        # Ollama streams unless told otherwise
+        if body.get("stream") is False:
+            return {**final, "response": text}
+
+        async def lines() -> AsyncIterator[str]:
+            for index, piece in enumerate(_chunks(text)):
+                if index and behavior.chunk_delay:
+                    await asyncio.sleep(behavior.chunk_delay)
+                yield json.dumps({"model": final["model"], "response": piece, "done": False}) + "\n"
+            yield json.dumps({**final, "response": ""}) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.get("/api/tags")
+    async def ollama_tags():
+        return {"models": [{"name": "mock", "model": "mock"}]}
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the mock LLM provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    args = parser.parse_args()
+
+    print(f"🧪 Mock LLM provider on http://{args.host}:{args.port} (OpenAI /v1, Ollama /api)")
+    uvicorn.run(create_app(), host=args.host, port=args.port)
@@ -0,0 +1,157 @@
+"""Convert Pydantic JSON schemas to provider-native structured-output formats."""
+
+import copy
+from typing import Any, Dict, Optional
+
+
+def inline_refs(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return a copy of schema with local ``$ref`` pointers replaced by their definitions.
+
+    Raises:
+        ValueError: If the schema is recursive
+    """
+    defs = dict(schema.get("$defs", {}))
+    defs.update(schema.get("definitions", {}))
+
+    def resolve(node: Any, stack: tuple) -> Any:
+        if isinstance(node, list):
+            return [resolve(item, stack) for item in node]
+        if not isinstance(node, dict):
+            return node
+
+        if "$ref" in node:
+            name = node["$ref"].rsplit("/", 1)[-1]
+            if name in stack:
+                raise ValueError(f"Recursive schema reference: {name}")
+            resolved = resolve(copy.deepcopy(defs[name]), stack + (name,))
+            # Keep sibling keywords such as description
+            resolved.update({k: v for k, v in node.items() if k != "$ref"})
+            return resolved
+
+        return {
+            key: resolve(value, stack)
+            for key, value in node.items()
+            if key not in ("$defs", "definitions")
+        }
+
+    return resolve(schema, ())
+
+
+def openai_response_format(schema: Dict[str, Any], name: str) -> Dict[str, Any]:
+    """
+    Build an OpenAI ``response_format`` of type json_schema.
+
+    Strict mode is enabled when the schema can be expressed under OpenAI's
+    strict rules (every object closed and fully required); free-form
+    objects fall back to non-strict schema guidance.
+
+    Args:
+        schema: JSON schema from ``model_json_schema()``
+        name: Schema name (letters, digits, underscores and dashes)
+    """
+    strict_schema = _openai_strict(copy.deepcopy(schema))
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "schema": strict_schema if strict_schema is not None else schema,
+            "strict": strict_schema is not None
+        }
+    }
+
+
+def _openai_strict(node: Any) -> Optional[Any]:
+    if isinstance(node, list):
+        items = [_openai_strict(item) for item in node]
+        return None if any(item is None for item in items) else items
+    if not isinstance(node, dict):
+        return node
+
+    node.pop("default", None)
+
+    if node.get("type") == "object":
+        properties = node.get("properties")
+        if not properties:
+            # Free-form objects cannot be expressed in strict mode
+            return None
+        node["additionalProperties"] = False
+        node["required"] = list(properties)
+
+    for key, value in list(node.items()):
+        if key in ("properties", "$defs", "definitions"):
+            converted = {}
+            for name, sub in value.items():
+                sub = _openai_strict(sub)
+                if sub is None:
+                    return None
+                converted[name] = sub
+            node[key] = converted
+        elif isinstance(value, (dict, list)):
+            converted = _openai_strict(value)
+            if converted is None:
+                return None
+            node[key] = converted
+
+    return node
+
+
+_GEMINI_TYPES = ("string", "integer", "number", "boolean", "array", "object")
+
+
+def gemini_response_schema(schema: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Convert a JSON schema to the OpenAPI subset accepted by Gemini ``response_schema``.
+
+    Returns:
+        Schema dict, or None if the schema uses features Gemini cannot
+        express (free-form objects, non-null unions, recursion)
+    """
+    try:
+        return _gemini_node(inline_refs(schema))
+    except ValueError:
+        return None
+
+
+def _gemini_node(node: Dict[str, Any]) -> Dict[str, Any]:
+    nullable = False
+
+    for key in ("anyOf", "oneOf"):
+        if key in node:
+            options = [option for option in node[key] if option.get("type") != "null"]
+            if len(options) != 1:
+                raise ValueError("Unions are not supported")
+            nullable = len(options) != len(node[key])
+            merged = {k: v for k, v in node.items() if k != key}
+            merged.update(options[0])
+            node = merged
+
+    json_type = node.get("type")
+    if json_type not in _GEMINI_TYPES:
+        raise ValueError(f"Unsupported type: {json_type}")
+
+    converted: Dict[str, Any] = {"type": json_type}
+    if node.get("description"):
+        converted["description"] = node["description"]
+    if nullable:
+        converted["nullable"] = True
+
+    if "enum" in node:
+        if json_type != "string":
+            raise ValueError("Only string enums are supported")
+        converted["format"] = "enum"
+        converted["enum"] = list(node["enum"])
+
+    if json_type == "array":
+        converted["items"] = _gemini_node(node.get("items") or {})
+    elif json_type == "object":
+        properties = node.get("properties")
+        if not properties:
+            raise ValueError("Free-form objects are not supported")
+        converted["properties"] = {
+            name: _gemini_node(sub) for name, sub in properties.items()
+        }
+        if node.get("required"):
+            converted["required"] = list(node["required"])
+
+    return converted
@@ -3,10 +3,12 @@
 import os
 import json
 import aiohttp
-from typing import Optional, Type, Dict, Any
+from typing import Optional, Type, Dict, Any, AsyncIterator
 from pydantic import BaseModel
 
 from .base_ai_agent import BaseAIAgent
+from .http_client import get_http_pool
+from .usage import report_usage
 
 
 class OllamaAgent(BaseAIAgent):
@@ -17,13 +19,15 @@ class OllamaAgent(BaseAIAgent):
     Requires Ollama running locally.
     """
 
+    supports_native_schema = True
+
     def __init__(
         self,
         model_name: str = "llama3.2",
         api_key: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 1024,
-        base_url: str = "http://localhost:11434"
+        base_url: Optional[str] = None
     ):
         super().__init__(model_name, api_key, temperature, max_tokens)
         self.base_url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
@@ -51,17 +55,76 @@ class OllamaAgent(BaseAIAgent):
         if system_prompt:
             payload["system"] = system_prompt
 
-        # Make request
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.base_url}/api/generate",
-                json=payload
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Ollama API error: {response.status}")
+        # Constrain output to "json" or a JSON schema
+        if kwargs.get("format") is not None:
+            payload["format"] = kwargs["format"]
+
+        # Make request on the shared keep-alive session
+        session = get_http_pool().session(self.base_url)
+        async with session.post(
+            f"{self.base_url}/api/generate",
+            json=payload
+        ) as response:
+            if response.status != 200:
+                raise aiohttp.ClientResponseError(
+                    response.request_info,
+                    response.history,
+                    status=response.status,
+                    message=f"Ollama API error: {response.status}",
+                    headers=response.headers
+                )
+
+            result = await response.json()
+            report_usage(result.get("prompt_eval_count"), result.get("eval_count"))
+            return result.get("response", "")
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream text completion with Ollama (NDJSON response lines)."""
+
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": True,
+            "options": {
+                "temperature": kwargs.get("temperature", self.temperature),
+                "num_predict": kwargs.get("max_tokens", self.max_tokens)
+            }
+        }
+
+        if system_prompt:
+            payload["system"] = system_prompt
 
-                result = await response.json()
-                return result.get("response", "")
+        if kwargs.get("format") is not None:
+            payload["format"] = kwargs["format"]
+
+        session = get_http_pool().session(self.base_url)
+        async with session.post(
+            f"{self.base_url}/api/generate",
+            json=payload
+        ) as response:
+            if response.status != 200:
+                raise aiohttp.ClientResponseError(
+                    response.request_info,
+                    response.history,
+                    status=response.status,
+                    message=f"Ollama API error: {response.status}",
+                    headers=response.headers
+                )
+
+            async for line in response.content:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if data.get("response"):
+                    yield data["response"]
+                if data.get("done"):
+                    report_usage(data.get("prompt_eval_count"), data.get("eval_count"))
+                    break
 
     async def generate_structured(
         self,
@@ -70,14 +133,25 @@ class OllamaAgent(BaseAIAgent):
         system_prompt: Optional[str] = None,
         **kwargs
     ) -> BaseModel:
-        """Generate structured output using prompt engineering."""
+        """
+        Generate structured output.
+
+        With native schemas enabled the JSON schema is passed as Ollama's
+        ``format`` (Ollama 0.5+); otherwise it is embedded in the prompt.
+        """
+        schema_format = kwargs.pop("schema_format", None)
 
-        # Get schema
-        schema = self._get_schema(response_model)
-        schema_str = json.dumps(schema, indent=2)
+        if self._use_native_schema(kwargs):
+            structured_prompt = f"""User request: {prompt}
 
-        # Create structured prompt
-        structured_prompt = f"""You are a helpful assistant that responds with valid JSON.
+Respond ONLY with valid JSON."""
+            kwargs["format"] = self._get_schema(response_model)
+        else:
+            # Get schema
+            schema_str = self._format_schema_for_prompt(response_model, schema_format)
+
+            # Create structured prompt
+            structured_prompt = f"""You are a helpful assistant that responds with valid JSON.
 
 Schema to follow:
 {schema_str}
@@ -95,36 +169,14 @@ Respond ONLY with valid JSON matching the schema above. Do not include any expla
         )
 
         # Parse and validate
-        try:
-            # Clean the response
-            text = response_text.strip()
-
-            # Remove markdown code blocks if present
-            if text.startswith("```json"):
-                text = text.split("```json")[1].split("```")[0].strip()
-            elif text.startswith("```"):
-                text = text.split("```")[1].split("```")[0].strip()
-
-            # Parse JSON
-            json_response = json.loads(text)
-            return response_model(**json_response)
-
-        except Exception as e:
-            # If parsing fails, try to find JSON in the text
-            import re
-            json_match = re.search(r'\{.*\}', text, re.DOTALL)
-            if json_match:
-                json_response = json.loads(json_match.group())
-                return response_model(**json_response)
-
-            raise ValueError(f"Failed to parse structured output: {e}\nResponse: {text}")
+        return self._parse_structured(response_text, response_model)
 
     async def is_available(self) -> bool:
         """Check if Ollama is running."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.base_url}/api/tags", timeout=aiohttp.ClientTimeout(total=2)) as response:
-                    return response.status == 200
+            session = get_http_pool().session(self.base_url)
+            async with session.get(f"{self.base_url}/api/tags", timeout=aiohttp.ClientTimeout(total=2)) as response:
+                return response.status == 200
         except:
             return False
 
@@ -134,6 +186,7 @@ Respond ONLY with valid JSON matching the schema above. Do not include any expla
         info["provider"] = "ollama"
         info["base_url"] = self.base_url
         info["supports_structured"] = True
+        info["supports_native_schema"] = self.supports_native_schema
         info["local"] = True
         info["cost"] = "free"
         return info
@@ -2,11 +2,19 @@
 
 import os
 import json
-from typing import Optional, Type, Dict, Any
+import re
+from typing import Optional, Type, Dict, Any, AsyncIterator
 from pydantic import BaseModel
 from openai import AsyncOpenAI
 
 from .base_ai_agent import BaseAIAgent
+from .usage import report_openai_usage
+from .native_schema import openai_response_format
+
+
+def _schema_name(response_model: Type[BaseModel]) -> str:
+    """OpenAI schema names allow only letters, digits, underscores and dashes."""
+    return re.sub(r"[^a-zA-Z0-9_-]", "_", response_model.__name__)[:64]
 
 
 class OpenAIAgent(BaseAIAgent):
@@ -14,6 +22,9 @@ class OpenAIAgent(BaseAIAgent):
     OpenAI AI agent with structured output support.
 
     Supports models: gpt-4o, gpt-4o-mini, gpt-4-turbo, gpt-3.5-turbo
+
+    Native json_schema response formats are off by default since only some
+    models support them; the provider registry enables them per model.
     """
 
     def __init__(
@@ -31,8 +42,9 @@ class OpenAIAgent(BaseAIAgent):
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not found in environment")
 
-        # Initialize OpenAI client
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        # Shared OpenAI client (one connection pool per API key). Retries are
+        # left to the shared retry policy so they are not multiplied.
+        self.client = self._shared_client(lambda: AsyncOpenAI(api_key=self.api_key, max_retries=0), self.api_key)
 
     async def generate(
         self,
@@ -58,9 +70,35 @@ class OpenAIAgent(BaseAIAgent):
             temperature=kwargs.get("temperature", self.temperature),
             max_tokens=kwargs.get("max_tokens", self.max_tokens)
         )
+        report_openai_usage(response)
 
         return response.choices[0].message.content
 
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream text completion with OpenAI."""
+
+        messages = []
+
+        # Add system message
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+
+        # Add user message
+        messages.append({"role": "user", "content": prompt})
+
+        async for chunk in self._stream_chat_completion(
+            messages,
+            temperature=kwargs.get("temperature", self.temperature),
+            max_tokens=kwargs.get("max_tokens", self.max_tokens),
+            stream_options={"include_usage": True}
+        ):
+            yield chunk
+
     async def generate_structured(
         self,
         prompt: str,
@@ -68,7 +106,12 @@ class OpenAIAgent(BaseAIAgent):
         system_prompt: Optional[str] = None,
         **kwargs
     ) -> BaseModel:
-        """Generate structured output using OpenAI's function calling."""
+        """
+        Generate structured output.
+
+        Uses ``response_format`` json_schema when native schemas are enabled
+        for the model, otherwise forced tool calling.
+        """
 
         messages = []
 
@@ -79,29 +122,53 @@ class OpenAIAgent(BaseAIAgent):
         # Add user message
         messages.append({"role": "user", "content": prompt})
 
+        # Schema is always sent as JSON schema, never rendered into the prompt
+        kwargs.pop("schema_format", None)
+
+        if self._use_native_schema(kwargs):
+            response_format = self._get_native_schema(
+                response_model,
+                "openai",
+                lambda schema: openai_response_format(schema, _schema_name(response_model))
+            )
+            response = await self.client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                response_format=response_format,
+                temperature=kwargs.get("temperature", self.temperature),
+                max_tokens=kwargs.get("max_tokens", self.max_tokens)
+            )
+            report_openai_usage(response)
+
+            message = response.choices[0].message
+            if getattr(message, "refusal", None):
+                raise ValueError(f"OpenAI refused structured output: {message.refusal}")
+            return self._parse_structured(message.content, response_model)
+
         # Get schema
         schema = self._get_schema(response_model)
 
-        # Convert to OpenAI function schema
+        # Convert to OpenAI tool schema
         function_schema = {
             "name": "generate_response",
-            "description": f"Generate a structured response",
+            "description": "Generate a structured response",
             "parameters": schema
         }
 
-        # Generate with function calling
+        # Generate with forced tool calling
         response = await self.client.chat.completions.create(
             model=self.model_name,
             messages=messages,
-            functions=[function_schema],
-            function_call={"name": "generate_response"},
+            tools=[{"type": "function", "function": function_schema}],
+            tool_choice={"type": "function", "function": {"name": "generate_response"}},
             temperature=kwargs.get("temperature", self.temperature),
             max_tokens=kwargs.get("max_tokens", self.max_tokens)
         )
+        report_openai_usage(response)
 
-        # Parse function call response
-        function_call = response.choices[0].message.function_call
-        arguments = json.loads(function_call.arguments)
+        # Parse tool call response
+        tool_call = response.choices[0].message.tool_calls[0]
+        arguments = json.loads(tool_call.function.arguments)
 
         return response_model(**arguments)
 
@@ -111,4 +178,5 @@ class OpenAIAgent(BaseAIAgent):
         info["provider"] = "openai"
         info["supports_structured"] = True
         info["supports_function_calling"] = True
+        info["supports_native_schema"] = self.supports_native_schema
         return info
@@ -0,0 +1,194 @@
+"""Render JSON schemas for structured-output prompts."""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Set
+
+from .token_estimator import estimate_tokens
+
+
+# Supported schema prompt formats:
+# - json: pretty-printed JSON schema (original behaviour)
+# - compact: minified JSON schema without titles and null defaults
+# - typescript: TypeScript-like type sketch, descriptions as deduplicated comments
+SCHEMA_FORMATS = ("json", "compact", "typescript")
+
+
+def default_schema_format() -> str:
+    """Get the process-wide default format (SCHEMA_PROMPT_FORMAT, defaults to json)."""
+    schema_format = os.getenv("SCHEMA_PROMPT_FORMAT", "json").lower()
+    return schema_format if schema_format in SCHEMA_FORMATS else "json"
+
+
+def render_schema(schema: Dict[str, Any], schema_format: Optional[str] = None) -> str:
+    """
+    Render a JSON schema for inclusion in a prompt.
+
+    Args:
+        schema: JSON schema (e.g. from ``model_json_schema()``)
+        schema_format: One of SCHEMA_FORMATS (defaults to default_schema_format())
+
+    Returns:
+        Rendered schema text
+    """
+    schema_format = (schema_format or default_schema_format()).lower()
+
+    if schema_format == "json":
+        return json.dumps(schema, indent=2)
+    if schema_format == "compact":
+        return json.dumps(_strip_schema(schema), separators=(",", ":"))
+    if schema_format == "typescript":
+        return _TypeSketch(schema).render()
+
+    raise ValueError(f"Unknown schema format: {schema_format}")
+
+
+def schema_token_report(schema: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+    """
+    Compare the prompt cost of every schema format.
+
+    Args:
+        schema: JSON schema
+
+    Returns:
+        Mapping of format to {"chars", "tokens"}
+    """
+    report = {}
+    for schema_format in SCHEMA_FORMATS:
+        text = render_schema(schema, schema_format)
+        report[schema_format] = {
+            "chars": len(text),
+            "tokens": estimate_tokens(text)
+        }
+    return report
+
+
+def _strip_schema(node: Any) -> Any:
+    """Drop keys that carry no information for the model."""
+    if isinstance(node, list):
+        return [_strip_schema(item) for item in node]
+    if not isinstance(node, dict):
+        return node
+
+    stripped = {}
+    for key, value in node.items():
+        if key == "title":
+            continue
+        if key == "default" and value is None:
+            continue
+        if key in ("properties", "$defs", "definitions"):
+            # Keys of these mappings are names, not schema keywords
+            stripped[key] = {name: _strip_schema(sub) for name, sub in value.items()}
+        else:
+            stripped[key] = _strip_schema(value)
+    return stripped
+
+
+class _TypeSketch:
+    """Renders a JSON schema as a TypeScript-like type declaration."""
+
+    _PRIMITIVES = {
+        "string": "string",
+        "integer": "integer",
+        "number": "number",
+        "boolean": "boolean",
+        "null": "null",
+    }
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+        self.defs = dict(schema.get("$defs", {}))
+        self.defs.update(schema.get("definitions", {}))
+        self.used_defs: List[str] = []
+        self.seen_descriptions: Set[str] = set()
+
+    def render(self) -> str:
+        root = self._type(self.schema, 0)
+        blocks = []
+        # Named types may reference further named types; render until stable
+        rendered: Set[str] = set()
+        while len(rendered) < len(self.used_defs):
+            for name in list(self.used_defs):
+                if name not in rendered:
+                    rendered.add(name)
+                    blocks.append(f"type {name} = {self._type(self.defs[name], 0, named=True)}")
+        blocks.append(f"type Response = {root}")
+        return "\n".join(blocks)
+
+    def _type(self, node: Dict[str, Any], depth: int, named: bool = False) -> str:
+        if "$ref" in node:
+            name = node["$ref"].rsplit("/", 1)[-1]
+            if name in self.defs:
+                if name not in self.used_defs:
+                    self.used_defs.append(name)
+                return name
+            return "any"
+
+        for key in ("anyOf", "oneOf"):
+            if key in node:
+                return " | ".join(self._type(option, depth) for option in node[key])
+
+        if "enum" in node:
+            return " | ".join(json.dumps(value) for value in node["enum"])
+        if "const" in node:
+            return json.dumps(node["const"])
+
+        json_type = node.get("type")
+        if isinstance(json_type, list):
+            return " | ".join(self._type({**node, "type": t}, depth) for t in json_type)
+
+        if json_type == "array":
+            item_type = self._type(node.get("items", {}), depth)
+            if " | " in item_type:
+                item_type = f"({item_type})"
+            return f"{item_type}[]"
+
+        if json_type == "object" or "properties" in node:
+            return self._object(node, depth)
+
+        base = self._PRIMITIVES.get(json_type, "any")
+        bounds = self._bounds(node)
+        return f"{base} /* {bounds} */" if bounds else base
+
+    def _object(self, node: Dict[str, Any], depth: int) -> str:
+        properties = node.get("properties")
+        if not properties:
+            return "object"
+
+        required = set(node.get("required", []))
+        indent = "  " * (depth + 1)
+        lines = ["{"]
+        for name, sub in properties.items():
+            optional = "" if name in required else "?"
+            line = f"{indent}{name}{optional}: {self._type(sub, depth + 1)};"
+            description = (sub.get("description") or "").strip()
+            if description and description not in self.seen_descriptions:
+                self.seen_descriptions.add(description)
+                line += f" // {' '.join(description.split())}"
+            lines.append(line)
+        lines.append("  " * depth + "}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _bounds(node: Dict[str, Any]) -> str:
+        parts = []
+        if "minimum" in node:
+            parts.append(f">={node['minimum']}")
+        if "maximum" in node:
+            parts.append(f"<={node['maximum']}")
+        return " ".join(parts)
+
+
+if __name__ == "__main__":
+    # Token report for every agent definition: python -m modules.agents.schema_renderer
+    from agents.agent_loader import AgentLoader
+
+    loader = AgentLoader(default_provider="ollama")
+    print(f"{'agent':<24}" + "".join(f"{mode:>12}" for mode in SCHEMA_FORMATS))
+    for agent_id in sorted(loader.discover_agents()):
+        agent = loader.load_agent(agent_id)
+        response_model = agent._create_pydantic_model()
+        if response_model is None:
+            continue
+        report = schema_token_report(response_model.model_json_schema())
+        print(f"{agent_id:<24}" + "".join(f"{report[mode]['tokens']:>12}" for mode in SCHEMA_FORMATS))
@@ -0,0 +1,189 @@
+"""Incremental parsing of a JSON object streamed by a model."""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import re
+
+
+# Returns True to stop generation once the field's value is known
+FieldHook = Callable[[Any], bool]
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+# Parser states
+_SEEK = 0          # before the opening brace (skips fences and prose)
+_KEY_OR_END = 1    # expecting a key, a comma or the closing brace
+_KEY = 2           # inside a key string
+_COLON = 3         # expecting the colon after a key
+_VALUE_START = 4   # expecting the first character of a value
+_VALUE = 5         # inside a value
+
+
+class StreamingJSONParser:
+    """
+    Parses a JSON object from text chunks as a model generates them.
+
+    Each top-level field is reported as soon as its value is complete, so a
+    decisive field written early (e.g. ``should_process``) is known long
+    before the rest of the object. Text before the opening brace, such as a
+    markdown code fence, is skipped, as is anything after the closing brace.
+
+    Usage:
+        parser = StreamingJSONParser({"should_process": lambda value: value is False})
+        async for chunk in stream:
+            for name, value in parser.feed(chunk):
+                ...
+            if parser.stopped_by:
+                break
+    """
+
+    def __init__(self, hooks: Optional[Dict[str, FieldHook]] = None):
+        """
+        Initialize parser.
+
+        Args:
+            hooks: Field name -> hook called with the field's value; a hook
+                returning True stops the parser (see stopped_by)
+        """
+        self.hooks: Dict[str, FieldHook] = dict(hooks or {})
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self.stopped_by: Optional[str] = None
+
+        self._state = _SEEK
+        self._buffer: List[str] = []
+        self._key: Optional[str] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def on(self, field: str, hook: FieldHook):
+        """Register an early-decision hook for a top-level field."""
+        self.hooks[field] = hook
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Consume the next chunk of text.
+
+        Args:
+            chunk: Text as streamed by the model
+
+        Returns:
+            (name, value) of each top-level field completed by this chunk
+        """
+        completed: List[Tuple[str, Any]] = []
+        i, n = 0, len(chunk)
+
+        while i < n and not self.done and self.stopped_by is None:
+            state = self._state
+
+            if state == _SEEK:
+                start = chunk.find("{", i)
+                if start < 0:
+                    break
+                self._state = _KEY_OR_END
+                i = start + 1
+
+            elif state == _KEY_OR_END:
+                c = chunk[i]
+                i += 1
+                if c == '"':
+                    self._buffer = ['"']
+                    self._state = _KEY
+                elif c == "}":
+                    self.done = True
+
+            elif state == _KEY:
+                i, closed = self._scan_string(chunk, i)
+                if closed:
+                    try:
+                        self._key = json.loads("".join(self._buffer))
+                    except ValueError:
+                        self._key = None
+                    self._state = _COLON
+
+            elif state == _COLON:
+                if chunk[i] == ":":
+                    self._state = _VALUE_START
+                i += 1
+
+            elif state == _VALUE_START:
+                if chunk[i].isspace():
+                    i += 1
+                    continue
+                self._buffer = []
+                self._depth = 0
+                self._in_string = False
+                self._state = _VALUE
+
+            elif self._in_string:
+                i, closed = self._scan_string(chunk, i)
+                if closed:
+                    self._in_string = False
+                    if self._depth == 0:
+                        self._complete(completed)
+
+            else:
+                c = chunk[i]
+                if c == '"':
+                    self._buffer.append(c)
+                    self._in_string = True
+                    i += 1
+                elif c in "{[":
+                    self._buffer.append(c)
+                    self._depth += 1
+                    i += 1
+                elif c in "}]" and self._depth > 0:
+                    self._buffer.append(c)
+                    self._depth -= 1
+                    i += 1
+                    if self._depth == 0:
+                        self._complete(completed)
+                elif self._depth == 0 and (c in ",}" or c.isspace()):
+                    # End of a scalar; the terminator is handled as the next token
+                    self._complete(completed)
+                else:
+                    self._buffer.append(c)
+                    i += 1
+
+        return completed
+
+    def _scan_string(self, chunk: str, i: int) -> Tuple[int, bool]:
+        """Buffer string content from chunk[i:]; return (next index, string closed)."""
+        n = len(chunk)
+        while i < n:
+            if self._escape:
+                self._buffer.append(chunk[i])
+                self._escape = False
+                i += 1
+                continue
+            match = _STRING_SPECIAL.search(chunk, i)
+            if match is None:
+                self._buffer.append(chunk[i:])
+                return n, False
+            end = match.start()
+            self._buffer.append(chunk[i:end + 1])
+            if chunk[end] == "\\":
+                self._escape = True
+                i = end + 1
+                continue
+            return end + 1, True
+        return n, False
+
+    def _complete(self, completed: List[Tuple[str, Any]]):
+        raw = "".join(self._buffer)
+        self._buffer = []
+        self._state = _KEY_OR_END
+        if self._key is None:
+            return
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            # Malformed value; the full parse at the end reports it
+            return
+
+        self.fields[self._key] = value
+        completed.append((self._key, value))
+        hook = self.hooks.get(self._key)
+        if hook is not None and hook(value):
+            self.stopped_by = self._key
@@ -0,0 +1,29 @@
+"""Provider-independent token count estimation."""
+
+import re
+
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in text.
+
+    Approximates BPE tokenizers: words count one token per ~4 characters
+    and every punctuation character counts as one token. Good enough for
+    budgeting and comparisons, not for exact billing.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+
+    count = 0
+    for piece in _PIECE_RE.findall(text):
+        count += (len(piece) + 3) // 4
+    return count
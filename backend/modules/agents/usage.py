@@ -0,0 +1,81 @@
+"""Per-call token usage reporting from providers to callers."""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+
+@dataclass
+class Usage:
+    """Token usage of one provider call as reported by the provider API."""
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    reported: bool = False
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+_current_usage: ContextVar[Optional[Usage]] = ContextVar("llm_usage", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[Usage]:
+    """
+    Collect usage reported by provider calls made inside the block.
+
+    Blocks can be nested; usage is added to every enclosing block.
+
+    Usage:
+        with track_usage() as usage:
+            await provider.generate(...)
+        print(usage.input_tokens, usage.output_tokens)
+    """
+    parent = _current_usage.get()
+    usage = Usage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        try:
+            _current_usage.reset(token)
+        except ValueError:
+            # Closed from another context (an abandoned stream finalized by the event loop)
+            pass
+        # Nested tracking (e.g. an agent around its selector calls) sees inner usage too
+        if parent is not None and usage.reported:
+            report_usage(usage.input_tokens, usage.output_tokens, usage.cached_tokens)
+
+
+def report_usage(
+    input_tokens: Optional[int],
+    output_tokens: Optional[int],
+    cached_tokens: Optional[int] = 0
+):
+    """Report token usage for the current call (no-op when nobody is tracking)."""
+    usage = _current_usage.get()
+    if usage is None:
+        return
+
+    usage.input_tokens += input_tokens or 0
+    usage.output_tokens += output_tokens or 0
+    usage.cached_tokens += cached_tokens or 0
+    usage.reported = True
+
+
+def report_openai_usage(response):
+    """Report usage from an OpenAI-compatible chat completion response."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+
+    details = getattr(usage, "prompt_tokens_details", None)
+    report_usage(
+        usage.prompt_tokens,
+        usage.completion_tokens,
+        getattr(details, "cached_tokens", 0) if details else 0
+    )
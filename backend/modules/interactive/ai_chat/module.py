@@ -1,14 +1,10 @@
 """Unified AI Chat Module with multi-provider support."""
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 
 from modules.base import BaseModule, ModuleType
-from modules.agents.gemini_agent import GeminiAgent
-from modules.agents.openai_agent import OpenAIAgent
-from modules.agents.groq_agent import GroqAgent
-from modules.agents.ollama_agent import OllamaAgent
 
 
 # Example structured output model
@@ -37,7 +33,7 @@ class AIChatModule(BaseModule):
         self.module_type = ModuleType.INTERACTIVE
         self.version = "2.0.0"
 
-        # Initialize agents (lazy loading)
+        # Initialize agents (lazy loading, provider SDKs are imported on first use)
         self._agents = {}
         self._default_provider = "gemini"
 
@@ -47,16 +43,9 @@ class AIChatModule(BaseModule):
             return self._agents[provider]
 
         try:
-            if provider == "gemini":
-                agent = GeminiAgent(model_name="gemini-2.0-flash-exp")
-            elif provider == "openai":
-                agent = OpenAIAgent(model_name="gpt-4o-mini")
-            elif provider == "groq":
-                agent = GroqAgent(model_name="llama-3.3-70b-versatile")
-            elif provider == "ollama":
-                agent = OllamaAgent(model_name="llama3.2")
-            else:
-                raise ValueError(f"Unknown provider: {provider}")
+            # Shared with the model selector and agent loader
+            from agents.general_codes.provider_registry import get_provider_registry
+            agent = get_provider_registry().get(provider)
 
             self._agents[provider] = agent
             return agent
@@ -65,6 +54,22 @@ class AIChatModule(BaseModule):
             print(f"Failed to initialize {provider} agent: {e}")
             return None
 
+    def _fallback_order(self, provider: str) -> List[str]:
+        """Get providers to try, starting with the requested one."""
+        providers_to_try = [provider]
+
+        # Add fallbacks
+        if provider != "gemini":
+            providers_to_try.append("gemini")
+        if provider != "openai":
+            providers_to_try.append("openai")
+        if provider != "groq":
+            providers_to_try.append("groq")
+        if provider != "ollama":
+            providers_to_try.append("ollama")
+
+        return providers_to_try
+
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Process chat request with intelligent provider routing.
@@ -117,49 +122,50 @@ class AIChatModule(BaseModule):
             kwargs["max_tokens"] = max_tokens
 
         # Provider priority list (fallback order)
-        providers_to_try = [provider]
+        providers_to_try = self._fallback_order(provider)
 
-        # Add fallbacks
-        if provider != "gemini":
-            providers_to_try.append("gemini")
-        if provider != "openai":
-            providers_to_try.append("openai")
-        if provider != "groq":
-            providers_to_try.append("groq")
-        if provider != "ollama":
-            providers_to_try.append("ollama")
+        # Try providers in order, skipping those whose circuit breaker is open
+        from agents.general_codes.circuit_breaker import CircuitOpenError, get_circuit_breakers
+        from agents.general_codes.cost_tracker import attribute, get_cost_tracker
+        from agents.general_codes.provider_registry import default_model_for
+        breakers = get_circuit_breakers()
+        tracker = get_cost_tracker()
 
-        # Try providers in order
         last_error = None
         for current_provider in providers_to_try:
             try:
-                agent = self._get_agent(current_provider)
-                if not agent:
-                    continue
-
-                # Check if Ollama is available before trying
-                if current_provider == "ollama":
-                    if not await agent.is_available():
-                        print("Ollama not available, skipping")
-                        continue
-
-                # Generate response
-                if use_structured:
-                    result = await agent.generate_structured(
-                        text,
-                        ChatResponse,
-                        system_prompt=system_prompt,
-                        **kwargs
-                    )
-                    response_text = result.answer
-                    confidence = result.confidence
-                else:
-                    response_text = await agent.generate(
-                        text,
-                        system_prompt=system_prompt,
-                        **kwargs
-                    )
-                    confidence = 0.9
+                breaker = breakers.get(current_provider, default_model_for(current_provider))
+                async with breaker.guard():
+                    agent = self._get_agent(current_provider)
+                    if not agent:
+                        # Misconfigured (e.g. missing API key): stop retrying until probed
+                        breaker.trip(f"{current_provider} agent could not be initialized")
+                        raise RuntimeError(f"{current_provider} agent could not be initialized")
+
+                    # Check if Ollama is available before trying
+                    if current_provider == "ollama":
+                        if not await agent.is_available():
+                            breaker.trip("Ollama not available")
+                            raise ConnectionError("Ollama not available")
+
+                    # Generate response
+                    with attribute(agent=self.name), tracker.track(agent.model_name, current_provider):
+                        if use_structured:
+                            result = await agent.generate_structured(
+                                text,
+                                ChatResponse,
+                                system_prompt=system_prompt,
+                                **kwargs
+                            )
+                            response_text = result.answer
+                            confidence = result.confidence
+                        else:
+                            response_text = await agent.generate(
+                                text,
+                                system_prompt=system_prompt,
+                                **kwargs
+                            )
+                            confidence = 0.9
 
                 # Success!
                 return {
@@ -171,6 +177,10 @@ class AIChatModule(BaseModule):
                     **self._get_processing_metadata(start_time)
                 }
 
+            except CircuitOpenError as e:
+                last_error = str(e)
+                print(f"Skipping {current_provider}: circuit open")
+                continue
             except Exception as e:
                 last_error = str(e)
                 print(f"Provider {current_provider} failed: {e}")
@@ -184,6 +194,129 @@ class AIChatModule(BaseModule):
             **self._get_processing_metadata(start_time)
         }
 
+    async def process_stream(self, input_data: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a chat response as it is generated.
+
+        Uses the same provider fallback as process(), but only until the first
+        chunk has been sent; a failure after that ends the stream with an
+        error event. Structured requests stream the raw JSON text and report
+        the parsed answer in the done event.
+
+        Args:
+            input_data: Same as process()
+
+        Yields:
+            {"type": "delta", "text": str} per chunk, then
+            {"type": "done", "response": str, "provider": str, "model": str, ...}
+            or {"type": "error", "error": str, ...}
+        """
+        start_time = datetime.now()
+
+        # Validate input
+        is_valid, error = self.validate_input(input_data)
+        if not is_valid:
+            yield {"type": "error", "error": error, **self._get_processing_metadata(start_time)}
+            return
+
+        text = input_data.get("text", "")
+        provider = input_data.get("provider", self._default_provider).lower()
+        use_structured = input_data.get("structured", False)
+        system_prompt = input_data.get("system_prompt")
+
+        kwargs = {}
+        if input_data.get("temperature") is not None:
+            kwargs["temperature"] = input_data["temperature"]
+        if input_data.get("max_tokens") is not None:
+            kwargs["max_tokens"] = input_data["max_tokens"]
+
+        providers_to_try = self._fallback_order(provider)
+
+        from agents.general_codes.circuit_breaker import CircuitOpenError, get_circuit_breakers
+        from agents.general_codes.cost_tracker import attribute, get_cost_tracker
+        from agents.general_codes.provider_registry import default_model_for
+        from modules.agents.base_ai_agent import parse_structured
+        breakers = get_circuit_breakers()
+        tracker = get_cost_tracker()
+
+        last_error = None
+        for current_provider in providers_to_try:
+            chunks = []
+            try:
+                breaker = breakers.get(current_provider, default_model_for(current_provider))
+                async with breaker.guard():
+                    agent = self._get_agent(current_provider)
+                    if not agent:
+                        breaker.trip(f"{current_provider} agent could not be initialized")
+                        raise RuntimeError(f"{current_provider} agent could not be initialized")
+
+                    if current_provider == "ollama":
+                        if not await agent.is_available():
+                            breaker.trip("Ollama not available")
+                            raise ConnectionError("Ollama not available")
+
+                    if use_structured:
+                        stream = agent.generate_structured_stream(
+                            text,
+                            ChatResponse,
+                            system_prompt=system_prompt,
+                            **kwargs
+                        )
+                    else:
+                        stream = agent.generate_stream(
+                            text,
+                            system_prompt=system_prompt,
+                            **kwargs
+                        )
+
+                    with attribute(agent=self.name), tracker.track(agent.model_name, current_provider):
+                        async for chunk in stream:
+                            chunks.append(chunk)
+                            yield {"type": "delta", "text": chunk}
+
+                    response_text = "".join(chunks)
+                    confidence = 0.9
+                    if use_structured:
+                        result = parse_structured(response_text, ChatResponse)
+                        response_text = result.answer
+                        confidence = result.confidence
+
+                yield {
+                    "type": "done",
+                    "response": response_text,
+                    "provider": current_provider,
+                    "model": agent.model_name,
+                    "confidence": confidence,
+                    "structured": use_structured,
+                    **self._get_processing_metadata(start_time)
+                }
+                return
+
+            except CircuitOpenError as e:
+                last_error = str(e)
+                print(f"Skipping {current_provider}: circuit open")
+                continue
+            except Exception as e:
+                last_error = str(e)
+                print(f"Provider {current_provider} failed: {e}")
+                if chunks:
+                    # Output was already sent; another provider would repeat it
+                    yield {
+                        "type": "error",
+                        "error": last_error,
+                        "provider": current_provider,
+                        **self._get_processing_metadata(start_time)
+                    }
+                    return
+                continue
+
+        yield {
+            "type": "error",
+            "error": f"All providers failed. Last error: {last_error}",
+            "providers_tried": providers_to_try,
+            **self._get_processing_metadata(start_time)
+        }
+
     def get_info(self) -> Dict[str, Any]:
         """Get module information."""
         return {
@@ -193,5 +326,6 @@ class AIChatModule(BaseModule):
             "description": "Unified AI chat with multi-provider support (Gemini, OpenAI, Groq, Ollama)",
             "supported_providers": ["gemini", "openai", "groq", "ollama"],
             "default_provider": self._default_provider,
-            "supports_structured_output": True
+            "supports_structured_output": True,
+            "supports_streaming": True
         }
@@ -10,6 +10,8 @@ class ExecutionContext:
         self.state: str = "running"
         self.error: Optional[str] = None
         self.steps: list = []
+        # LLM calls made during this execution (cost_tracker.ExecutionProfile)
+        self.profile: Optional[Any] = None
 
     def set_output(self, node_id: str, output: Any):
         self.node_outputs[node_id] = output
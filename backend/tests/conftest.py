@@ -0,0 +1,68 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_governance(monkeypatch, tmp_path):
+    """
+    Start each test with fresh governance singletons (providers, limits,
+    breakers, quotas, routing, spend), not ones shaped by earlier tests.
+    Budget spend goes to a file of the test's own.
+
+    Circuit breakers do not probe, so open breakers only recover through
+    calls the test makes.
+    """
+    from agents.general_codes import (
+        budget_governor, cassette, circuit_breaker, concurrency_limiter, cost_tracker, escalation,
+        hedging, micro_batcher, model_router, provider_registry, rate_limiter, retry_policy, single_flight
+    )
+    monkeypatch.setattr(circuit_breaker, "_circuit_breakers", circuit_breaker.CircuitBreakers(probe=False))
+    monkeypatch.setattr(cassette, "_cassette", False)
+    monkeypatch.setenv("LLM_BUDGET_PATH", str(tmp_path / "spend.sqlite3"))
+    for module, name in [
+        (budget_governor, "_budget_governor"),
+        (concurrency_limiter, "_concurrency_limits"),
+        (cost_tracker, "_cost_tracker"),
+        (escalation, "_escalation_manager"),
+        (hedging, "_hedge_policy"),
+        (micro_batcher, "_micro_batcher"),
+        (model_router, "_model_router"),
+        (provider_registry, "_provider_registry"),
+        (rate_limiter, "_quota_governor"),
+        (retry_policy, "_retry_policy"),
+        (single_flight, "_single_flight"),
+    ]:
+        monkeypatch.setattr(module, name, None)
+
+
+@pytest.fixture(autouse=True)
+def _isolated_response_cache(monkeypatch):
+    """Keep tests from sharing cached LLM responses (memory or disk)."""
+    from agents.general_codes import response_cache
+    monkeypatch.setattr(response_cache, "_response_cache", response_cache.ResponseCache(path=""))
+
+
+@pytest.fixture
+def mock_provider():
+    """
+    Register a MockAgent standing in for a provider's model.
+
+    Returns a factory taking the provider type, model name (default: the
+    provider's default model) and MockBehavior settings.
+    """
+    from agents.general_codes.provider_registry import default_model_for, get_provider_registry
+    from modules.agents.mock_agent import MockAgent, MockBehavior
+
+    def register(provider_type="gemini", model_name=None, agent_class=MockAgent, **behavior):
+        provider = agent_class(model_name or default_model_for(provider_type), behavior=MockBehavior(**behavior))
+        provider.provider = provider_type
+        get_provider_registry().register(provider)
+        return provider
+
+    return register
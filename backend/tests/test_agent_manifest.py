@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from agents.agent_loader import AgentLoader
+
+
+def _write_agent(root, agent_id, prompt="You are a test agent.", info="name: Test\ndescription: A test"):
+    agent_dir = root / agent_id
+    agent_dir.mkdir(exist_ok=True)
+    (agent_dir / "prompt.txt").write_text(prompt)
+    (agent_dir / "info.txt").write_text(info)
+    return agent_dir
+
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def test_listing_and_info(tmp_path):
+    _write_agent(tmp_path, "alpha")
+    _write_agent(tmp_path, "beta")
+    (tmp_path / "not_an_agent").mkdir()
+
+    loader = AgentLoader(agents_dir=tmp_path, default_provider="ollama", poll_interval=0)
+    agents = loader.list_agents()
+
+    assert sorted(agents) == ["alpha", "beta"]
+    assert agents["alpha"]["info"] == "name: Test\ndescription: A test"
+    assert agents["alpha"]["has_prompt"] is True
+    assert agents["alpha"]["has_schema"] is False
+    assert loader.manifest.get("alpha").info == {"name": "Test", "description": "A test"}
+
+
+def test_listing_is_cached_between_scans(tmp_path):
+    _write_agent(tmp_path, "alpha")
+    loader = AgentLoader(agents_dir=tmp_path, default_provider="ollama", poll_interval=3600)
+
+    first = loader.list_agents()
+    _write_agent(tmp_path, "beta")
+
+    assert loader.list_agents() == first
+    loader.manifest.refresh(force=True)
+    assert sorted(loader.list_agents()) == ["alpha", "beta"]
+
+
+def test_agent_reloaded_only_when_files_change(tmp_path):
+    agent_dir = _write_agent(tmp_path, "alpha", prompt="first prompt")
+    loader = AgentLoader(agents_dir=tmp_path, default_provider="ollama", poll_interval=0)
+
+    agent = loader.load_agent("alpha")
+    assert agent.prompt_template == "first prompt"
+    assert loader.load_agent("alpha") is agent
+
+    # Touching a file without changing its content keeps the cached agent
+    _bump_mtime(agent_dir / "prompt.txt")
+    assert loader.load_agent("alpha") is agent
+
+    (agent_dir / "prompt.txt").write_text("second prompt")
+    _bump_mtime(agent_dir / "prompt.txt")
+    reloaded = loader.load_agent("alpha")
+
+    assert reloaded is not agent
+    assert reloaded.prompt_template == "second prompt"
+    assert reloaded.definition_version != agent.definition_version
+
+
+def test_removed_agent_is_not_found(tmp_path):
+    agent_dir = _write_agent(tmp_path, "alpha")
+    loader = AgentLoader(agents_dir=tmp_path, default_provider="ollama", poll_interval=0)
+    loader.load_agent("alpha")
+
+    for child in agent_dir.iterdir():
+        child.unlink()
+    agent_dir.rmdir()
+
+    assert loader.list_agents() == {}
+    with pytest.raises(ValueError):
+        loader.load_agent("alpha")
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+from agents.agent_loader import AgentLoader
+from agents.general_codes import budget_governor, cost_tracker
+from agents.general_codes.ai_model_selector import AIModelSelector
+from agents.general_codes.budget_governor import (
+    DEGRADED, EXHAUSTED, OK, BudgetExceededError, BudgetGovernor, SpendWindow
+)
+from agents.general_codes.cost_tracker import CallRecord, CostTracker, attribute
+from agents.waterfall.simple_orchestrator import SimpleWaterfallOrchestrator
+from modules.agents.usage import Usage
+
+
+def test_spend_leaves_the_rolling_window():
+    window = SpendWindow(3600)
+    window.add(1.0, now=0)
+    window.add(2.0, now=1800)
+
+    assert window.spent(now=1800) == 3.0
+    # Below 2.5 once the first minute's spend has left the window
+    assert window.time_until_below(2.5, now=1800) == pytest.approx(3660 - 1800)
+    assert window.spent(now=3660) == 2.0
+    assert window.spent(now=1800 + 3660) == 0.0
+
+
+def _call(cost_usd):
+    return CallRecord("gpt-4o", "openai", None, None, 0, 0, 0, 0.1, cost_usd)
+
+
+def test_spend_is_shared_by_workers_and_kept_across_restarts(tmp_path):
+    path = str(tmp_path / "spend.sqlite3")
+    budgets = {"global": {"daily": 1.0}}
+    worker_a = BudgetGovernor(budgets, path=path, refresh=0)
+    worker_b = BudgetGovernor(budgets, path=path, refresh=0)
+
+    worker_a.record(_call(0.5))
+    worker_b.record(_call(0.35))
+    assert worker_a.level() == DEGRADED
+    assert worker_b.stats()["budgets"]["global"]["daily"]["spent_usd"] == pytest.approx(0.85)
+
+    restarted = BudgetGovernor(budgets, path=path)
+    restarted.record(_call(0.2))
+    assert restarted.level() == EXHAUSTED
+
+    per_process = BudgetGovernor(budgets, path="")
+    assert per_process.level() == OK
+
+
+def _spend(tracker, cost_usd, **labels):
+    # 1M input tokens of gpt-4o cost $2.50
+    with attribute(**labels):
+        tracker.record("gpt-4o", "openai", Usage(input_tokens=int(cost_usd / 2.5 * 1_000_000)), 0.1)
+
+
+@pytest.fixture
+def governed(monkeypatch):
+    def build(budgets, **options):
+        tracker = CostTracker()
+        governor = BudgetGovernor(budgets, **options)
+        tracker.listeners.append(governor.record)
+        monkeypatch.setattr(cost_tracker, "_cost_tracker", tracker)
+        monkeypatch.setattr(budget_governor, "_budget_governor", governor)
+        return tracker, governor
+
+    return build
+
+
+def test_levels_follow_spend_per_scope(governed):
+    tracker, governor = governed({"workflow:backfill": {"hourly": 1.0}, "agent:summarize": {"daily": 10.0}})
+
+    _spend(tracker, 0.5, workflow="backfill", agent="summarize")
+    assert governor.level(workflow="backfill") == OK
+
+    _spend(tracker, 0.35, workflow="backfill")
+    assert governor.level(workflow="backfill") == DEGRADED
+    assert governor.level(agent="summarize") == OK
+    assert governor.should_skip_optional(workflow="backfill")
+
+    _spend(tracker, 0.25, workflow="backfill")
+    assert governor.level(workflow="backfill", agent="summarize") == EXHAUSTED
+
+    stats = governor.stats()
+    assert stats["budgets"]["workflow:backfill"]["hourly"]["spent_usd"] == pytest.approx(1.1)
+    assert stats["budgets"]["agent:summarize"]["daily"]["spent_usd"] == pytest.approx(0.5)
+
+
+def test_exhausted_budget_rejects_calls_past_max_wait(governed):
+    tracker, governor = governed({"workflow:backfill": {"hourly": 1.0}}, max_wait=60)
+    _spend(tracker, 1.0, workflow="backfill")
+
+    async def admit(workflow):
+        with attribute(workflow=workflow):
+            await governor.admit()
+
+    with pytest.raises(BudgetExceededError):
+        asyncio.run(admit("backfill"))
+    asyncio.run(admit("interactive"))
+
+    assert governor.rejected == 1
+
+
+@pytest.fixture
+def providers(mock_provider):
+    endpoints = (("openai", "gpt-4o"), ("openai", "gpt-4o-mini"), ("gemini", "gemini-2.0-flash-exp"))
+    return {model_name: mock_provider(provider, model_name) for provider, model_name in endpoints}
+
+
+def test_low_budget_downgrades_to_cheapest_capable_model(governed, providers):
+    tracker, governor = governed({"workflow:backfill": {"daily": 1.0}}, min_quality=4)
+    selector = AIModelSelector()
+
+    async def generate(workflow):
+        with attribute(workflow=workflow):
+            return await selector.generate("hi", model="gpt-4o")
+
+    asyncio.run(generate("backfill"))
+    assert providers["gpt-4o"].calls == 1
+    _spend(tracker, 0.9, workflow="backfill")
+
+    asyncio.run(generate("backfill"))
+    assert providers["gemini-2.0-flash-exp"].calls == 1
+    asyncio.run(generate("interactive"))
+    assert providers["gpt-4o"].calls == 2
+    assert governor.downgraded == 1
+
+
+def test_low_budget_skips_optional_waterfall_stages(tmp_path, governed, providers):
+    tracker, governor = governed({"workflow:waterfall": {"daily": 1.0}})
+    for agent_id in ("triage", "enrich"):
+        (tmp_path / agent_id).mkdir()
+        (tmp_path / agent_id / "prompt.txt").write_text("Go.")
+
+    orchestrator = SimpleWaterfallOrchestrator()
+    orchestrator.loader = AgentLoader(agents_dir=tmp_path, default_provider="openai")
+    orchestrator.stages = [
+        {"agent": "triage", "model": "gpt-4o", "required": True},
+        {"agent": "enrich", "model": "gpt-4o", "required": False}
+    ]
+
+    assert "result" in asyncio.run(orchestrator.process("post"))["results"]["enrich"]
+    _spend(tracker, 0.9, workflow="waterfall")
+
+    results = asyncio.run(orchestrator.process("post"))["results"]
+    assert results["enrich"] == {"skipped": "budget"}
+    assert "result" in results["triage"]
+    assert providers["gemini-2.0-flash-exp"].calls == 1
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+from pydantic import BaseModel
+
+from agents.general_codes.cassette import Cassette, CassetteAgent, CassetteMissError
+from agents.general_codes.provider_registry import ProviderRegistry
+from agents.general_codes.retry_policy import classify_error, retry_after
+from modules.agents.mock_agent import MockAgent, MockBehavior, MockProviderError
+from modules.agents.usage import track_usage
+
+
+class Triage(BaseModel):
+    relevant: bool
+    score: float
+
+
+async def _session(agent):
+    """The calls of one pipeline run, including a rate-limited one."""
+    with track_usage() as usage:
+        text = await agent.generate("summarize", temperature=0.9)
+        again = await agent.generate("summarize", temperature=0.9)
+        triage = await agent.generate_structured("triage", Triage)
+        chunks = [chunk async for chunk in agent.generate_stream("stream this")]
+    try:
+        await agent.generate("overloaded")
+    except Exception as e:
+        error = e
+    return text, again, triage, chunks, usage.total_tokens, error
+
+
+class _Flaky(MockAgent):
+    async def generate(self, prompt, system_prompt=None, **kwargs):
+        if prompt == "overloaded":
+            raise MockProviderError(429, "Slow down", {"retry-after": "7"})
+        return await super().generate(prompt, system_prompt, **kwargs)
+
+
+def test_replay_serves_recorded_responses_usage_and_errors(tmp_path):
+    path = str(tmp_path / "run.jsonl.gz")
+    recorded = asyncio.run(_session(CassetteAgent(_Flaky(behavior=MockBehavior(seed=1)), Cassette(path, "record"))))
+
+    # A provider that would answer differently is never called on replay
+    replay = Cassette(path, "replay", latency_scale=0)
+    replayed = asyncio.run(_session(CassetteAgent(_Flaky(behavior=MockBehavior(seed=2)), replay)))
+
+    assert replayed[:5] == recorded[:5]
+    assert classify_error(replayed[5]) == "rate_limit"
+    assert retry_after(replayed[5]) == 7.0
+    assert replay.stats()["hits"] == 5 and len(replay) == 5
+
+    with pytest.raises(CassetteMissError):
+        asyncio.run(CassetteAgent(MockAgent(), replay).generate("never recorded"))
+
+
+def test_replay_scales_recorded_latency(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    agent = MockAgent(behavior=MockBehavior(latency="fixed:0.2"))
+    asyncio.run(CassetteAgent(agent, Cassette(path, "record")).generate("hi"))
+
+    replay = CassetteAgent(agent, Cassette(path, "replay", latency_scale=0.25))
+    started = time.monotonic()
+    asyncio.run(replay.generate("hi"))
+    assert 0.04 < time.monotonic() - started < 0.15
+
+
+def test_auto_mode_records_only_new_calls(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    first = Cassette(path, "auto")
+    asyncio.run(CassetteAgent(MockAgent(), first).generate("known"))
+
+    second = Cassette(path, "auto")
+    agent = CassetteAgent(MockAgent(), second)
+    asyncio.run(agent.generate("known"))
+    asyncio.run(agent.generate("new"))
+
+    assert (second.hits, second.recorded, len(second)) == (1, 1, 2)
+
+
+def test_registry_wraps_providers_when_configured(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_CASSETTE", str(tmp_path / "run.jsonl"))
+    monkeypatch.setenv("LLM_CASSETTE_MODE", "record")
+
+    provider = ProviderRegistry().get("mock")
+    assert isinstance(provider, CassetteAgent)
+    assert (provider.provider, provider.model_name) == ("mock", "mock")
+    assert provider.get_info()["cassette"] == "record"
+
+
+def test_registry_replays_without_provider_keys(tmp_path, monkeypatch):
+    path = str(tmp_path / "run.jsonl")
+    recorder = MockAgent("gemini-2.0-flash-exp")
+    recorder.provider = "gemini"
+    recorded = asyncio.run(CassetteAgent(recorder, Cassette(path, "record")).generate("hi"))
+
+    for key in ("GEMINI_API_KEY", "gemeni_key", "OPENAI_API_KEY", "GROQ_API_KEY", "DEEPINFRA_API_KEY"):
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setenv("LLM_CASSETTE", path)
+    monkeypatch.setenv("LLM_CASSETTE_MODE", "replay")
+    monkeypatch.setenv("LLM_CASSETTE_LATENCY", "0")
+
+    provider = ProviderRegistry().get("gemini")
+    assert asyncio.run(provider.generate("hi")) == recorded
+    assert provider.get_info()["cassette"] == "replay"
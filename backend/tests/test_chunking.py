@@ -0,0 +1,166 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+from agents.agent_loader import AgentLoader
+from agents.general_codes.chunking import ChunkPolicy, context_window, split_text
+from modules.agents.mock_agent import MockAgent
+from modules.agents.token_estimator import estimate_tokens
+
+
+DOCUMENT = "\n\n".join(
+    f"Paragraph {number} mentions Acme and Person{number}. It has a second sentence about the report."
+    for number in range(12)
+)
+
+
+def test_split_text_respects_budget_and_overlaps():
+    chunks = split_text(DOCUMENT, 60, overlap_tokens=20)
+
+    assert len(chunks) > 3
+    assert all(estimate_tokens(chunk) <= 60 for chunk in chunks)
+    # Every chunk after the first repeats the end of the previous one
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert re.split(r"(?<=\.) ", chunk)[0] in previous
+    assert all(f"Person{number}." in " ".join(chunks) for number in range(12))
+
+    assert split_text("short text", 60) == ["short text"]
+    # A single paragraph with no sentence breaks is split between words
+    assert all(estimate_tokens(chunk) <= 10 for chunk in split_text("word " * 100, 10))
+
+
+def test_reducers_follow_schema_types_and_declarations():
+    schema = {"properties": {
+        "relevant": {"type": "boolean"},
+        "score": {"type": "number"},
+        "tags": {"type": "array"},
+        "entities": {"type": "array"},
+        "summary": {"type": "string"}
+    }}
+    policy = ChunkPolicy.from_definition({"reducers": "entities=dedupe:name, summary=join"}, {})
+
+    merged = policy.reduce([
+        {"relevant": False, "score": 0.2, "tags": ["a"], "entities": [{"name": "Acme", "kind": "org"}], "summary": "one"},
+        {"relevant": True, "score": 0.9, "tags": ["a", "b"], "entities": [{"name": "acme"}, {"name": "Bob"}], "summary": "two"}
+    ], schema)
+
+    assert merged == {
+        "relevant": True,
+        "score": 0.9,
+        "tags": ["a", "b"],
+        "entities": [{"name": "Acme", "kind": "org"}, {"name": "Bob"}],
+        "summary": "one\ntwo"
+    }
+    assert ChunkPolicy.from_definition({}, {"REDUCERS": {"score": "mean"}}).reducers == {"score": "mean"}
+    with pytest.raises(ValueError):
+        ChunkPolicy.from_definition({"reducers": "score=median"}, {})
+
+
+class _Extractor(MockAgent):
+    """Extracts capitalized names from its input."""
+
+    def __init__(self, model_name, **kwargs):
+        super().__init__(model_name, **kwargs)
+        self.inputs = []
+        self.request_tokens = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_structured(self, prompt, response_model, system_prompt=None, **kwargs):
+        self.inputs.append(prompt)
+        self.request_tokens.append(estimate_tokens(system_prompt or "") + estimate_tokens(prompt) + kwargs["max_tokens"])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await self._simulate()
+        finally:
+            self.in_flight -= 1
+        names = sorted(set(re.findall(r"\b(Acme|Person\d+)\b", prompt)))
+        return response_model(people=[{"name": name} for name in names], importance=len(names) / 10)
+
+
+def _extract_agent(agents_dir, info, default_provider="openai", prompt="Extract people."):
+    agent_dir = agents_dir / "extract"
+    agent_dir.mkdir()
+    (agent_dir / "prompt.txt").write_text(prompt)
+    (agent_dir / "info.txt").write_text(info)
+    (agent_dir / "structure_output.json").write_text(json.dumps({
+        "type": "object",
+        "properties": {
+            "people": {"type": "array", "items": {"type": "object", "properties": {"name": {"type": "string"}}}},
+            "importance": {"type": "number"}
+        },
+        "required": ["people", "importance"]
+    }))
+    return AgentLoader(agents_dir=agents_dir, default_provider=default_provider).load_agent("extract")
+
+
+@pytest.fixture
+def extractor(tmp_path, mock_provider):
+    provider = mock_provider("openai", "gpt-4o-mini", agent_class=_Extractor, latency="fixed:0.05")
+    agent = _extract_agent(
+        tmp_path, "name: extract\nchunk_tokens: 60\nchunk_overlap: 20\nreducers: people=dedupe:name\n"
+    )
+    return agent, provider
+
+
+def test_long_input_is_mapped_over_chunks_concurrently(extractor):
+    agent, provider = extractor
+
+    result = asyncio.run(agent.process(DOCUMENT))
+
+    assert len(provider.inputs) > 3
+    # Chunks run in parallel, not one after another
+    assert provider.max_in_flight == len(provider.inputs)
+    names = [person["name"] for person in result["people"]]
+    assert sorted(names) == sorted(["Acme"] + [f"Person{number}" for number in range(12)])
+    assert result["importance"] == max(len(set(re.findall(r"Acme|Person\d+", text))) / 10 for text in provider.inputs)
+
+
+def test_short_or_opted_out_input_is_sent_whole(extractor):
+    agent, provider = extractor
+
+    asyncio.run(agent.process("Acme hired Person1."))
+    asyncio.run(agent.process(DOCUMENT, chunk=False))
+
+    assert provider.inputs == ["Acme hired Person1.", DOCUMENT]
+
+
+def test_budget_uses_the_model_context_window(mock_provider):
+    assert context_window("gpt-4o") == 128000
+    assert context_window(None, mock_provider("openai", "gpt-4o-mini")) == 128000
+
+    policy = ChunkPolicy()
+    assert policy.budget(128000, 1000, 2000) == int(125000 * 0.8)
+    assert policy.budget(128000, 1000, 2000, copies=2) == int(125000 * 0.8 / 2)
+    assert ChunkPolicy(chunk_tokens=500).budget(128000, 1000, 2000) == 500
+
+
+def test_routed_calls_are_sized_for_the_routed_model(tmp_path, mock_provider):
+    provider = mock_provider("gemini", "gemini-2.0-flash-exp", agent_class=_Extractor)
+    agent = _extract_agent(tmp_path, "name: extract\nreducers: people=dedupe:name\n", "gemini")
+    # Longer than the smallest routable window, well within Gemini's
+    document = "\n\n".join([DOCUMENT] * 40)
+    assert estimate_tokens(document) > context_window("auto")
+
+    asyncio.run(agent.process(document, route={"objective": "cost", "providers": ["gemini"]}))
+
+    assert provider.inputs == [document]
+
+
+def test_chunks_formatted_into_the_prompt_fit_the_window(tmp_path, mock_provider):
+    provider = mock_provider("deepinfra", "openai/gpt-oss-20b", agent_class=_Extractor)
+    instructions = "Extract people. List every person named in the text, once. " * 90
+    agent = _extract_agent(
+        tmp_path, "name: extract\nreducers: people=dedupe:name\n", "deepinfra", instructions + "\n\n{input_data}"
+    )
+    assert estimate_tokens(instructions) > 1000
+    document = "\n\n".join([DOCUMENT] * 40)
+
+    asyncio.run(agent.process(document, max_tokens=2048))
+
+    # Each chunk goes out twice: in the system prompt and as the input
+    assert len(provider.inputs) > 1
+    assert all(tokens <= 8192 for tokens in provider.request_tokens)
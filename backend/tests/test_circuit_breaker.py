@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from agents.general_codes.ai_api_call import call_with_fallback
+from agents.general_codes.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+)
+from agents.general_codes.provider_registry import ProviderRegistry
+from modules.interactive.ai_chat.module import AIChatModule
+
+
+async def _fail(breaker, exc):
+    with pytest.raises(type(exc)):
+        async with breaker.guard():
+            raise exc
+
+
+def test_opens_on_failure_rate_and_half_opens_after_cooldown():
+    breaker = CircuitBreaker("p:m", min_calls=4, failure_rate=0.5, open_seconds=0.05)
+
+    async def run():
+        async with breaker.guard():
+            pass
+        await _fail(breaker, ValueError("bad json"))
+        await _fail(breaker, ConnectionError("down"))
+        assert breaker.state == CLOSED
+        await _fail(breaker, ConnectionError("down"))
+        assert breaker.state == OPEN
+
+        with pytest.raises(CircuitOpenError):
+            breaker.check()
+
+        await asyncio.sleep(0.06)
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow()
+        breaker.record_success(0.01)
+
+    asyncio.run(run())
+    assert breaker.state == CLOSED
+    assert breaker.rejected == 2
+
+
+def test_failed_probe_doubles_cooldown_and_success_closes():
+    healthy = False
+
+    async def probe():
+        if not healthy:
+            raise ConnectionError("still down")
+
+    breaker = CircuitBreaker("p:m", probe=probe, open_seconds=0.05)
+
+    async def run():
+        nonlocal healthy
+        breaker.trip("missing API key")
+        await asyncio.sleep(0.06)
+        assert not breaker.allow()
+        await asyncio.sleep(0.01)
+        assert breaker.state == OPEN and breaker.open_seconds == 0.1
+
+        healthy = True
+        await asyncio.sleep(0.11)
+        assert not breaker.allow()
+        await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert breaker.state == CLOSED
+    assert breaker.open_seconds == 0.05
+
+
+def test_fallback_skips_open_provider(mock_provider):
+    down = mock_provider("gemini", "gemini-2.0-flash", latency="fixed:0.05", error_rate=1.0)
+    healthy = mock_provider("openai", "gpt-4o-mini")
+
+    async def run():
+        for _ in range(6):
+            await call_with_fallback([down, healthy], "hi")
+
+    asyncio.run(run())
+
+    # The breaker opened after five failures; the sixth call went straight to openai
+    assert down.calls == 5
+    assert healthy.calls == 6
+
+
+def test_chat_module_stops_retrying_unconfigured_provider(monkeypatch, mock_provider):
+    mock_provider("openai", "gpt-4o-mini")
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+
+    attempts = []
+    create = ProviderRegistry._create
+
+    def counting_create(provider_type, model_name):
+        attempts.append(provider_type)
+        return create(provider_type, model_name)
+
+    monkeypatch.setattr(ProviderRegistry, "_create", staticmethod(counting_create))
+
+    module = AIChatModule()
+
+    async def run():
+        return [await module.process({"text": "hi"}) for _ in range(3)]
+
+    results = asyncio.run(run())
+
+    assert [result["provider"] for result in results] == ["openai"] * 3
+    assert attempts.count("gemini") == 1
@@ -0,0 +1,129 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from agents.general_codes.concurrency_limiter import AdaptiveLimiter, get_concurrency_limits
+from app.routes.agents import router
+
+
+def _run_calls(limiter, latencies, concurrency):
+    peak = 0
+
+    async def call(latency):
+        nonlocal peak
+        async with limiter.slot():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(latency)
+
+    async def run():
+        queue = list(latencies)
+        while queue:
+            batch, queue = queue[:concurrency], queue[concurrency:]
+            await asyncio.gather(*(call(latency) for latency in batch))
+
+    asyncio.run(run())
+    return peak
+
+
+def test_limit_grows_while_latency_is_stable():
+    limiter = AdaptiveLimiter(initial_limit=2, max_limit=10)
+
+    peak = _run_calls(limiter, [0.01] * 60, concurrency=10)
+
+    assert limiter.limit > 4
+    assert peak <= int(limiter.limit)
+
+
+def test_limit_backs_off_when_latency_rises():
+    limiter = AdaptiveLimiter(initial_limit=8, tolerance=2.0, backoff=0.5)
+    _run_calls(limiter, [0.01] * 8, concurrency=8)
+
+    _run_calls(limiter, [0.1] * 16, concurrency=8)
+
+    assert limiter.limit < 8
+
+
+def test_errors_back_off_but_value_errors_do_not():
+    limiter = AdaptiveLimiter(initial_limit=8, backoff=0.5)
+
+    async def fail(exc):
+        try:
+            async with limiter.slot():
+                raise exc
+        except Exception:
+            pass
+
+    asyncio.run(fail(ValueError("bad json")))
+    assert limiter.limit == 8
+
+    asyncio.run(fail(ConnectionError("overloaded")))
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+
+
+def test_fast_outliers_do_not_collapse_the_baseline():
+    limiter = AdaptiveLimiter(initial_limit=8)
+    for _ in range(20):
+        limiter.in_flight += 1
+        limiter.release(latency=1.0)
+
+    # One fast response, and a burst of fast ValueErrors
+    limiter.in_flight += 1
+    limiter.release(latency=0.01)
+
+    async def fail():
+        try:
+            async with limiter.slot():
+                raise ValueError("missing API key")
+        except ValueError:
+            pass
+
+    for _ in range(20):
+        asyncio.run(fail())
+
+    assert limiter.baseline == 1.0
+    limiter.in_flight += 1
+    limiter.release(latency=1.0)
+    assert limiter.limit == 8
+
+
+def test_waiters_are_served_in_order_and_cancellation_frees_queue():
+    limiter = AdaptiveLimiter(initial_limit=1)
+    order = []
+
+    async def call(index):
+        async with limiter.slot():
+            order.append(index)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        tasks = [asyncio.create_task(call(i)) for i in range(4)]
+        await asyncio.sleep(0)
+        tasks[2].cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(run())
+
+    assert order == [0, 1, 3]
+    assert limiter.in_flight == 0
+    assert not limiter._waiters
+
+
+def test_current_limit_is_exposed_as_metric():
+    get_concurrency_limits().get("deepinfra", "gpt-oss-20b")
+
+    app = FastAPI()
+    app.include_router(router)
+
+    async def fetch():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/agents/metrics/llm")
+
+    response = asyncio.run(fetch())
+
+    assert response.status_code == 200
+    endpoint = response.json()["metrics"]["concurrency"]["deepinfra:gpt-oss-20b"]
+    assert endpoint["limit"] == 16
+    assert endpoint["in_flight"] == 0
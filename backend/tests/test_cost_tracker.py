@@ -0,0 +1,90 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from agents.agent_loader import AgentLoader
+from agents.general_codes.ai_model_selector import AIModelSelector
+from agents.general_codes.cost_tracker import attribute, get_cost_tracker, model_cost
+from app.routes.agents import router
+from modules.agents.mock_agent import MockAgent, MockBehavior, MockProviderError
+from modules.agents.usage import report_usage
+
+
+class _Provider(MockAgent):
+    """Reports fixed usage for every call, including failed ones."""
+
+    async def _simulate(self):
+        report_usage(1000, 500, 200)
+        await super()._simulate()
+
+    def _report(self, prompt, system_prompt, text):
+        pass
+
+
+@pytest.fixture
+def tracker(mock_provider):
+    mock_provider("openai", "gpt-4o-mini", agent_class=_Provider)
+    return get_cost_tracker()
+
+
+def test_model_cost_uses_pricing_per_million_tokens():
+    assert model_cost("gpt-4o-mini", 1_000_000, 1_000_000) == pytest.approx(0.75)
+    assert model_cost("unknown-model", 1000, 1000) == 0.0
+
+
+def test_calls_are_attributed_and_profiled(tmp_path, tracker):
+    agent_dir = tmp_path / "summarize"
+    agent_dir.mkdir()
+    (agent_dir / "prompt.txt").write_text("Summarize.")
+    agent = AgentLoader(agents_dir=tmp_path, default_provider="openai").load_agent("summarize")
+
+    async def run():
+        with attribute(workflow="backfill"), tracker.profile("run") as profile:
+            await agent.process("post", model="gpt-4o-mini")
+            await AIModelSelector().generate("hi", model="gpt-4o-mini")
+        return profile
+
+    profile = asyncio.run(run()).to_dict()
+
+    expected_cost = model_cost("gpt-4o-mini", 1000, 500)
+    assert profile["total"]["calls"] == 2
+    assert profile["total"]["cost_usd"] == pytest.approx(2 * expected_cost, abs=1e-6)
+    assert set(profile["by_agent"]) == {"summarize", "unattributed"}
+    assert profile["calls"][0]["cached_tokens"] == 200
+
+    breakdown = tracker.get_breakdown()
+    assert breakdown["by_agent"]["summarize"]["input_tokens"] == 1000
+    assert breakdown["by_model"]["gpt-4o-mini"]["output_tokens"] == 1000
+    assert breakdown["by_workflow"]["backfill"]["calls"] == 2
+    assert tracker.get_total_cost() == pytest.approx(2 * expected_cost)
+
+
+def test_failed_calls_are_recorded_as_errors(tracker):
+    async def run():
+        with tracker.track("gpt-4o-mini", "openai"):
+            await _Provider("gpt-4o-mini", behavior=MockBehavior(error_rate=1.0)).generate("hi")
+
+    with pytest.raises(MockProviderError):
+        asyncio.run(run())
+
+    totals = tracker.get_breakdown()["total"]
+    assert (totals["calls"], totals["errors"], totals["input_tokens"]) == (1, 1, 1000)
+
+
+def test_costs_endpoint(tracker):
+    asyncio.run(AIModelSelector().generate("hi", model="gpt-4o-mini"))
+
+    app = FastAPI()
+    app.include_router(router)
+
+    async def fetch():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/agents/metrics/costs")
+
+    costs = asyncio.run(fetch()).json()["costs"]
+
+    assert costs["by_model"]["gpt-4o-mini"]["calls"] == 1
+    assert costs["recent_calls"][0]["model"] == "gpt-4o-mini"
@@ -0,0 +1,152 @@
+import asyncio
+import json
+
+import pytest
+
+from agents.agent_loader import AgentLoader
+from agents.general_codes import budget_governor, cost_tracker, retry_policy
+from agents.general_codes.budget_governor import BudgetGovernor
+from agents.general_codes.cost_tracker import CostTracker, attribute
+from agents.general_codes.escalation import EscalationPolicy, get_escalation_manager
+from agents.general_codes.retry_policy import RetryPolicy
+from modules.agents.mock_agent import MockAgent
+from modules.agents.usage import Usage
+
+
+class _Scripted(MockAgent):
+    """Answers with the scripted output for its model (an exception is raised)."""
+
+    outputs = {}
+
+    async def generate_structured(self, prompt, response_model, system_prompt=None, **kwargs):
+        await self._simulate()
+        output = self.outputs[self.model_name]
+        if isinstance(output, Exception):
+            raise output
+        return response_model(**output)
+
+
+@pytest.fixture
+def cascade(tmp_path, monkeypatch, mock_provider):
+    monkeypatch.setattr(retry_policy, "_retry_policy", RetryPolicy(base_delay=0))
+
+    agent_dir = tmp_path / "extract"
+    agent_dir.mkdir()
+    (agent_dir / "prompt.txt").write_text("Extract.")
+    (agent_dir / "info.txt").write_text("name: extract\ncascade: gpt-4o-mini, gpt-4o\nescalation_threshold: 0.7\n")
+    (agent_dir / "structure_output.json").write_text(json.dumps({
+        "type": "object",
+        "properties": {
+            "answer": {"type": "string"},
+            "extraction_confidence": {"type": "number"},
+            "importance_score": {"type": "number"}
+        },
+        "required": ["answer"]
+    }))
+
+    def build(outputs):
+        endpoints = (("ollama", "llama3.2"), ("openai", "gpt-4o-mini"), ("openai", "gpt-4o"))
+        for provider, model_name in endpoints:
+            mock_provider(provider, model_name, agent_class=_Scripted).outputs = outputs
+        return AgentLoader(agents_dir=tmp_path, default_provider="ollama").load_agent("extract")
+
+    return build
+
+
+def _answer(model_name, confidence, importance=0.1):
+    return {"answer": model_name, "extraction_confidence": confidence, "importance_score": importance}
+
+
+def test_policy_is_read_from_the_definition():
+    policy = EscalationPolicy.from_definition({"cascade": "gpt-oss-20b, gpt-4o"}, {})
+    assert policy.tiers == ("gpt-oss-20b", "gpt-4o")
+    assert EscalationPolicy.from_definition({}, {"CASCADE": ["a", "b"]}).tiers == ("a", "b")
+    assert EscalationPolicy.from_definition({"name": "plain"}, {}) is None
+    # A model named as metadata is not a cascade
+    assert EscalationPolicy.from_definition({"escalation_model": "gpt-oss-20b"}, {}) is None
+
+    # Only tiers stronger than the first tier's model are used
+    assert policy.tiers_above("gemini-2.0-flash-exp") == ("gpt-4o",)
+    assert policy.tiers_above("openai/gpt-oss-20b") == ("gpt-4o",)
+    assert policy.tiers_above("routed") == ("gpt-oss-20b", "gpt-4o")
+
+    assert policy.confidence({"detection_confidence": 0.4}) == 0.4
+    assert policy.reason({"confidence": 0.9, "importance_score": 0.95}, first=True) == "importance"
+    assert policy.reason({"confidence": 0.9, "importance_score": 0.95}, first=False) is None
+
+
+def test_confident_first_tier_is_not_escalated(cascade):
+    agent = cascade({"llama3.2": _answer("llama", 0.9)})
+
+    assert asyncio.run(agent.process("text"))["answer"] == "llama"
+    assert get_escalation_manager().stats()["extract"]["escalation_rate"] == 0.0
+
+
+def test_low_confidence_escalates_one_tier_at_a_time(cascade):
+    agent = cascade({
+        "llama3.2": _answer("llama", 0.3),
+        "gpt-4o-mini": _answer("mini", 0.8),
+        "gpt-4o": _answer("4o", 0.99)
+    })
+
+    assert asyncio.run(agent.process("text"))["answer"] == "mini"
+
+    stats = get_escalation_manager().stats()["extract"]
+    assert stats["reasons"] == {"low_confidence": 1}
+    assert stats["served_by"] == {"gpt-4o-mini": 1}
+
+
+def test_weaker_tiers_are_skipped(cascade):
+    agent = cascade({
+        "gpt-4o-mini": _answer("mini", 0.3, importance=0.95),
+        "gpt-4o": _answer("4o", 0.99)
+    })
+    assert asyncio.run(agent.process("text", model="gpt-4o-mini"))["answer"] == "4o"
+
+    agent = cascade({"gpt-4o": _answer("4o", 0.3, importance=0.95)})
+    assert asyncio.run(agent.process("text", model="gpt-4o"))["answer"] == "4o"
+
+    stats = get_escalation_manager().stats()["extract"]
+    assert stats["served_by"] == {"gpt-4o": 2}
+    assert stats["escalated"] == 1
+
+
+def test_important_and_invalid_results_escalate(cascade):
+    agent = cascade({
+        "llama3.2": _answer("llama", 0.9, importance=0.95),
+        "gpt-4o-mini": _answer("mini", 0.9),
+        "gpt-4o": _answer("4o", 0.9)
+    })
+    # Important content goes straight to the strongest tier
+    assert asyncio.run(agent.process("breaking news"))["answer"] == "4o"
+
+    agent = cascade({
+        "llama3.2": ValueError("Failed to parse structured output"),
+        "gpt-4o-mini": _answer("mini", 0.9)
+    })
+    assert asyncio.run(agent.process("garbled"))["answer"] == "mini"
+
+    stats = get_escalation_manager().stats()["extract"]
+    assert stats["reasons"] == {"importance": 1, "invalid": 1}
+    assert stats["escalation_rate"] == 1.0
+
+
+def test_failed_escalation_keeps_first_answer_and_budget_blocks_it(cascade, monkeypatch):
+    agent = cascade({
+        "llama3.2": _answer("llama", 0.3),
+        "gpt-4o-mini": RuntimeError("down"),
+        "gpt-4o": RuntimeError("down")
+    })
+    assert asyncio.run(agent.process("text"))["answer"] == "llama"
+
+    tracker = CostTracker()
+    governor = BudgetGovernor({"agent:extract": {"daily": 1.0}})
+    tracker.listeners.append(governor.record)
+    monkeypatch.setattr(cost_tracker, "_cost_tracker", tracker)
+    monkeypatch.setattr(budget_governor, "_budget_governor", governor)
+    # $0.90 of gpt-4o input, past the degrade level of the agent's $1 budget
+    with attribute(agent="extract"):
+        tracker.record("gpt-4o", "openai", Usage(input_tokens=360_000), 0.1)
+
+    assert asyncio.run(agent.process("other text"))["answer"] == "llama"
+    assert get_escalation_manager().stats()["extract"]["budget_blocked"] == 1
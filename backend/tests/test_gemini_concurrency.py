@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI
+
+import agents.agent_loader as agent_loader
+from agents.agent_loader import AgentLoader
+from agents.general_codes.provider_registry import get_provider_registry
+from app.routes.agents import router
+from modules.agents.gemini_agent import GeminiAgent
+
+
+CALL_SECONDS = 0.2
+CONCURRENT_REQUESTS = 5
+
+
+class _SlowGeminiModel:
+    """Stands in for genai.GenerativeModel with a fixed async latency."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(CALL_SECONDS)
+        finally:
+            self.in_flight -= 1
+        return SimpleNamespace(text="ok")
+
+
+def test_concurrent_agent_requests_overlap(tmp_path, monkeypatch):
+    agent_dir = tmp_path / "echo"
+    agent_dir.mkdir()
+    (agent_dir / "prompt.txt").write_text("Echo the input.")
+
+    provider = GeminiAgent(api_key="test-key")
+    provider.model = _SlowGeminiModel()
+
+    get_provider_registry().register(provider)
+    monkeypatch.setattr(agent_loader, "_loader", AgentLoader(agents_dir=tmp_path))
+
+    app = FastAPI()
+    app.include_router(router)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[
+                client.post("/agents/echo", json={"input": f"message {i}"})
+                for i in range(CONCURRENT_REQUESTS)
+            ])
+
+    responses = asyncio.run(run())
+
+    assert [r.status_code for r in responses] == [200] * CONCURRENT_REQUESTS
+    assert all(r.json()["data"] == {"result": "ok"} for r in responses)
+    # Blocking calls would run one at a time
+    assert provider.model.max_in_flight == CONCURRENT_REQUESTS
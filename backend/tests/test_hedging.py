@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import pytest
+
+from agents.general_codes import hedging
+from agents.general_codes.ai_model_selector import AIModelSelector
+from agents.general_codes.hedging import HedgePolicy, LatencyTracker
+from modules.agents.mock_agent import MockAgent
+
+
+class _Scripted(MockAgent):
+    """Takes the next scripted latency per call; records cancellations."""
+
+    latencies = [0.0]
+    cancelled = 0
+
+    async def _simulate(self):
+        latency = self.latencies[min(self.calls, len(self.latencies) - 1)]
+        self.calls += 1
+        try:
+            await asyncio.sleep(latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+@pytest.fixture
+def scripted(mock_provider):
+    def register(provider_type, model_name, latencies):
+        provider = mock_provider(provider_type, model_name, agent_class=_Scripted)
+        provider.latencies = latencies
+        return provider
+
+    return register
+
+
+def test_percentile_uses_nearest_rank():
+    tracker = LatencyTracker()
+    for value in range(1, 101):
+        tracker.observe("m", value / 100)
+
+    assert tracker.percentile("m", 95) == 0.95
+    assert tracker.percentile("other", 95) is None
+
+
+def test_slow_call_is_hedged_to_equivalent_model(monkeypatch, scripted):
+    primary = scripted("openai", "gpt-4o-mini", [1.0])
+    backup = scripted("gemini", "gemini-2.0-flash", [0.01])
+    policy = HedgePolicy(
+        enabled=False, percentile=95, budget=1.0, min_samples=5,
+        equivalents={"gpt-4o-mini": ["gemini-2.0-flash"]}
+    )
+    for _ in range(5):
+        policy.latencies.observe("gpt-4o-mini", 0.05)
+    monkeypatch.setattr(hedging, "_hedge_policy", policy)
+
+    async def run():
+        started = time.monotonic()
+        await AIModelSelector().generate("hi", model="gpt-4o-mini", hedge=True)
+        await asyncio.sleep(0)
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(run())
+
+    assert backup.calls == 1
+    assert elapsed < 0.5
+    assert primary.cancelled == 1
+    assert policy.hedges == 1 and policy.hedge_wins == 1
+
+
+def test_unusable_hedge_target_leaves_primary_call(monkeypatch, scripted):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    primary = scripted("openai", "gpt-4o-mini", [0.1])
+    policy = HedgePolicy(
+        enabled=True, percentile=95, budget=1.0, min_samples=5,
+        equivalents={"gpt-4o-mini": ["gemini-2.0-flash"]}
+    )
+    for _ in range(5):
+        policy.latencies.observe("gpt-4o-mini", 0.01)
+    monkeypatch.setattr(hedging, "_hedge_policy", policy)
+
+    # The hedge target cannot be built without GEMINI_API_KEY
+    assert asyncio.run(AIModelSelector().generate("hi", model="gpt-4o-mini"))
+    assert primary.calls == 1 and primary.cancelled == 0
+    assert policy.hedges == 0
+    assert policy.try_spend()
+
+
+def test_hedge_budget_caps_hedge_rate(monkeypatch, scripted):
+    provider = scripted("openai", "gpt-4o-mini", [0.05] * 5 + [0.2] * 20)
+    policy = HedgePolicy(enabled=True, percentile=50, budget=0.1, min_samples=5, equivalents={})
+    monkeypatch.setattr(hedging, "_hedge_policy", policy)
+
+    async def run():
+        selector = AIModelSelector()
+        for _ in range(25):
+            await selector.generate("hi", model="gpt-4o-mini")
+
+    asyncio.run(run())
+
+    # 25 requests at a 10% budget allow at most 2 hedges
+    assert 1 <= policy.hedges <= 2
+    assert provider.calls == 25 + policy.hedges
+
+
+def test_hedging_is_opt_in(monkeypatch, scripted):
+    provider = scripted("openai", "gpt-4o-mini", [0.01])
+    policy = HedgePolicy(enabled=False, min_samples=1, budget=1.0, equivalents={})
+    policy.latencies.observe("gpt-4o-mini", 0.001)
+    monkeypatch.setattr(hedging, "_hedge_policy", policy)
+
+    asyncio.run(AIModelSelector().generate("hi", model="gpt-4o-mini"))
+
+    assert provider.calls == 1
+    assert policy.requests == 0
@@ -0,0 +1,69 @@
+import asyncio
+
+from aiohttp import web
+
+from modules.agents.http_client import HTTPClientPool
+from modules.agents import ollama_agent
+from modules.agents.ollama_agent import OllamaAgent
+
+
+async def _start_ollama_stub(peers):
+    async def generate(request):
+        peers.add(request.transport.get_extra_info("peername"))
+        payload = await request.json()
+        return web.json_response({"response": f"echo: {payload['prompt']}"})
+
+    async def tags(request):
+        peers.add(request.transport.get_extra_info("peername"))
+        return web.json_response({"models": []})
+
+    app = web.Application()
+    app.router.add_post("/api/generate", generate)
+    app.router.add_get("/api/tags", tags)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_ollama_reuses_pooled_connection(monkeypatch):
+    pool = HTTPClientPool(limit_per_host=4)
+    monkeypatch.setattr(ollama_agent, "get_http_pool", lambda: pool)
+
+    async def run():
+        peers = set()
+        runner, base_url = await _start_ollama_stub(peers)
+        try:
+            agent = OllamaAgent(base_url=base_url)
+            assert await agent.is_available()
+            results = [await agent.generate(f"message {i}") for i in range(5)]
+            stats = pool.stats()
+            await pool.close()
+            return results, peers, stats, base_url
+        finally:
+            await runner.cleanup()
+
+    results, peers, stats, base_url = asyncio.run(run())
+
+    assert results == [f"echo: message {i}" for i in range(5)]
+    # Health probe and all generations share one keep-alive connection
+    assert len(peers) == 1
+    assert stats == {base_url: {"sessions": 1, "limit": 4}}
+    assert pool.stats() == {}
+
+
+def test_host_limits():
+    pool = HTTPClientPool(limit_per_host=8)
+    pool.set_host_limit("http://localhost:11434/api", 2)
+
+    async def run():
+        local = pool.session("http://localhost:11434")
+        other = pool.session("https://api.example.com/v1")
+        same = pool.session("http://localhost:11434/api/generate")
+        limits = (local.connector.limit, other.connector.limit)
+        await pool.close()
+        return local is same, limits
+
+    assert asyncio.run(run()) == (True, (2, 8))
@@ -0,0 +1,59 @@
+"""Import-time guard: provider SDKs must only load when a provider is used."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).parent.parent
+PROVIDER_SDKS = ("google.generativeai", "grpc", "openai", "groq", "aiohttp")
+
+
+def _import_report(code):
+    """Run code under ``python -X importtime`` and return {module: cumulative_us}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    report = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            # Header line
+            continue
+        report[module.strip()] = int(cumulative_us)
+    return report
+
+
+def _print_slowest(title, report, count=10):
+    print(f"\n{title}")
+    for module, cumulative in sorted(report.items(), key=lambda item: -item[1])[:count]:
+        print(f"  {cumulative / 1000:8.1f} ms  {module}")
+
+
+def test_agent_stack_does_not_import_provider_sdks():
+    report = _import_report(
+        "import agents.agent_loader, agents.general_codes.ai_model_selector, "
+        "modules.interactive.ai_chat.module"
+    )
+    _print_slowest("Agent stack imports", report)
+
+    loaded = [sdk for sdk in PROVIDER_SDKS if sdk in report]
+    assert loaded == []
+
+
+def test_provider_sdk_imported_on_first_use():
+    report = _import_report(
+        "from agents.general_codes.provider_registry import get_provider_class; "
+        "get_provider_class('ollama')"
+    )
+
+    assert "aiohttp" in report
+    assert "openai" not in report
+    assert "google.generativeai" not in report
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+from agents.agent_loader import AgentLoader
+from agents.general_codes.micro_batcher import get_micro_batcher
+from modules.agents.mock_agent import MockAgent
+from modules.agents.token_estimator import estimate_tokens
+from modules.agents.usage import report_usage, track_usage
+
+
+class _Scorer(MockAgent):
+    """Scores each input by its length; batch prompts get one result per numbered input."""
+
+    shuffle_indexes = False
+    fail_batches = False
+
+    def __init__(self, model_name, **kwargs):
+        super().__init__(model_name, **kwargs)
+        self.prompts = []
+
+    async def generate_structured(self, prompt, response_model, system_prompt=None, **kwargs):
+        self.prompts.append((prompt, system_prompt, kwargs["max_tokens"]))
+        await self._simulate()
+        report_usage(100, 10)
+        if "results" not in response_model.model_fields:
+            return response_model(label=prompt, score=len(prompt))
+
+        if self.fail_batches:
+            raise RuntimeError("Connection reset by peer")
+
+        inputs = re.findall(r"### Input (\d+)\n(.*)", prompt)
+        results = [{"index": int(index), "label": text, "score": len(text)} for index, text in inputs]
+        if self.shuffle_indexes:
+            results[0]["index"] = len(results)
+        return response_model(results=results)
+
+
+@pytest.fixture
+def scorer(tmp_path, mock_provider):
+
+    agent_dir = tmp_path / "triage"
+    agent_dir.mkdir()
+    (agent_dir / "prompt.txt").write_text("Score the input.\n\n{input_data}")
+    (agent_dir / "info.txt").write_text("name: triage\nbatch_size: 4\nbatch_window_ms: 50\n")
+    (agent_dir / "structure_output.json").write_text(json.dumps({
+        "type": "object",
+        "properties": {"label": {"type": "string"}, "score": {"type": "integer"}},
+        "required": ["label", "score"]
+    }))
+
+    def build(shuffle_indexes=False, fail_batches=False, provider_type="gemini", model_name="gemini-2.0-flash-exp"):
+        provider = mock_provider(provider_type, model_name, agent_class=_Scorer, latency="fixed:0.01")
+        provider.shuffle_indexes = shuffle_indexes
+        provider.fail_batches = fail_batches
+        return AgentLoader(agents_dir=tmp_path, default_provider=provider_type).load_agent("triage"), provider
+
+    return build
+
+
+async def _burst(agent, inputs, **kwargs):
+    async def one(text):
+        with track_usage() as usage:
+            result = await agent.process(text, **kwargs)
+        return result, usage.total_tokens
+
+    return await asyncio.gather(*(one(text) for text in inputs))
+
+
+def test_concurrent_calls_share_one_prompt(scorer):
+    agent, provider = scorer()
+    inputs = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+    results = asyncio.run(_burst(agent, inputs))
+
+    # The first call runs alone; the four that arrive while it is in flight fill one batch
+    assert [result for result, _ in results] == [{"label": text, "score": len(text)} for text in inputs]
+    assert len(provider.prompts) == 2
+    prompt, system_prompt, max_tokens = provider.prompts[1]
+    assert "### Input 3\neeeee" in prompt
+    assert "{input_data}" not in system_prompt and "BATCH MODE" in system_prompt
+    assert max_tokens == 4 * agent.ai_provider.max_tokens
+    # Batch usage is split between its callers
+    assert [tokens for _, tokens in results] == [110, 27, 27, 27, 27]
+
+    stats = get_micro_batcher().stats()["triage"]
+    assert (stats["batches"], stats["batched_calls"], stats["avg_batch_size"]) == (1, 4, 4.0)
+
+
+def test_mismatched_batch_falls_back_to_single_calls(scorer):
+    agent, provider = scorer(shuffle_indexes=True)
+    inputs = ["a", "bb", "ccc"]
+
+    results = asyncio.run(_burst(agent, inputs))
+
+    assert [result for result, _ in results] == [{"label": text, "score": len(text)} for text in inputs]
+    # One single call, one rejected batch of two, then two single calls
+    assert len(provider.prompts) == 4
+    assert get_micro_batcher().stats()["triage"]["fallbacks"] == 1
+
+
+def test_failed_batch_falls_back_to_single_calls(scorer):
+    agent, provider = scorer(fail_batches=True)
+    inputs = ["a", "bb", "ccc"]
+
+    results = asyncio.run(_burst(agent, inputs))
+
+    assert [result for result, _ in results] == [{"label": text, "score": len(text)} for text in inputs]
+    assert get_micro_batcher().stats()["triage"]["fallbacks"] == 1
+
+
+def test_batch_output_fits_the_model(scorer):
+    agent, provider = scorer(provider_type="deepinfra", model_name="openai/gpt-oss-20b")
+    inputs = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+    results = asyncio.run(_burst(agent, inputs, model="gpt-oss-20b", max_tokens=2048))
+
+    assert [result for result, _ in results] == [{"label": text, "score": len(text)} for text in inputs]
+    # Four answers of 2048 tokens would not fit gpt-oss-20b's 8192-token window with the prompt
+    prompt, system_prompt, max_tokens = provider.prompts[1]
+    assert "### Input 3" in prompt
+    assert 2048 <= max_tokens < 4 * 2048
+    assert estimate_tokens(system_prompt) + estimate_tokens(prompt) + max_tokens <= 8192
+
+
+def test_lone_and_opted_out_calls_are_not_batched(scorer):
+    agent, provider = scorer()
+
+    assert asyncio.run(agent.process("solo")) == {"label": "solo", "score": 4}
+    asyncio.run(_burst(agent, ["a", "bb", "ccc"], batch=False))
+
+    assert all("### Input" not in prompt for prompt, _, _ in provider.prompts)
+    assert agent.get_info()["batch_size"] == 4
@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+import httpx
+import openai
+import pytest
+
+from agents.agent_loader import AgentLoader
+from agents.general_codes.ai_model_selector import AIModelSelector
+from agents.general_codes.model_router import ModelRouter, RoutePolicy
+from agents.general_codes.retry_policy import classify_error, retry_after
+from modules.agents.mock_agent import MockAgent, MockBehavior, MockProviderError
+from modules.agents.mock_server import create_app
+
+
+def test_structured_outputs_are_valid_and_deterministic_for_every_agent():
+    loader = AgentLoader(default_provider="mock")
+    for agent_id in loader.discover_agents():
+        agent = loader.load_agent(agent_id)
+        if not agent.output_schema:
+            continue
+        first = asyncio.run(agent.process("Quarterly results beat expectations", temperature=0))
+        second = asyncio.run(agent.process("Quarterly results beat expectations", temperature=0, cache=False))
+        assert first == second
+        assert set(agent.output_schema["required"]) <= set(first)
+
+
+def test_latency_distribution_is_seeded():
+    draws = [MockBehavior(seed=3, latency="uniform:0.1,0.2").sample_latency() for _ in range(2)]
+    assert draws[0] == draws[1]
+    assert 0.1 <= draws[0] <= 0.2
+
+    behavior = MockBehavior(latency="lognormal:-2,0.5")
+    assert all(value > 0 for value in (behavior.sample_latency() for _ in range(50)))
+
+    with pytest.raises(ValueError):
+        MockBehavior(latency="pareto:1")
+
+
+def test_injected_errors_and_quota_look_like_provider_failures():
+    agent = MockAgent(behavior=MockBehavior(error_rate=1.0))
+    with pytest.raises(MockProviderError) as failure:
+        asyncio.run(agent.generate("hi"))
+    assert classify_error(failure.value) == "server"
+
+    agent = MockAgent(behavior=MockBehavior(rpm=2))
+
+    async def burst():
+        for _ in range(3):
+            await agent.generate("hi")
+
+    with pytest.raises(MockProviderError) as failure:
+        asyncio.run(burst())
+    assert classify_error(failure.value) == "rate_limit"
+    assert 59 < retry_after(failure.value) <= 60
+
+
+def test_mock_is_never_routed_but_can_be_forced(monkeypatch):
+    assert "mock" not in ModelRouter().candidates(RoutePolicy())
+
+    monkeypatch.setenv("LLM_FORCE_MODEL", "mock")
+    result = asyncio.run(AIModelSelector().generate("hi", model="gpt-4o"))
+    assert result.startswith("Mock response:")
+
+
+def _client(app):
+    return openai.AsyncOpenAI(
+        api_key="mock",
+        base_url="http://mock/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    )
+
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "should_process": {"type": "boolean"},
+        "relevance_score": {"type": "number"},
+        "domains": {"type": "array", "items": {"type": "string", "enum": ["tech", "finance"]}}
+    },
+    "required": ["should_process", "relevance_score", "domains"]
+}
+
+
+def test_openai_compatible_server_with_sdk():
+    client = _client(create_app(MockBehavior()))
+
+    async def run():
+        response = await client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": "triage this"}],
+            response_format={"type": "json_schema", "json_schema": {"name": "triage", "schema": SCHEMA}}
+        )
+        stream = await client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": "triage this"}],
+            response_format={"type": "json_schema", "json_schema": {"name": "triage", "schema": SCHEMA}},
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        chunks = [chunk async for chunk in stream]
+        return response, chunks
+
+    response, chunks = asyncio.run(run())
+
+    data = json.loads(response.choices[0].message.content)
+    assert set(data) == set(SCHEMA["properties"])
+    assert all(domain in ("tech", "finance") for domain in data["domains"])
+    assert response.usage.prompt_tokens > 0
+
+    streamed = "".join(chunk.choices[0].delta.content or "" for chunk in chunks if chunk.choices)
+    assert json.loads(streamed) == data
+    assert chunks[-1].usage.completion_tokens == response.usage.completion_tokens
+
+
+def test_server_injects_rate_limits_with_retry_after():
+    client = _client(create_app(MockBehavior(rate_limit_rate=1.0, retry_after=2)))
+
+    with pytest.raises(openai.RateLimitError) as failure:
+        asyncio.run(client.chat.completions.create(model="m", messages=[{"role": "user", "content": "hi"}]))
+    assert retry_after(failure.value) == 2.0
+
+
+def test_ollama_compatible_server_streams_ndjson():
+    async def run():
+        transport = httpx.ASGITransport(app=create_app(MockBehavior()))
+        async with httpx.AsyncClient(transport=transport, base_url="http://mock") as client:
+            request = {"model": "llama3.2", "prompt": "hi", "format": SCHEMA}
+            single = await client.post("/api/generate", json={**request, "stream": False})
+            streamed = await client.post("/api/generate", json=request)
+            return single.json(), [json.loads(line) for line in streamed.text.splitlines()]
+
+    single, lines = asyncio.run(run())
+
+    assert lines[-1]["done"] and lines[-1]["eval_count"] == single["eval_count"]
+    assert json.loads("".join(line["response"] for line in lines)) == json.loads(single["response"])
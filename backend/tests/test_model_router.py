@@ -0,0 +1,96 @@
+import asyncio
+
+from agents.general_codes.ai_model_selector import AIModelSelector
+from agents.general_codes.circuit_breaker import get_circuit_breakers
+from agents.general_codes.model_router import ModelRouter, RoutePolicy, get_model_router
+
+
+def test_capability_filters():
+    router = ModelRouter()
+
+    candidates = router.candidates(RoutePolicy(min_quality=5))
+    assert candidates == ["gpt-4o"]
+
+    large = router.candidates(RoutePolicy(min_context=500000, providers=("gemini",)))
+    assert set(large) == {"gemini-2.0-flash-exp", "gemini-2.0-flash", "gemini-1.5-pro", "gemini-1.5-flash"}
+
+    # Endpoints registered under two names are considered once
+    deepinfra = router.candidates(RoutePolicy(providers=("deepinfra",)))
+    assert deepinfra == ["gpt-oss-20b"]
+
+
+def test_objectives_use_live_latency_and_pricing():
+    router = ModelRouter(default_latency=5.0)
+    policy = RoutePolicy(objective="latency", min_quality=3, providers=("openai", "groq"))
+
+    router.observe("llama-3.3-70b-versatile", 0.4)
+    router.observe("gpt-4o-mini", 1.5)
+    assert router.route(policy, 1000, 500) == "llama-3.3-70b-versatile"
+
+    # Cost objective prefers the cheapest qualifying model regardless of latency
+    assert router.route(RoutePolicy(objective="cost", min_quality=3, providers=("openai", "groq")), 1000, 500) == "gpt-4o-mini"
+
+    # Errors make a fast model look slow
+    for _ in range(10):
+        router.observe("llama-3.3-70b-versatile", error=True)
+    assert router.route(policy, 1000, 500) == "gpt-4o-mini"
+
+    assert router.decisions["latency"] == {"llama-3.3-70b-versatile": 1, "gpt-4o-mini": 1}
+    assert router.last_decision["model"] == "gpt-4o-mini"
+
+
+def test_local_and_untried_models_do_not_win_by_default(monkeypatch):
+    monkeypatch.delenv("OLLAMA_BASE_URL", raising=False)
+    router = ModelRouter()
+    router.observe("gemini-2.0-flash-exp", 3.0)
+
+    assert router.route(RoutePolicy(objective="cost"), 1000, 500) == "gemini-2.0-flash-exp"
+    # Untried models are assumed as slow as the slowest observed one
+    assert router.route(RoutePolicy(objective="latency"), 1000, 500) == "gemini-2.0-flash-exp"
+    assert "llama3.2" not in router.candidates(RoutePolicy())
+
+    monkeypatch.setenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    assert "llama3.2" in router.candidates(RoutePolicy())
+
+
+def test_open_breakers_are_skipped():
+    router = ModelRouter()
+    policy = RoutePolicy(objective="cost", min_quality=3, providers=("deepinfra", "openai"))
+    assert router.route(policy, 1000, 500) == "gpt-oss-20b"
+
+    get_circuit_breakers().get("deepinfra", "openai/gpt-oss-20b").trip("missing API key")
+
+    assert router.route(policy, 1000, 500) == "gpt-4o-mini"
+
+
+def test_context_requirement_includes_prompt_size():
+    router = ModelRouter()
+    policy = RoutePolicy(objective="cost", providers=("groq",))
+
+    assert router.route(policy, 100, 100) == "llama-3.1-8b-instant"
+    assert router.route(policy, 60000, 1000) == "llama-3.1-8b-instant"
+    assert router.route(RoutePolicy(objective="cost", min_quality=3, providers=("groq",)), 60000, 1000) == "llama-3.1-70b-versatile"
+
+
+def test_selector_routes_and_records_latency(mock_provider):
+    provider = mock_provider("groq", "llama-3.1-8b-instant")
+
+    asyncio.run(AIModelSelector().generate(
+        "hi", route={"objective": "cost", "providers": ["groq"]}, max_tokens=50
+    ))
+
+    assert provider.calls == 1
+    assert get_model_router().stats()["models"]["llama-3.1-8b-instant"]["calls"] == 1
+
+
+def test_selector_falls_back_when_routed_model_has_no_provider(mock_provider, monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    provider = mock_provider("groq", "mixtral-8x7b-32768")
+    policy = {"objective": "cost", "providers": ["groq"]}
+
+    # llama-3.1-8b-instant is the cheapest but cannot be created without an API key
+    for _ in range(2):
+        asyncio.run(AIModelSelector().generate("hi", route=policy, max_tokens=50))
+
+    assert provider.calls == 2
+    assert get_model_router().decisions["cost"] == {"llama-3.1-8b-instant": 1, "mixtral-8x7b-32768": 2}
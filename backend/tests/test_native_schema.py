@@ -0,0 +1,129 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from agents.general_codes.provider_registry import ProviderRegistry
+from agents.general_codes.structure_handler import create_response_model
+from modules.agents.gemini_agent import GeminiAgent
+from modules.agents.native_schema import gemini_response_schema, openai_response_format
+from modules.agents.openai_agent import OpenAIAgent
+
+
+NESTED = create_response_model({
+    "properties": {
+        "label": {"type": "string", "enum": ["a", "b"], "description": "Label"},
+        "items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"text": {"type": "string"}},
+                "required": ["text"]
+            }
+        }
+    },
+    "required": ["label"]
+}, model_name="NativeResponse")
+
+FREE_FORM = create_response_model({
+    "properties": {"payload": {"type": "object"}},
+    "required": ["payload"]
+}, model_name="FreeFormResponse")
+
+
+def test_openai_strict_schema():
+    response_format = openai_response_format(NESTED.model_json_schema(), "NativeResponse")
+    schema = response_format["json_schema"]["schema"]
+
+    assert response_format["json_schema"]["strict"] is True
+    assert schema["additionalProperties"] is False
+    assert schema["required"] == ["label", "items"]
+    assert "default" not in schema["properties"]["items"]
+    assert schema["$defs"]["NestedObject"]["additionalProperties"] is False
+
+
+def test_openai_free_form_object_is_not_strict():
+    response_format = openai_response_format(FREE_FORM.model_json_schema(), "FreeFormResponse")
+
+    assert response_format["json_schema"]["strict"] is False
+    assert response_format["json_schema"]["schema"] == FREE_FORM.model_json_schema()
+
+
+def test_gemini_response_schema():
+    schema = gemini_response_schema(NESTED.model_json_schema())
+
+    assert schema["properties"]["label"] == {"type": "string", "description": "Label"}
+    assert schema["properties"]["items"]["nullable"] is True
+    assert schema["properties"]["items"]["items"]["properties"] == {"text": {"type": "string"}}
+    assert gemini_response_schema(FREE_FORM.model_json_schema()) is None
+
+    enum_schema = gemini_response_schema({
+        "type": "object",
+        "properties": {"label": {"type": "string", "enum": ["a", "b"]}}
+    })
+    assert enum_schema["properties"]["label"] == {"type": "string", "format": "enum", "enum": ["a", "b"]}
+
+
+class _FakeGeminiModel:
+    def __init__(self, text):
+        self.text = text
+        self.calls = []
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.calls.append((prompt, generation_config))
+        return SimpleNamespace(text=self.text)
+
+
+def test_gemini_sends_response_schema_instead_of_prompt_schema():
+    agent = GeminiAgent(api_key="test-key")
+    agent.model = _FakeGeminiModel('{"label": "a"}')
+
+    result = asyncio.run(agent.generate_structured("hi", NESTED, system_prompt="sys"))
+    prompt, config = agent.model.calls[0]
+
+    assert result.label == "a"
+    assert "schema" not in prompt
+    assert config.response_schema["required"] == ["label"]
+
+    asyncio.run(agent.generate_structured("hi", NESTED, native_schema=False))
+    prompt, config = agent.model.calls[1]
+    assert "matches this schema" in prompt
+    assert config.response_schema is None
+
+
+class _FakeCompletions:
+    def __init__(self, message):
+        self.message = message
+        self.requests = []
+
+    async def create(self, **request):
+        self.requests.append(request)
+        return SimpleNamespace(choices=[SimpleNamespace(message=self.message)])
+
+
+def test_openai_uses_response_format_for_flagged_models(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    agent = ProviderRegistry().get("openai", "gpt-4o-mini")
+    completions = _FakeCompletions(SimpleNamespace(content=json.dumps({"label": "b"}), refusal=None))
+    agent.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    result = asyncio.run(agent.generate_structured("hi", NESTED))
+
+    assert result.label == "b"
+    assert completions.requests[0]["response_format"]["type"] == "json_schema"
+    assert "tools" not in completions.requests[0]
+
+
+def test_openai_native_schema_follows_registry(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    registry = ProviderRegistry()
+
+    assert OpenAIAgent(model_name="gpt-4-turbo", api_key="test-key").supports_native_schema is False
+    assert registry.get("openai", "gpt-3.5-turbo").supports_native_schema is False
+    assert registry.get("openai", "gpt-4o").supports_native_schema is True
+
+
+def test_parse_structured_fallbacks():
+    agent = OpenAIAgent(api_key="test-key")
+
+    assert agent._parse_structured('```json\n{"label": "a"}\n```', NESTED).label == "a"
+    assert agent._parse_structured('Sure! {"label": "b"} Done.', NESTED).label == "b"
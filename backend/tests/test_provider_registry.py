@@ -0,0 +1,52 @@
+import asyncio
+
+from agents.general_codes.ai_model_selector import AIModelSelector
+from agents.general_codes.provider_registry import ProviderRegistry, get_provider_registry
+from modules.agents.mock_agent import MockAgent
+
+
+def test_models_share_one_sdk_client(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key-shared")
+    registry = ProviderRegistry()
+
+    mini = registry.get("openai", "gpt-4o-mini")
+    full = registry.get("openai", "gpt-4o")
+
+    assert registry.get("openai", "gpt-4o-mini") is mini
+    assert mini is not full
+    assert mini.client is full.client
+    assert registry.stats() == {"openai": 2}
+
+
+def test_default_model_from_environment(monkeypatch):
+    monkeypatch.setenv("OLLAMA_MODEL", "gemma2")
+
+    assert ProviderRegistry().get("ollama").model_name == "gemma2"
+
+
+class _Recording(MockAgent):
+    def __init__(self, model_name, **kwargs):
+        super().__init__(model_name, **kwargs)
+        self.params = []
+
+    async def generate(self, prompt, system_prompt=None, **kwargs):
+        self.params.append(kwargs)
+        return await super().generate(prompt, system_prompt, **kwargs)
+
+
+def test_selector_passes_generation_params_per_call(mock_provider):
+    provider = mock_provider("gemini", "gemini-2.0-flash", agent_class=_Recording)
+
+    selector = AIModelSelector()
+
+    async def run():
+        await selector.generate("a", model="gemini-2.0-flash", temperature=0.1, max_tokens=10)
+        await selector.generate("b", model="gemini-2.0-flash", temperature=0.9, max_tokens=20)
+
+    asyncio.run(run())
+
+    assert provider.params == [
+        {"temperature": 0.1, "max_tokens": 10},
+        {"temperature": 0.9, "max_tokens": 20}
+    ]
+    assert get_provider_registry().stats() == {"gemini": 1}
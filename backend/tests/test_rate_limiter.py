@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+from agents.general_codes import rate_limiter
+from agents.general_codes.ai_model_selector import AIModelSelector
+from agents.general_codes.rate_limiter import QuotaGovernor
+from modules.agents.mock_agent import MockAgent
+from modules.agents.usage import report_usage
+
+
+def test_requests_wait_for_rpm_in_fifo_order():
+    # Bucket holds 2 requests and refills one every 0.5s
+    governor = QuotaGovernor(limits={"gemini": {"rpm": 2}}, headroom=1.0)
+    governor._scope("provider:gemini", "gemini").requests.rate = 2.0
+    order = []
+
+    async def call(index):
+        await governor.acquire("gemini", "gemini-2.0-flash", 10)
+        order.append(index)
+
+    async def run():
+        started = time.monotonic()
+        await asyncio.gather(*(call(i) for i in range(4)))
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(run())
+
+    assert order == [0, 1, 2, 3]
+    assert 0.9 < elapsed < 2.0
+
+
+def test_reconcile_refunds_overestimated_tokens():
+    governor = QuotaGovernor(limits={"gpt-4o": {"tpm": 1000}}, headroom=1.0)
+
+    async def run():
+        return await governor.acquire("openai", "gpt-4o", 600)
+
+    reservation = asyncio.run(run())
+    assert governor.stats()["model:gpt-4o"]["tokens_available"] < 401
+
+    governor.reconcile(reservation, 100)
+    assert governor.stats()["model:gpt-4o"]["tokens_available"] >= 900
+
+
+def test_headroom_and_registry_limits():
+    governor = QuotaGovernor(limits={}, headroom=0.5)
+
+    async def run():
+        return await governor.acquire("groq", "m", 10, {"rpm": 100, "tpm": 1000})
+
+    asyncio.run(run())
+    stats = governor.stats()["model:m"]
+
+    # Capacity is halved and the call taken (buckets refill while the test runs)
+    assert stats["requests_available"] <= 49.5
+    assert stats["tokens_available"] <= 495
+
+
+class _FixedUsage(MockAgent):
+    def _report(self, prompt, system_prompt, text):
+        report_usage(40, 10)
+
+
+def test_selector_reconciles_with_reported_usage(monkeypatch, mock_provider):
+    mock_provider("openai", "gpt-4o", agent_class=_FixedUsage)
+    governor = QuotaGovernor(limits={"openai": {"tpm": 10000}}, headroom=1.0)
+    monkeypatch.setattr(rate_limiter, "_quota_governor", governor)
+
+    asyncio.run(AIModelSelector().generate("hello", model="gpt-4o", max_tokens=2000))
+
+    # The 2000-token output reservation is refunded down to the 50 tokens used
+    available = governor.stats()["provider:openai"]["tokens_available"]
+    assert 9940 <= available <= 9960
@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from pydantic import BaseModel
+
+from agents.agent_loader import AgentLoader
+from agents.general_codes import response_cache
+from agents.general_codes.ai_model_selector import AIModelSelector
+from agents.general_codes.response_cache import ResponseCache
+from modules.agents.mock_agent import MockAgent
+from modules.agents.usage import report_usage
+
+
+def test_memory_tier_is_lru_with_ttl():
+    cache = ResponseCache(max_entries=2, path="")
+
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+    cache.set("c", {"v": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+
+    cache.set("short", "x", ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+
+
+def test_disk_tier_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    ResponseCache(path=path).set("k", {"answer": 42}, tokens=120)
+
+    other = ResponseCache(path=path)
+    assert other.get("k") == {"answer": 42}
+    assert other.get("k") == {"answer": 42}
+
+    stats = other.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["saved_tokens"]) == (1, 1, 240)
+
+
+def test_async_access_keeps_sqlite_off_the_event_loop(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"))
+    connect = cache._connection
+    threads = []
+
+    def connection():
+        threads.append(threading.current_thread())
+        return connect()
+
+    cache._connection = connection
+
+    async def run():
+        await cache.aset("k", {"answer": 42})
+        cache._memory.clear()
+        return await cache.aget("k"), await cache.aget("k")
+
+    assert asyncio.run(run()) == ({"answer": 42}, {"answer": 42})
+    # One write and one disk read; the second read is served from memory
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+
+
+class _FixedUsage(MockAgent):
+    def _report(self, prompt, system_prompt, text):
+        report_usage(30, 10)
+
+
+@pytest.fixture
+def provider(tmp_path, monkeypatch, mock_provider):
+    provider = mock_provider("gemini", agent_class=_FixedUsage)
+    monkeypatch.setattr(response_cache, "_response_cache", ResponseCache(path=str(tmp_path / "c.sqlite3")))
+    return provider
+
+
+def _agent(tmp_path, info=""):
+    agent_dir = tmp_path / "agents" / "summarize"
+    agent_dir.mkdir(parents=True)
+    (agent_dir / "prompt.txt").write_text("Summarize.")
+    (agent_dir / "info.txt").write_text(info)
+    return AgentLoader(agents_dir=tmp_path / "agents").load_agent("summarize")
+
+
+def test_agent_caches_deterministic_calls_only(tmp_path, provider):
+    agent = _agent(tmp_path, "name: Summarize\ncache_ttl: 60\n")
+
+    async def run():
+        first = await agent.process("post", temperature=0)
+        second = await agent.process("post", temperature=0)
+        await agent.process("post", temperature=0.7)
+        await agent.process("post", temperature=0.7)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first == second
+    assert first["result"].startswith("Mock response")
+    assert provider.calls == 3
+    stats = response_cache._response_cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["saved_tokens"] == 40
+
+
+def test_agent_cache_modes(tmp_path, provider):
+    agent = _agent(tmp_path, "name: Summarize\ncache: always\n")
+
+    async def run():
+        await agent.process("post")
+        await agent.process("post")
+        await agent.process("post", cache=False)
+
+    asyncio.run(run())
+
+    assert provider.calls == 2
+
+
+class _Label(BaseModel):
+    label: str
+
+
+def test_selector_caches_structured_output(provider):
+    selector = AIModelSelector()
+
+    async def run():
+        return [
+            await selector.generate_structured("hi", _Label, model="gemini", temperature=0)
+            for _ in range(2)
+        ]
+
+    results = asyncio.run(run())
+
+    assert results[0] == results[1]
+    assert isinstance(results[1], _Label)
+    assert provider.calls == 1
+
+
+def test_structured_calls_do_not_regenerate_the_schema(provider, monkeypatch):
+    class _Tag(BaseModel):
+        tag: str
+
+    generated = []
+    original = _Tag.model_json_schema.__func__
+
+    def counting(cls, *args, **kwargs):
+        generated.append(cls)
+        return original(cls, *args, **kwargs)
+
+    monkeypatch.setattr(_Tag, "model_json_schema", classmethod(counting))
+    selector = AIModelSelector()
+
+    async def run():
+        for temperature in (0.7, 0.7, 0, 0):
+            await selector.generate_structured("hi", _Tag, model="gemini", temperature=temperature)
+
+    asyncio.run(run())
+
+    # Built once for the provider's schema cache, not once per call
+    assert len(generated) == 1
+    assert provider.calls == 3
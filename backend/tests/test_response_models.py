@@ -0,0 +1,58 @@
+from agents.agent_loader import AgentLoader
+from agents.general_codes.structure_handler import create_response_model
+from modules.agents.ollama_agent import OllamaAgent
+
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "should_process": {"type": "boolean", "description": "Keep the input"},
+        "entity_hints": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"text": {"type": "string"}}
+            }
+        },
+        "owner": {
+            "type": "object",
+            "properties": {"name": {"type": "string"}},
+            "required": ["name"]
+        }
+    },
+    "required": ["should_process"]
+}
+
+
+def test_create_response_model_is_cached():
+    model = create_response_model(SCHEMA, model_name="CachedResponse")
+
+    assert create_response_model(dict(SCHEMA), model_name="CachedResponse") is model
+    assert list(model.model_fields) == ["should_process", "entity_hints", "owner"]
+    assert create_response_model(SCHEMA, model_name="OtherResponse") is not model
+
+    nested = model.model_fields["owner"].annotation.__args__[0]
+    assert nested is create_response_model(
+        {"properties": {"name": {"type": "string"}}, "required": ["name"]},
+        model_name="NestedObject"
+    )
+
+
+def test_agent_model_and_prompt_fragment_built_once(tmp_path):
+    agent_dir = tmp_path / "alpha"
+    agent_dir.mkdir()
+    (agent_dir / "prompt.txt").write_text("Classify the input.")
+    (agent_dir / "structure_output.json").write_text(
+        '{"type": "object", "properties": {"ok": {"type": "boolean"}}, "required": ["ok"]}'
+    )
+
+    loader = AgentLoader(agents_dir=tmp_path, default_provider="ollama", poll_interval=0)
+    agent = loader.load_agent("alpha")
+
+    model = agent._create_pydantic_model()
+    assert agent._create_pydantic_model() is model
+
+    provider = OllamaAgent()
+    fragment = provider._format_schema_for_prompt(model)
+    assert provider._format_schema_for_prompt(model) is fragment
+    assert OllamaAgent()._get_schema(model) is provider._get_schema(model)
@@ -0,0 +1,120 @@
+import asyncio
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import openai
+import pytest
+
+from agents.general_codes import retry_policy
+from agents.general_codes.ai_model_selector import AIModelSelector
+from agents.general_codes.circuit_breaker import CircuitOpenError
+from agents.general_codes.llm_metrics import collect_llm_metrics
+from agents.general_codes.retry_policy import RetryPolicy, classify_error, retry_after
+from modules.agents.mock_agent import MockAgent
+
+
+def _status_error(status, headers=None):
+    response = httpx.Response(status, headers=headers or {}, request=httpx.Request("POST", "https://api.test"))
+    error_class = {429: openai.RateLimitError, 400: openai.BadRequestError}.get(status, openai.InternalServerError)
+    return error_class(f"HTTP {status}", response=response, body=None)
+
+
+def test_errors_are_classified():
+    assert classify_error(_status_error(429)) == "rate_limit"
+    assert classify_error(_status_error(503)) == "server"
+    assert classify_error(_status_error(400)) == "client"
+    assert classify_error(asyncio.TimeoutError()) == "timeout"
+    assert classify_error(openai.APIConnectionError(request=httpx.Request("POST", "https://api.test"))) == "connection"
+    assert classify_error(ValueError("Failed to parse structured output")) == "parse"
+    assert classify_error(CircuitOpenError("open")) == "circuit_open"
+    assert classify_error(RuntimeError("?")) == "unknown"
+
+
+def test_retry_after_header_forms():
+    assert retry_after(_status_error(429, {"retry-after": "3"})) == 3.0
+    assert retry_after(_status_error(429, {"retry-after-ms": "250"})) == 0.25
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 < retry_after(_status_error(429, {"retry-after": later})) <= 30
+    assert retry_after(_status_error(429)) is None
+
+
+def _flaky(errors, result="ok"):
+    calls = []
+
+    async def call():
+        calls.append(None)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return call, calls
+
+
+def test_transient_and_parse_failures_are_retried_within_limits():
+    policy = RetryPolicy(max_attempts=3, parse_attempts=2, base_delay=0)
+
+    call, calls = _flaky([_status_error(503), asyncio.TimeoutError()])
+    assert asyncio.run(policy.run(call)) == "ok"
+    assert len(calls) == 3
+
+    call, calls = _flaky([ValueError("bad json")])
+    assert asyncio.run(policy.run(call)) == "ok"
+    assert len(calls) == 2
+
+    call, calls = _flaky([ValueError("bad json"), ValueError("bad json")])
+    with pytest.raises(ValueError):
+        asyncio.run(policy.run(call))
+    assert len(calls) == 2
+
+    call, calls = _flaky([_status_error(400)])
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(policy.run(call))
+    assert len(calls) == 1
+
+    stats = policy.stats()
+    assert stats["retries"] == {"server": 1, "timeout": 1, "parse": 2}
+    assert stats["recovered"] == 2
+
+
+def test_backoff_is_jittered_and_honours_retry_after():
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+
+    delays = [policy.backoff(5, _status_error(503), "server") for _ in range(200)]
+    assert all(0 <= delay <= 4.0 for delay in delays)
+    assert len(set(delays)) > 1
+
+    assert policy.backoff(1, _status_error(429, {"retry-after": "2.5"}), "rate_limit") >= 2.5
+
+
+def test_no_retry_starts_past_the_deadline():
+    policy = RetryPolicy(max_attempts=5, base_delay=0, deadline=1.0)
+    call, calls = _flaky([_status_error(429, {"retry-after": "30"})])
+
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(policy.run(call))
+
+    assert len(calls) == 1
+    assert policy.stats()["deadline_exceeded"] == 1
+
+
+class _Flaky(MockAgent):
+    """Raises the scripted errors on its first calls."""
+
+    errors = []
+
+    async def _simulate(self):
+        await super()._simulate()
+        if self.errors:
+            raise self.errors.pop(0)
+
+
+def test_selector_retries_provider_calls_and_reports_metrics(monkeypatch, mock_provider):
+    provider = mock_provider("gemini", agent_class=_Flaky)
+    provider.errors = [_status_error(503), _status_error(429, {"retry-after-ms": "10"})]
+    monkeypatch.setattr(retry_policy, "_retry_policy", RetryPolicy(base_delay=0))
+
+    assert asyncio.run(AIModelSelector().generate("hi", model="gemini")).startswith("Mock response")
+
+    assert provider.calls == 3
+    assert collect_llm_metrics()["retries"]["retries"] == {"server": 1, "rate_limit": 1}
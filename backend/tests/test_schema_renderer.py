@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from agents.general_codes.structure_handler import create_response_model
+from modules.agents.schema_renderer import render_schema, schema_token_report
+from modules.agents.ollama_agent import OllamaAgent
+
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string", "description": "Short title"},
+        "score": {"type": "integer", "minimum": 0, "maximum": 100, "description": "Score"},
+        "items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "label": {"type": "string", "description": "Short title"}
+                },
+                "required": ["label"]
+            }
+        }
+    },
+    "required": ["title"]
+}
+
+
+@pytest.fixture
+def model_schema():
+    return create_response_model(SCHEMA, model_name="RenderResponse").model_json_schema()
+
+
+def test_compact_drops_titles_but_keeps_title_field(model_schema):
+    compact = json.loads(render_schema(model_schema, "compact"))
+
+    assert "title" not in compact
+    assert "title" in compact["properties"]
+    assert "title" not in compact["properties"]["score"]
+    assert compact["required"] == ["title"]
+
+
+def test_typescript_sketch(model_schema):
+    sketch = render_schema(model_schema, "typescript")
+
+    assert "type NestedObject = {" in sketch
+    assert "items?: NestedObject[] | null;" in sketch
+    # Repeated descriptions are only emitted once
+    assert sketch.count("// Short title") == 1
+
+    raw_sketch = render_schema(SCHEMA, "typescript")
+    assert "score?: integer /* >=0 <=100 */; // Score" in raw_sketch
+    assert "items?: {\n    label: string;\n  }[];" in raw_sketch
+
+
+def test_token_report_orders_formats(model_schema):
+    report = schema_token_report(model_schema)
+
+    assert report["typescript"]["tokens"] < report["compact"]["tokens"] < report["json"]["tokens"]
+
+
+def test_provider_renders_requested_format(model_schema):
+    model = create_response_model(SCHEMA, model_name="RenderResponse")
+    provider = OllamaAgent()
+
+    assert provider._format_schema_for_prompt(model, "compact") == render_schema(model_schema, "compact")
+    assert provider._format_schema_for_prompt(model) == json.dumps(model_schema, indent=2)
+    with pytest.raises(ValueError):
+        render_schema(model_schema, "yaml")
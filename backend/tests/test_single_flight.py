@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from agents.agent_loader import AgentLoader
+from agents.general_codes import single_flight
+from agents.general_codes.single_flight import SingleFlight
+
+
+@pytest.fixture
+def echo_agent(tmp_path, monkeypatch, mock_provider):
+    agent_dir = tmp_path / "echo"
+    agent_dir.mkdir()
+    (agent_dir / "prompt.txt").write_text("Echo the input.")
+
+    provider = mock_provider("gemini", latency="fixed:0.05")
+    monkeypatch.setattr(single_flight, "_single_flight", SingleFlight(enabled=True))
+
+    return AgentLoader(agents_dir=tmp_path).load_agent("echo"), provider
+
+
+def test_identical_concurrent_requests_share_one_call(echo_agent):
+    agent, provider = echo_agent
+
+    async def run():
+        return await asyncio.gather(
+            *[agent.process("breaking: markets rally") for _ in range(8)],
+            agent.process("  breaking:   markets rally\n"),
+            agent.process("something else")
+        )
+
+    results = asyncio.run(run())
+
+    assert provider.calls == 2
+    assert results[0]["result"] != results[9]["result"]
+    assert all(result == results[0] for result in results[:9])
+    # Callers do not share mutable results
+    assert len({id(result) for result in results}) == len(results)
+    assert single_flight._single_flight.stats() == {"in_flight": 0, "executed": 2, "coalesced": 8}
+
+
+def test_different_params_are_not_coalesced(echo_agent):
+    agent, provider = echo_agent
+
+    async def run():
+        await asyncio.gather(
+            agent.process("same", temperature=0.0),
+            agent.process("same", temperature=0.9),
+            agent.process("same", model="gemini-2.0-flash-exp")
+        )
+
+    asyncio.run(run())
+
+    assert provider.calls == 3
+
+
+def test_errors_reach_all_callers_and_cancelled_leader_keeps_call_alive():
+    flight = SingleFlight(enabled=True)
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        raise ConnectionError("503")
+
+    async def slow():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    async def run():
+        errors = await asyncio.gather(
+            flight.do("a", failing), flight.do("a", failing), return_exceptions=True
+        )
+
+        leader = asyncio.ensure_future(flight.do("b", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("b", slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return errors, await follower
+
+    errors, result = asyncio.run(run())
+
+    assert all(isinstance(error, ConnectionError) for error in errors)
+    assert result == {"ok": True}
+    assert calls == 2
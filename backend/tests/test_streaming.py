@@ -0,0 +1,217 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+import agents.agent_loader as agent_loader
+from agents.agent_loader import AgentLoader
+from agents.general_codes.ai_model_selector import AIModelSelector
+from agents.general_codes.concurrency_limiter import get_concurrency_limits
+from agents.general_codes import retry_policy
+from agents.general_codes.provider_registry import get_provider_registry
+from agents.general_codes.retry_policy import RetryPolicy, get_retry_policy
+from app.routes.agents import router
+from modules.agents.gemini_agent import GeminiAgent
+from modules.agents.mock_agent import MockAgent, MockProviderError
+from modules.agents.usage import track_usage
+from modules.interactive.ai_chat.module import AIChatModule
+
+
+CHUNK_SECONDS = 0.05
+
+
+class _StreamingGeminiModel:
+    """Stands in for genai.GenerativeModel, streaming fixed chunks."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def generate_content_async(self, prompt, generation_config=None, stream=False):
+        assert stream
+
+        async def iterate():
+            for i, text in enumerate(self.chunks):
+                await asyncio.sleep(CHUNK_SECONDS)
+                yield SimpleNamespace(
+                    text=text,
+                    usage_metadata=SimpleNamespace(
+                        prompt_token_count=12, candidates_token_count=i + 1, cached_content_token_count=0
+                    )
+                )
+
+        return iterate()
+
+
+@pytest.fixture
+def limits():
+    return get_concurrency_limits()
+
+
+def _gemini(chunks):
+    provider = GeminiAgent(api_key="test-key")
+    provider.model = _StreamingGeminiModel(chunks)
+    get_provider_registry().register(provider)
+    return provider
+
+
+def test_selector_yields_chunks_as_they_arrive(limits):
+    _gemini(["Hel", "lo ", "world"])
+
+    async def run():
+        arrivals = []
+        start = time.perf_counter()
+        with track_usage() as usage:
+            async for chunk in AIModelSelector().generate_stream("hi", model="gemini"):
+                arrivals.append((chunk, time.perf_counter() - start))
+        return arrivals, usage
+
+    arrivals, usage = asyncio.run(run())
+
+    assert [chunk for chunk, _ in arrivals] == ["Hel", "lo ", "world"]
+    # The first chunk is not held back until the stream completes
+    assert arrivals[0][1] < arrivals[-1][1] - CHUNK_SECONDS
+    assert (usage.input_tokens, usage.output_tokens) == (12, 3)
+    assert all(limiter.in_flight == 0 for limiter in limits._limiters.values())
+
+
+def test_abandoned_stream_releases_its_slot(limits):
+    _gemini(["a", "b", "c"])
+
+    async def run():
+        stream = AIModelSelector().generate_stream("hi", model="gemini")
+        first = await stream.__anext__()
+        await stream.aclose()
+        return first
+
+    assert asyncio.run(run()) == "a"
+    assert [limiter.in_flight for limiter in limits._limiters.values()] == [0]
+
+
+def _client_post(path, **kwargs):
+    app = FastAPI()
+    app.include_router(router)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, **kwargs)
+
+    return asyncio.run(run())
+
+
+def test_agent_stream_route_ndjson_and_sse(tmp_path, monkeypatch):
+    _gemini(['{"label": ', '"news"}'])
+    for name, files in {
+        "echo": {"prompt.txt": "Echo the input."},
+        "label": {
+            "prompt.txt": "Label the input.",
+            "structure_output.json": json.dumps({
+                "type": "object",
+                "properties": {"label": {"type": "string"}},
+                "required": ["label"]
+            })
+        }
+    }.items():
+        agent_dir = tmp_path / name
+        agent_dir.mkdir()
+        for filename, content in files.items():
+            (agent_dir / filename).write_text(content)
+    monkeypatch.setattr(agent_loader, "_loader", AgentLoader(agents_dir=tmp_path))
+
+    response = _client_post("/agents/echo/stream", json={"input": "post"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events == [
+        {"type": "delta", "text": '{"label": '},
+        {"type": "delta", "text": '"news"}'},
+        {"type": "result", "data": {"result": '{"label": "news"}'}}
+    ]
+
+    response = _client_post("/agents/label/stream?format=sse", json={"input": "post"})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    messages = response.text.strip().split("\n\n")
+    assert messages[-1] == 'event: result\ndata: {"type": "result", "data": {"label": "news"}}'
+
+    assert _client_post("/agents/missing/stream", json={"input": "post"}).status_code == 404
+    assert _client_post("/agents/echo/stream?format=xml", json={"input": "post"}).status_code == 400
+
+
+class _Chunks(MockAgent):
+    """Streams fixed chunks, failing at chunk fail_after."""
+
+    def __init__(self, provider_type, chunks, fail_after=None):
+        super().__init__(f"{provider_type}-model")
+        self.provider = provider_type
+        self.chunks = chunks
+        self.fail_after = fail_after
+
+    async def generate_stream(self, prompt, system_prompt=None, **kwargs):
+        await self._simulate()
+        for i, chunk in enumerate(self.chunks):
+            if i == self.fail_after:
+                raise ConnectionError(f"{self.provider} connection reset")
+            yield chunk
+
+
+class _RateLimitedOnce(_Chunks):
+    """Rejects the first stream with a 429 before any chunk."""
+
+    async def generate_stream(self, prompt, system_prompt=None, **kwargs):
+        if self.calls == 0:
+            await self._simulate()
+            raise MockProviderError(429, "rate limited")
+        async for chunk in super().generate_stream(prompt, system_prompt, **kwargs):
+            yield chunk
+
+
+def test_stream_start_is_retried_but_not_a_started_stream(monkeypatch):
+    monkeypatch.setattr(retry_policy, "_retry_policy", RetryPolicy(base_delay=0))
+
+    async def stream(provider):
+        get_provider_registry().register(provider)
+        return [chunk async for chunk in AIModelSelector().generate_stream("hi", model="gemini")]
+
+    provider = _RateLimitedOnce("gemini", ["Hel", "lo"])
+    provider.model_name = "gemini-2.0-flash-exp"
+    assert asyncio.run(stream(provider)) == ["Hel", "lo"]
+    assert provider.calls == 2
+    assert get_retry_policy().stats()["recovered"] == 1
+
+    # Chunks already yielded cannot be taken back, so a broken stream is not retried
+    provider = _Chunks("gemini", ["Par", "tial"], fail_after=1)
+    provider.model_name = "gemini-2.0-flash-exp"
+    with pytest.raises(ConnectionError):
+        asyncio.run(stream(provider))
+    assert provider.calls == 1
+
+
+def _collect(module, input_data):
+    async def run():
+        return [event async for event in module.process_stream(input_data)]
+
+    return asyncio.run(run())
+
+
+def test_chat_stream_falls_back_only_before_first_chunk():
+    module = AIChatModule()
+    module._agents = {
+        "gemini": _Chunks("gemini", ["x"], fail_after=0),
+        "openai": _Chunks("openai", ["Hi", " there"])
+    }
+
+    events = _collect(module, {"text": "hello"})
+
+    assert [event["type"] for event in events] == ["delta", "delta", "done"]
+    assert events[-1]["response"] == "Hi there"
+    assert events[-1]["provider"] == "openai"
+
+    module._agents["gemini"] = _Chunks("gemini", ["Par", "tial"], fail_after=1)
+    events = _collect(module, {"text": "hello"})
+
+    assert [event["type"] for event in events] == ["delta", "error"]
+    assert events[-1]["provider"] == "gemini"
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import random
+
+import pytest
+
+from agents.agent_loader import AgentLoader
+from agents.waterfall.simple_orchestrator import SimpleWaterfallOrchestrator
+from modules.agents.mock_agent import MockAgent
+from modules.agents.streaming_json import StreamingJSONParser
+
+
+DOCUMENT = {
+    "should_process": False,
+    "relevance_score": 0.25,
+    "skip_reason": 'spam: "win} a [prize]" \\ now',
+    "entity_hints": [{"text": "ACME", "type": "organization"}],
+    "detected_domains": [],
+    "confidence": None,
+    "count": -1.5e3
+}
+
+
+@pytest.mark.parametrize("text", [
+    json.dumps(DOCUMENT),
+    "```json\n" + json.dumps(DOCUMENT, indent=2) + "\n```",
+    "Here is the assessment: " + json.dumps(DOCUMENT, separators=(",", ":")) + " Done."
+])
+def test_fields_match_full_parse_for_any_chunking(text):
+    rng = random.Random(7)
+    for _ in range(20):
+        parser = StreamingJSONParser()
+        completed = []
+        position = 0
+        while position < len(text):
+            size = rng.randint(1, 6)
+            completed += parser.feed(text[position:position + size])
+            position += size
+
+        assert dict(completed) == DOCUMENT
+        assert [name for name, _ in completed] == list(DOCUMENT)
+        assert parser.done
+
+
+def test_fields_are_reported_once_complete_and_hooks_stop():
+    parser = StreamingJSONParser()
+    parser.on("should_process", lambda value: value is False)
+
+    assert parser.feed('{"should_process": fal') == []
+    assert parser.feed("se") == []
+    assert parser.feed(', "relevance') == [("should_process", False)]
+    assert parser.stopped_by == "should_process"
+    assert parser.feed('_score": 0.9}') == []
+    assert parser.fields == {"should_process": False}
+
+
+class _ScriptedGate(MockAgent):
+    """Streams scripted JSON for the gate agent, answers others immediately."""
+
+    gate_output = []
+
+    def __init__(self, model_name, **kwargs):
+        super().__init__(model_name, **kwargs)
+        self.streamed = []
+        self.events = []
+        self.downstream_started = asyncio.Event()
+
+    async def generate(self, prompt, system_prompt=None, **kwargs):
+        self.events.append("downstream")
+        self.downstream_started.set()
+        return "extracted"
+
+    async def generate_structured_stream(self, prompt, response_model, system_prompt=None, **kwargs):
+        try:
+            for index, chunk in enumerate(self.gate_output):
+                await asyncio.sleep(0.01)
+                if index == len(self.gate_output) - 1:
+                    # Only an opened gate gets this far; it must have started the next stage
+                    await asyncio.wait_for(self.downstream_started.wait(), 5)
+                self.streamed.append(chunk)
+                yield chunk
+        finally:
+            self.events.append("gate closed")
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch, mock_provider):
+    # One slot per endpoint: the streaming gate must not hold the slot the next stage needs
+    monkeypatch.setenv("LLM_CONCURRENCY_INITIAL", "1")
+    monkeypatch.setenv("LLM_CONCURRENCY_MAX", "1")
+
+    gate_dir = tmp_path / "gate"
+    gate_dir.mkdir()
+    (gate_dir / "prompt.txt").write_text("Triage the input.")
+    (gate_dir / "structure_output.json").write_text(json.dumps({
+        "type": "object",
+        "properties": {
+            "should_process": {"type": "boolean"},
+            "skip_reason": {"type": "string"},
+            "reasoning": {"type": "string"}
+        },
+        "required": ["should_process"]
+    }))
+    extract_dir = tmp_path / "extract"
+    extract_dir.mkdir()
+    (extract_dir / "prompt.txt").write_text("Extract.")
+
+    def build(gate_output):
+        provider = mock_provider("gemini", agent_class=_ScriptedGate)
+        provider.gate_output = gate_output
+
+        orchestrator = SimpleWaterfallOrchestrator()
+        orchestrator.loader = AgentLoader(agents_dir=tmp_path)
+        orchestrator.stages = [
+            {"agent": "gate", "model": "gemini", "required": True, "gate": "should_process"},
+            {"agent": "extract", "model": "gemini", "required": False}
+        ]
+        return orchestrator, provider
+
+    return build
+
+
+def test_closed_gate_stops_generation_and_pipeline(pipeline):
+    orchestrator, provider = pipeline(['{"should_process": ', "false", ', "skip_reason": ', '"spam"', "}"])
+
+    result = asyncio.run(orchestrator.process("win a prize"))
+
+    assert result["processed"] is False
+    assert result["results"] == {"gate": {"should_process": False}}
+    # Generation stopped right after the gate field completed
+    assert provider.streamed == ['{"should_process": ', "false", ', "skip_reason": ']
+    assert provider.events == ["gate closed"]
+
+
+def test_open_gate_starts_downstream_before_gate_finishes(pipeline):
+    orchestrator, provider = pipeline([
+        '{"should_process": true, ', '"reasoning": ', '"relevant ', 'news"', "}"
+    ])
+
+    result = asyncio.run(orchestrator.process("markets rally"))
+
+    assert result["processed"] is True
+    assert result["results"]["gate"] == {"should_process": True, "skip_reason": None, "reasoning": "relevant news"}
+    assert result["results"]["extract"] == {"result": "extracted"}
+    assert provider.events == ["downstream", "gate closed"]
+
+
+def test_batching_gate_agent_gates_on_its_full_result(tmp_path, pipeline):
+    (tmp_path / "gate" / "info.txt").write_text("name: gate\nbatch_size: 4\n")
+    orchestrator, provider = pipeline(['{"should_process": true}'])
+
+    result = asyncio.run(orchestrator.process("markets rally"))
+
+    # Not streamed, so the call can be batched, cached and retried
+    assert provider.streamed == [] and "gate closed" not in provider.events
+    assert "should_process" in result["results"]["gate"]